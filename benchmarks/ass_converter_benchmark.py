@@ -0,0 +1,186 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "service.translatarr"))
+
+import ass_converter  # noqa: E402
+import srt_cues  # noqa: E402
+
+
+SCRIPT_HEADER = """[Script Info]
+; Script generated by ass_converter_benchmark
+Title: Synthetic fansub
+ScriptType: v4.00+
+WrapStyle: 0
+PlayResX: 1920
+PlayResY: 1080
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Default,Open Sans Semibold,72,&H00FFFFFF,&H000000FF,&H00020713,&H00000000,-1,0,0,0,100,100,0,0,1,3.6,1.5,2,165,165,60,1
+Style: Sign,Arial,60,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,0,8,10,10,10,1
+Style: Karaoke,Arial,54,&H00FFFFFF,&H000000FF,&H00000000,&H00000000,0,0,0,0,100,100,0,0,1,2,0,8,10,10,10,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+DIALOGUE_LINES = [
+    "Where do you think you're going?",
+    "{\\i1}I told you already.{\\i0}\\NI'm not coming back.",
+    "{\\an8}Senpai, wait for me!",
+    "That's... not what I meant, okay?",
+    "{\\fad(200,200)\\blur0.6}We have to hurry,\\Nthe gate closes at midnight.",
+    "Huh?",
+]
+
+
+def format_ass_time(ms):
+    hours, remainder = divmod(ms, 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    seconds, millis = divmod(remainder, 1000)
+    return "{0}:{1:02d}:{2:02d}.{3:02d}".format(hours, minutes, seconds, millis // 10)
+
+
+def dialogue(layer, start_ms, end_ms, style, text, kind="Dialogue"):
+    return "{0}: {1},{2},{3},{4},,0,0,0,,{5}\n".format(
+        kind, layer, format_ass_time(start_ms), format_ass_time(end_ms), style, text
+    )
+
+
+def build_fansub_script(minutes):
+    """
+    Build an ASS script shaped like an anime fansub release: dialogue with
+    override tags, karaoke song lines, signs typeset frame by frame with
+    layered borders, vector drawings and commented-out lines.
+    Returns (script, expected_cues).
+    """
+    events = []
+    expected = []
+    duration_ms = minutes * 60000
+    clock = 2000
+    number = 0
+    while clock + 4000 < duration_ms:
+        text = DIALOGUE_LINES[number % len(DIALOGUE_LINES)]
+        end_ms = clock + 1800 + (number % 4) * 200
+        events.append(dialogue(0, clock, end_ms, "Default", text))
+        expected.append((clock, end_ms, ass_converter.clean_dialogue_text(text)))
+
+        if number % 10 == 0:
+            # A sign tracked frame by frame, with a blurred border layer under it
+            sign_start = clock + 100
+            for frame in range(36):
+                frame_start = sign_start + frame * 50
+                position = "{{\\pos({0},{1})\\fs60}}".format(900 + frame * 2, 200)
+                for layer, extra in ((0, "\\bord6\\blur4\\3c&H000000&"), (1, "")):
+                    events.append(dialogue(
+                        layer, frame_start, frame_start + 50, "Sign",
+                        position[:-1] + extra + "}Sakura Station"
+                    ))
+            events.append(dialogue(0, sign_start, sign_start + 1800, "Sign",
+                                   "{\\p1}m 0 0 l 100 0 100 100 0 100{\\p0}"))
+            expected.append((sign_start, sign_start + 1800, "Sakura Station"))
+
+        if number % 7 == 0:
+            karaoke_start = end_ms + 100
+            events.append(dialogue(
+                0, karaoke_start, karaoke_start + 1500, "Karaoke",
+                "{\\k20}Ki{\\k25}mi {\\k30}no {\\k40}ko{\\k35}e"
+            ))
+            events.append(dialogue(0, karaoke_start, karaoke_start + 1500, "Karaoke",
+                                   "Your voice", kind="Comment"))
+            expected.append((karaoke_start, karaoke_start + 1500, "Kimi no koe"))
+
+        clock += 3200 + (number % 5) * 150
+        number += 1
+
+    expected.sort()
+    return SCRIPT_HEADER + "".join(events), expected
+
+
+def ffmpeg_convert(ffmpeg, input_path, output_path):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [ffmpeg, "-y", "-loglevel", "error", "-i", input_path, output_path],
+        capture_output=True,
+        check=False
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        return None, elapsed
+    with open(output_path, "r", encoding="utf-8", errors="replace") as handle:
+        timestamps, _ = srt_cues.parse_text(handle.read())
+    return len(timestamps or []), elapsed
+
+
+def run_case(label, input_path, ffmpeg, repeats, expected=None):
+    with tempfile.TemporaryDirectory(prefix="translatarr_ass_") as temp_dir:
+        output_path = os.path.join(temp_dir, "native.srt")
+        best = None
+        result = None
+        for _ in range(repeats):
+            started = time.perf_counter()
+            result = ass_converter.convert_file(input_path, output_path)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+
+        if not result.get("success"):
+            print("{0:<12} FAILED: {1}".format(label, result))
+            return False
+
+        line = "{0:<12} native {1:>7.1f} ms | {2:>5} cues".format(label, best * 1000, result["cue_count"])
+        identical = True
+        if expected is not None:
+            with open(output_path, "r", encoding="utf-8") as handle:
+                identical = handle.read() == ass_converter.format_srt(expected)
+            line += " | expected cues {0}".format(identical)
+
+        if ffmpeg:
+            ffmpeg_cues, ffmpeg_elapsed = ffmpeg_convert(ffmpeg, input_path, os.path.join(temp_dir, "ffmpeg.srt"))
+            if ffmpeg_cues is None:
+                line += " | ffmpeg failed"
+            else:
+                line += " | ffmpeg {0:>7.1f} ms, {1:>5} cues".format(ffmpeg_elapsed * 1000, ffmpeg_cues)
+        print(line)
+        return identical
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare the built-in ASS/SSA to SRT converter with an ffmpeg conversion."
+    )
+    parser.add_argument("--file", action="append", help="existing .ass/.ssa file; can be repeated")
+    parser.add_argument("--ffmpeg", help="ffmpeg binary to compare against (default: from PATH)")
+    parser.add_argument("--minutes", type=int, default=24, help="length of the generated episode")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    ffmpeg = args.ffmpeg or shutil.which("ffmpeg")
+    if not ffmpeg:
+        print("ffmpeg not found, timing the built-in converter only.")
+
+    if args.file:
+        return 0 if all(
+            run_case(os.path.basename(path)[:12], path, ffmpeg, args.repeats) for path in args.file
+        ) else 1
+
+    script, expected = build_fansub_script(args.minutes)
+    with tempfile.TemporaryDirectory(prefix="translatarr_ass_") as temp_dir:
+        input_path = os.path.join(temp_dir, "episode.ass")
+        with open(input_path, "w", encoding="utf-8-sig") as handle:
+            handle.write(script)
+        print("Synthetic episode: {0} minutes, {1} events".format(args.minutes, script.count("\nDialogue:")))
+        ok = run_case("synthetic", input_path, ffmpeg, args.repeats, expected)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "service.translatarr"))
+
+import mkv_demuxer as mkv  # noqa: E402
+import srt_cues  # noqa: E402
+
+
+VIDEO_TRACK = 1
+AUDIO_TRACK = 2
+SUBTITLE_TRACK = 3
+OTHER_SUBTITLE_TRACK = 4
+CLUSTER_DURATION_MS = 5000
+VIDEO_FRAME_MS = 40
+AUDIO_FRAME_MS = 32
+
+
+def encode_id(element_id):
+    length = (element_id.bit_length() + 7) // 8
+    return element_id.to_bytes(length, "big")
+
+
+def encode_size(size, length=None):
+    if length is None:
+        length = 1
+        while size >= (1 << (7 * length)) - 1:
+            length += 1
+    return (size | (1 << (7 * length))).to_bytes(length, "big")
+
+
+def element(element_id, payload):
+    return encode_id(element_id) + encode_size(len(payload)) + payload
+
+
+def uint_element(element_id, value, length=None):
+    length = length or max(1, (value.bit_length() + 7) // 8)
+    return element(element_id, value.to_bytes(length, "big"))
+
+
+def string_element(element_id, value):
+    return element(element_id, value.encode("utf-8"))
+
+
+def block_payload(track_number, relative_timecode, payload, keyframe=True):
+    flags = 0x80 if keyframe else 0x00
+    return (
+        encode_size(track_number)
+        + relative_timecode.to_bytes(2, "big", signed=True)
+        + bytes([flags])
+        + payload
+    )
+
+
+def build_subtitle_cues(duration_ms):
+    cues = []
+    start_ms = 1200
+    number = 1
+    while start_ms + 2500 < duration_ms:
+        text = "Line {0}: where are you going?".format(number)
+        if number % 3 == 0:
+            text += "\n- Nowhere, I promise."
+        cues.append((start_ms, 1800 + (number % 5) * 100, text))
+        start_ms += 2700 + (number % 7) * 150
+        number += 1
+    return cues
+
+
+def track_entry(track_number, track_type, codec_id, language, encodings=b""):
+    payload = (
+        uint_element(mkv.TRACK_NUMBER_ID, track_number)
+        + uint_element(mkv.TRACK_TYPE_ID, track_type)
+        + string_element(mkv.CODEC_ID_ID, codec_id)
+        + string_element(mkv.LANGUAGE_ID, language)
+    )
+    if encodings:
+        payload += element(mkv.CONTENT_ENCODINGS_ID, encodings)
+    return element(mkv.TRACK_ENTRY_ID, payload)
+
+
+def subtitle_encoding(compression):
+    if compression == "zlib":
+        settings = b""
+        algo = mkv.COMPRESSION_ZLIB
+    elif compression == "header":
+        settings = b"Line "
+        algo = mkv.COMPRESSION_HEADER_STRIPPING
+    else:
+        return b"", lambda data: data
+
+    compression_payload = uint_element(mkv.CONTENT_COMP_ALGO_ID, algo)
+    if settings:
+        compression_payload += element(mkv.CONTENT_COMP_SETTINGS_ID, settings)
+    encoding = element(
+        mkv.CONTENT_ENCODING_ID,
+        uint_element(mkv.CONTENT_ENCODING_SCOPE_ID, 1)
+        + uint_element(mkv.CONTENT_ENCODING_TYPE_ID, 0)
+        + element(mkv.CONTENT_COMPRESSION_ID, compression_payload)
+    )
+
+    if compression == "zlib":
+        return encoding, zlib.compress
+    return encoding, lambda data: data[len(settings):] if data.startswith(settings) else data
+
+
+def write_fixture(path, duration_ms, video_frame_size, with_cues, compression):
+    """
+    Write a small but structurally realistic Matroska file: a video, an
+    audio and two text subtitle tracks interleaved in 5 s clusters, with
+    the Cues index after the clusters like mkvmerge does.
+    """
+    cues = build_subtitle_cues(duration_ms)
+    encodings, encode_frame = subtitle_encoding(compression)
+    video_frame = os.urandom(video_frame_size)
+    audio_frame = os.urandom(384)
+
+    tracks = element(
+        mkv.TRACKS_ID,
+        track_entry(VIDEO_TRACK, 1, "V_MPEG4/ISO/AVC", "und")
+        + track_entry(AUDIO_TRACK, 2, "A_AC3", "eng")
+        + track_entry(SUBTITLE_TRACK, mkv.TRACK_TYPE_SUBTITLE, "S_TEXT/UTF8", "eng", encodings)
+        + track_entry(OTHER_SUBTITLE_TRACK, mkv.TRACK_TYPE_SUBTITLE, "S_TEXT/UTF8", "ger")
+    )
+    info = element(
+        mkv.INFO_ID,
+        uint_element(mkv.TIMECODE_SCALE_ID, mkv.DEFAULT_TIMECODE_SCALE)
+        + string_element(mkv.WRITING_APP_ID, "mkvmerge v81.0 ('Milliontown') 64-bit")
+    )
+
+    def seek_entry(element_id, position):
+        return element(
+            mkv.SEEK_ID,
+            element(mkv.SEEK_ID_ID, encode_id(element_id))
+            + uint_element(mkv.SEEK_POSITION_ID, position, length=8)
+        )
+
+    seek_head_size = len(element(mkv.SEEK_HEAD_ID, b"".join(
+        seek_entry(element_id, 0) for element_id in (mkv.INFO_ID, mkv.TRACKS_ID, mkv.CUES_ID)
+    )))
+
+    with open(path, "wb") as handle:
+        handle.write(element(mkv.EBML_HEADER_ID, string_element(0x4282, "matroska")))
+        handle.write(encode_id(mkv.SEGMENT_ID) + encode_size(0, 8))
+        segment_start = handle.tell()
+
+        handle.write(b"\0" * seek_head_size)
+        info_position = handle.tell() - segment_start
+        handle.write(info)
+        tracks_position = handle.tell() - segment_start
+        handle.write(tracks)
+
+        cue_points = []
+        subtitle_index = 0
+        for cluster_start in range(0, duration_ms, CLUSTER_DURATION_MS):
+            cluster_end = min(cluster_start + CLUSTER_DURATION_MS, duration_ms)
+            children = [(cluster_start - 1, uint_element(mkv.CLUSTER_TIMECODE_ID, cluster_start), None)]
+            for frame_ms in range(cluster_start, cluster_end, VIDEO_FRAME_MS):
+                children.append((frame_ms, element(
+                    mkv.SIMPLE_BLOCK_ID,
+                    block_payload(VIDEO_TRACK, frame_ms - cluster_start, video_frame)
+                ), None))
+            for frame_ms in range(cluster_start, cluster_end, AUDIO_FRAME_MS):
+                children.append((frame_ms, element(
+                    mkv.SIMPLE_BLOCK_ID,
+                    block_payload(AUDIO_TRACK, frame_ms - cluster_start, audio_frame)
+                ), None))
+            while subtitle_index < len(cues) and cues[subtitle_index][0] < cluster_end:
+                start_ms, length_ms, text = cues[subtitle_index]
+                for track_number, track_text, frame_encoder in (
+                    (SUBTITLE_TRACK, text, encode_frame),
+                    (OTHER_SUBTITLE_TRACK, "Zeile {0}".format(subtitle_index + 1), lambda data: data),
+                ):
+                    group = element(
+                        mkv.BLOCK_GROUP_ID,
+                        element(mkv.BLOCK_ID, block_payload(
+                            track_number,
+                            start_ms - cluster_start,
+                            frame_encoder(track_text.encode("utf-8"))
+                        ))
+                        + uint_element(mkv.BLOCK_DURATION_ID, length_ms)
+                    )
+                    children.append((start_ms, group, (track_number, start_ms, length_ms)))
+                subtitle_index += 1
+
+            children.sort(key=lambda child: child[0])
+            cluster_position = handle.tell() - segment_start
+            body = bytearray()
+            for _, data, cue_info in children:
+                if cue_info is not None:
+                    cue_points.append((cue_info, cluster_position, len(body)))
+                body += data
+            handle.write(encode_id(mkv.CLUSTER_ID) + encode_size(len(body), 8))
+            handle.write(body)
+
+        cues_position = handle.tell() - segment_start
+        if with_cues:
+            points = b""
+            for (track_number, start_ms, length_ms), cluster_position, relative_position in cue_points:
+                points += element(
+                    mkv.CUE_POINT_ID,
+                    uint_element(mkv.CUE_TIME_ID, start_ms)
+                    + element(
+                        mkv.CUE_TRACK_POSITIONS_ID,
+                        uint_element(mkv.CUE_TRACK_ID, track_number)
+                        + uint_element(mkv.CUE_CLUSTER_POSITION_ID, cluster_position)
+                        + uint_element(mkv.CUE_RELATIVE_POSITION_ID, relative_position)
+                        + uint_element(mkv.CUE_DURATION_ID, length_ms)
+                    )
+                )
+            handle.write(element(mkv.CUES_ID, points))
+
+        segment_size = handle.tell() - segment_start
+        seek_entries = [(mkv.INFO_ID, info_position), (mkv.TRACKS_ID, tracks_position)]
+        if with_cues:
+            seek_entries.append((mkv.CUES_ID, cues_position))
+        seek_head = element(mkv.SEEK_HEAD_ID, b"".join(
+            seek_entry(element_id, position) for element_id, position in seek_entries
+        ))
+        # Pad the reserved area with an EBML Void element
+        padding = seek_head_size - len(seek_head)
+        if padding:
+            seek_head += b"\xec" + encode_size(padding - 2, 1) + b"\0" * (padding - 2)
+
+        handle.seek(segment_start)
+        handle.write(seek_head)
+        handle.seek(segment_start - 8)
+        handle.write(encode_size(segment_size, 8))
+
+    return cues
+
+
+def expected_srt(cues):
+    return "".join(
+        "{0}\n{1}\n{2}\n\n".format(number, srt_cues.format_timing(start_ms, start_ms + length_ms), text)
+        for number, (start_ms, length_ms, text) in enumerate(cues, 1)
+    )
+
+
+def run_case(label, args, with_cues, compression):
+    with tempfile.TemporaryDirectory(prefix="translatarr_mkv_") as temp_dir:
+        media_path = os.path.join(temp_dir, "fixture.mkv")
+        output_path = os.path.join(temp_dir, "fixture.eng.srt")
+        cues = write_fixture(
+            media_path,
+            args.minutes * 60000,
+            args.video_frame_kib * 1024,
+            with_cues,
+            compression
+        )
+
+        probe = mkv.probe_subtitle_tracks(media_path)
+        started = time.perf_counter()
+        result = mkv.extract_srt(media_path, "2", output_path)
+        elapsed = time.perf_counter() - started
+        if not result.get("success"):
+            print("{0:<22} FAILED: {1}".format(label, result))
+            return False
+
+        with open(output_path, "r", encoding="utf-8") as handle:
+            identical = handle.read() == expected_srt(cues)
+
+        print(
+            "{0:<22} {1:>7.1f} ms | read {2:>9.1f} KiB of {3:>8.1f} MiB ({4:.3%}) in {5:>6} calls "
+            "| probe {6:.1f} KiB | method {7} | cues {8} | identical {9}".format(
+                label,
+                elapsed * 1000,
+                result["bytes_read"] / 1024.0,
+                result["file_size"] / 1048576.0,
+                result["bytes_read"] / float(result["file_size"]),
+                result["read_calls"],
+                probe.get("bytes_read", 0) / 1024.0,
+                result["method"],
+                result["cue_count"],
+                identical
+            )
+        )
+        return identical
+
+
+def run_file(args):
+    probe = mkv.probe_subtitle_tracks(args.file)
+    print("Probe: {0}".format(probe))
+    if not probe.get("success") or args.track is None:
+        return 0 if probe.get("success") else 1
+
+    output_path = args.output or os.path.splitext(args.file)[0] + ".demuxed.srt"
+    started = time.perf_counter()
+    result = mkv.extract_srt(args.file, args.track, output_path)
+    print("Extract in {0:.1f} ms: {1}".format((time.perf_counter() - started) * 1000, result))
+    return 0 if result.get("success") else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how much of a Matroska file mkv_demuxer reads to extract a text subtitle."
+    )
+    parser.add_argument("--file", help="existing .mkv file to probe instead of generated fixtures")
+    parser.add_argument("--track", help="mkvmerge track ID to extract from --file")
+    parser.add_argument("--output", help="SRT output path for --file")
+    parser.add_argument("--minutes", type=int, default=4, help="duration of the generated fixtures")
+    parser.add_argument("--video-frame-kib", type=int, default=16, help="size of each fake video frame")
+    args = parser.parse_args()
+
+    if args.file:
+        return run_file(args)
+
+    results = [
+        run_case("cues index", args, True, None),
+        run_case("cluster walk", args, False, None),
+        run_case("cluster walk + zlib", args, False, "zlib"),
+        run_case("cues + header strip", args, True, "header"),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+import argparse
+import os
+import struct
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "service.translatarr"))
+
+import mp4_demuxer as mp4  # noqa: E402
+import srt_cues  # noqa: E402
+
+
+VIDEO_FPS = 25
+TIMESCALE = 1000
+
+
+def box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, payload, version=0, flags=0):
+    return box(box_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def pack_language(code):
+    value = 0
+    for char in code:
+        value = (value << 5) | (ord(char) - 0x60)
+    return value
+
+
+def build_subtitle_cues(duration_ms):
+    cues = []
+    start_ms = 1500
+    number = 1
+    while start_ms + 3000 < duration_ms:
+        text = "Line {0}: are you coming?".format(number)
+        if number % 4 == 0:
+            text += "\n- Not tonight, sorry."
+        cues.append((start_ms, 1700 + (number % 5) * 120, text))
+        start_ms += 3100 + (number % 6) * 170
+        number += 1
+    return cues
+
+
+def tx3g_samples(cues, duration_ms):
+    # mov_text tracks are continuous: gaps are filled with empty samples
+    samples = []
+    clock = 0
+    for start_ms, length_ms, text in cues:
+        if start_ms > clock:
+            samples.append((clock, start_ms - clock, b"\x00\x00"))
+        payload = text.encode("utf-8")
+        samples.append((start_ms, length_ms, struct.pack(">H", len(payload)) + payload))
+        clock = start_ms + length_ms
+    if clock < duration_ms:
+        samples.append((clock, duration_ms - clock, b"\x00\x00"))
+    return samples
+
+
+def sample_table(sample_format, durations, sizes, chunk_offsets, samples_per_chunk, use_co64):
+    stts_entries = []
+    for duration in durations:
+        if stts_entries and stts_entries[-1][1] == duration:
+            stts_entries[-1][0] += 1
+        else:
+            stts_entries.append([1, duration])
+
+    stsc_entries = []
+    for chunk_number, count in enumerate(samples_per_chunk, 1):
+        if not stsc_entries or stsc_entries[-1][1] != count:
+            stsc_entries.append((chunk_number, count, 1))
+
+    sample_entry = box(sample_format, b"\x00" * 6 + struct.pack(">H", 1) + b"\x00" * 32)
+    if use_co64:
+        offsets_box = full_box(b"co64", struct.pack(">I", len(chunk_offsets)) + b"".join(
+            struct.pack(">Q", offset) for offset in chunk_offsets
+        ))
+    else:
+        offsets_box = full_box(b"stco", struct.pack(">I", len(chunk_offsets)) + b"".join(
+            struct.pack(">I", offset) for offset in chunk_offsets
+        ))
+
+    return box(b"stbl", b"".join((
+        full_box(b"stsd", struct.pack(">I", 1) + sample_entry),
+        full_box(b"stts", struct.pack(">I", len(stts_entries)) + b"".join(
+            struct.pack(">II", count, delta) for count, delta in stts_entries
+        )),
+        full_box(b"stsc", struct.pack(">I", len(stsc_entries)) + b"".join(
+            struct.pack(">III", *entry) for entry in stsc_entries
+        )),
+        full_box(b"stsz", struct.pack(">II", 0, len(sizes)) + b"".join(
+            struct.pack(">I", size) for size in sizes
+        )),
+        offsets_box,
+    )))
+
+
+def trak(track_number, handler_type, name, language, duration_ms, stbl):
+    tkhd = full_box(b"tkhd", struct.pack(">IIIII", 0, 0, track_number, 0, duration_ms) + b"\x00" * 60, flags=3)
+    mdhd = full_box(b"mdhd", struct.pack(">IIIIHH", 0, 0, TIMESCALE, duration_ms, pack_language(language), 0))
+    hdlr = full_box(b"hdlr", struct.pack(">I4s12x", 0, handler_type) + name.encode("utf-8") + b"\x00")
+    return box(b"trak", tkhd + box(b"mdia", mdhd + hdlr + box(b"minf", stbl)))
+
+
+def write_fixture(path, duration_ms, video_frame_size, use_co64):
+    """
+    Write an MP4 with a video track and an English tx3g track interleaved
+    one second at a time, with moov at the end of the file.
+    """
+    cues = build_subtitle_cues(duration_ms)
+    subtitle_samples = tx3g_samples(cues, duration_ms)
+    video_frame = os.urandom(video_frame_size)
+    frame_ms = 1000 // VIDEO_FPS
+
+    video_sizes = []
+    video_chunks = []
+    video_per_chunk = []
+    subtitle_chunks = []
+    subtitle_per_chunk = []
+
+    with open(path, "wb") as handle:
+        handle.write(box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isommp42"))
+        mdat_position = handle.tell()
+        handle.write(struct.pack(">I4sQ", 1, b"mdat", 0))
+
+        subtitle_index = 0
+        for second_start in range(0, duration_ms, 1000):
+            second_end = min(second_start + 1000, duration_ms)
+            video_chunks.append(handle.tell())
+            count = 0
+            for _ in range(second_start, second_end, frame_ms):
+                handle.write(video_frame)
+                video_sizes.append(video_frame_size)
+                count += 1
+            video_per_chunk.append(count)
+
+            count = 0
+            chunk_position = handle.tell()
+            while subtitle_index < len(subtitle_samples) and subtitle_samples[subtitle_index][0] < second_end:
+                handle.write(subtitle_samples[subtitle_index][2])
+                subtitle_index += 1
+                count += 1
+            if count:
+                subtitle_chunks.append(chunk_position)
+                subtitle_per_chunk.append(count)
+
+        mdat_end = handle.tell()
+        moov = box(b"moov", b"".join((
+            full_box(b"mvhd", struct.pack(">IIII", 0, 0, TIMESCALE, duration_ms) + b"\x00" * 80),
+            trak(1, b"vide", "VideoHandler", "und", duration_ms, sample_table(
+                b"avc1",
+                [frame_ms] * len(video_sizes),
+                video_sizes,
+                video_chunks,
+                video_per_chunk,
+                use_co64
+            )),
+            trak(2, b"sbtl", "English", "eng", duration_ms, sample_table(
+                b"tx3g",
+                [sample[1] for sample in subtitle_samples],
+                [len(sample[2]) for sample in subtitle_samples],
+                subtitle_chunks,
+                subtitle_per_chunk,
+                use_co64
+            )),
+        )))
+        handle.write(moov)
+
+        handle.seek(mdat_position + 8)
+        handle.write(struct.pack(">Q", mdat_end - mdat_position))
+
+    return cues
+
+
+def expected_srt(cues):
+    return "".join(
+        "{0}\n{1}\n{2}\n\n".format(number, srt_cues.format_timing(start_ms, start_ms + length_ms), text)
+        for number, (start_ms, length_ms, text) in enumerate(cues, 1)
+    )
+
+
+def run_case(label, args, use_co64):
+    with tempfile.TemporaryDirectory(prefix="translatarr_mp4_") as temp_dir:
+        media_path = os.path.join(temp_dir, "fixture.mp4")
+        output_path = os.path.join(temp_dir, "fixture.eng.srt")
+        cues = write_fixture(media_path, args.minutes * 60000, args.video_frame_kib * 1024, use_co64)
+
+        probe = mp4.probe_subtitle_tracks(media_path)
+        started = time.perf_counter()
+        result = mp4.extract_srt(media_path, "1", output_path)
+        elapsed = time.perf_counter() - started
+        if not result.get("success"):
+            print("{0:<10} FAILED: {1}".format(label, result))
+            return False
+
+        with open(output_path, "r", encoding="utf-8") as handle:
+            identical = handle.read() == expected_srt(cues)
+
+        print(
+            "{0:<10} {1:>7.1f} ms | read {2:>8.1f} KiB of {3:>8.1f} MiB ({4:.3%}) in {5:>5} calls "
+            "| probe {6:.1f} KiB | cues {7} | identical {8}".format(
+                label,
+                elapsed * 1000,
+                result["bytes_read"] / 1024.0,
+                result["file_size"] / 1048576.0,
+                result["bytes_read"] / float(result["file_size"]),
+                result["read_calls"],
+                probe.get("bytes_read", 0) / 1024.0,
+                result["cue_count"],
+                identical
+            )
+        )
+        return identical
+
+
+def run_file(args):
+    probe = mp4.probe_subtitle_tracks(args.file)
+    print("Probe: {0}".format(probe))
+    if not probe.get("success") or args.track is None:
+        return 0 if probe.get("success") else 1
+
+    output_path = args.output or os.path.splitext(args.file)[0] + ".demuxed.srt"
+    started = time.perf_counter()
+    result = mp4.extract_srt(args.file, args.track, output_path)
+    print("Extract in {0:.1f} ms: {1}".format((time.perf_counter() - started) * 1000, result))
+    return 0 if result.get("success") else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how much of an MP4 file mp4_demuxer reads to extract a tx3g subtitle."
+    )
+    parser.add_argument("--file", help="existing .mp4 file to probe instead of generated fixtures")
+    parser.add_argument("--track", help="ffprobe stream index to extract from --file")
+    parser.add_argument("--output", help="SRT output path for --file")
+    parser.add_argument("--minutes", type=int, default=4, help="duration of the generated fixtures")
+    parser.add_argument("--video-frame-kib", type=int, default=16, help="size of each fake video frame")
+    args = parser.parse_args()
+
+    if args.file:
+        return run_file(args)
+
+    results = [
+        run_case("stco", args, False),
+        run_case("co64", args, True),
+    ]
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
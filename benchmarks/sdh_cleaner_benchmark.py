@@ -0,0 +1,186 @@
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "service.translatarr"))
+
+import sdh_cleaner  # noqa: E402
+
+
+GOLDEN_CORPUS = Path(__file__).resolve().parent / "fixtures" / "sdh_golden_corpus.json"
+LEGACY_MUSIC_NOTE_CHARS = u"\u266a\u266b\u266c\u2669"
+
+
+# Copy of the per-cue regex cleaner that file_manager used before sdh_cleaner.
+def _legacy_normalize_fragment(fragment):
+    cleaned = fragment.strip().strip("[](){}")
+    cleaned = re.sub(r'\s+', ' ', cleaned)
+    return cleaned.strip()
+
+
+def _legacy_looks_like_dialogue(fragment):
+    cleaned = _legacy_normalize_fragment(fragment)
+    if not cleaned:
+        return False
+
+    words = re.findall(r"[A-Za-z0-9']+", cleaned)
+    if not words:
+        return False
+
+    if any(ch in cleaned for ch in '"?!'):
+        return True
+
+    if "..." in cleaned or "\u2026" in cleaned:
+        return False
+
+    if "," in cleaned or ";" in cleaned:
+        return True
+
+    if "." in cleaned and len(words) <= 2:
+        return True
+
+    return False
+
+
+def _legacy_clean_line(line):
+    stripped = line.strip()
+    if not stripped:
+        return ""
+
+    no_music = stripped.translate({ord(ch): None for ch in LEGACY_MUSIC_NOTE_CHARS}).strip()
+    if stripped != no_music:
+        if not no_music:
+            return ""
+        if stripped.startswith(tuple(LEGACY_MUSIC_NOTE_CHARS)) or stripped.endswith(tuple(LEGACY_MUSIC_NOTE_CHARS)):
+            return ""
+
+    if re.match(r'^\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*$', stripped):
+        if not _legacy_looks_like_dialogue(stripped):
+            return ""
+
+    working = stripped
+    prefix_pattern = r'^\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*'
+    while True:
+        match = re.match(prefix_pattern, working)
+        if not match:
+            break
+        if _legacy_looks_like_dialogue(match.group(1)):
+            break
+        working = working[match.end():].lstrip()
+
+    suffix_pattern = r'\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*$'
+    while True:
+        match = re.search(suffix_pattern, working)
+        if not match:
+            break
+        if _legacy_looks_like_dialogue(match.group(1)):
+            break
+        working = working[:match.start()].rstrip()
+
+    speaker_match = re.match(r"^\s*[A-Z][A-Z0-9 .'\-]{1,24}:\s+(.+)$", working)
+    if speaker_match:
+        working = speaker_match.group(1).strip()
+
+    return working.strip()
+
+
+def legacy_clean_sdh_hi_text(text):
+    cleaned_lines = []
+    for line in text.split(' [BR] '):
+        cleaned = _legacy_clean_line(line)
+        if cleaned:
+            cleaned_lines.append(cleaned)
+
+    if not cleaned_lines:
+        return None
+    return ' [BR] '.join(cleaned_lines)
+
+
+SYNTHETIC_LINES = [
+    "[MUSIC PLAYING]",
+    "(sighs)",
+    "♪ Somewhere over the rainbow ♪",
+    "[door slams] Get out of here!",
+    "JOHN: Where are you going?",
+    "I told you, we don't have time for this.",
+    "(laughing) That's the best part.",
+    "- Are you sure? [BR] - Yes.",
+    "We need to leave before midnight (thunder rumbling)",
+    "[Hello, how are you?]",
+    "MARY: [whispering] Stay quiet.",
+    "Nothing ever happens in this town.",
+]
+
+
+def build_synthetic_texts(cue_count, seed):
+    rng = random.Random(seed)
+    return [rng.choice(SYNTHETIC_LINES) for _ in range(cue_count)]
+
+
+def check_golden_corpus():
+    with GOLDEN_CORPUS.open("r", encoding="utf-8") as handle:
+        corpus = json.load(handle)
+
+    inputs = [item[0] for item in corpus]
+    expected = [item[1] for item in corpus]
+    per_cue = [sdh_cleaner.clean_sdh_hi_text(text) for text in inputs]
+    batched = sdh_cleaner.clean_sdh_hi_texts(inputs)
+    legacy = [legacy_clean_sdh_hi_text(text) for text in inputs]
+
+    mismatches = [
+        (text, want, got)
+        for text, want, got in zip(inputs, expected, batched)
+        if want != got
+    ]
+    print(
+        "Golden corpus: {0} cues | per-cue identical={1} batch identical={2} legacy identical={3}".format(
+            len(inputs), per_cue == expected, batched == expected, legacy == expected
+        )
+    )
+    for text, want, got in mismatches[:10]:
+        print("  MISMATCH {0!r}: expected {1!r}, got {2!r}".format(text, want, got))
+    return not mismatches
+
+
+def measure(fn, texts, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn(texts)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy regex SDH/HI cleaner with sdh_cleaner.")
+    parser.add_argument("--cues", type=int, default=20000, help="cue count for the synthetic subtitle")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=20261019)
+    args = parser.parse_args()
+
+    identical = check_golden_corpus()
+
+    texts = build_synthetic_texts(args.cues, args.seed)
+    print("Synthetic subtitle: {0} cues".format(len(texts)))
+
+    for name, fn in (
+        ("legacy regex", lambda items: [legacy_clean_sdh_hi_text(text) for text in items]),
+        ("per-cue", lambda items: [sdh_cleaner.clean_sdh_hi_text(text) for text in items]),
+        ("batch", sdh_cleaner.clean_sdh_hi_texts),
+    ):
+        elapsed = measure(fn, texts, args.repeats)
+        per_cue_us = elapsed * 1000000.0 / len(texts) if texts else 0
+        print("{0:<14} {1:>8.1f} ms | {2:>6.2f} us/cue".format(name, elapsed * 1000, per_cue_us))
+
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
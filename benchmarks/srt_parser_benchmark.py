@@ -0,0 +1,114 @@
+import argparse
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "service.translatarr"))
+
+import srt_cues  # noqa: E402
+
+
+def legacy_parse_srt(content):
+    # Copy of the whole-file regex parser that file_manager.parse_srt used before srt_cues.
+    content = content.replace('\r\n', '\n').replace('\r', '\n')
+    blocks = re.findall(
+        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\n$|$)',
+        content,
+        re.DOTALL
+    )
+    if not blocks:
+        return None, None
+
+    timestamps = [(b[0], b[1]) for b in blocks]
+    texts = [b[2].replace('\n', ' [BR] ') for b in blocks]
+    return timestamps, texts
+
+
+def build_synthetic_srt(cue_count):
+    blocks = []
+    for index in range(1, cue_count + 1):
+        start_ms = index * 2500
+        blocks.append(
+            "{0}\n{1}\n{2}\n{3}\n".format(
+                index,
+                srt_cues.format_timing(start_ms, start_ms + 2000),
+                "Line {0}: the quick brown fox jumps over the lazy dog.".format(index),
+                "- And a second line for cue {0}?".format(index)
+            )
+        )
+    return "\n".join(blocks)
+
+
+def legacy_from_bytes(raw):
+    return legacy_parse_srt(raw.decode("utf-8", errors="replace"))
+
+
+def streaming_from_bytes(raw):
+    chunks = (
+        raw[offset:offset + srt_cues.READ_CHUNK_SIZE]
+        for offset in range(0, len(raw), srt_cues.READ_CHUNK_SIZE)
+    )
+    lines = srt_cues.iter_lines(srt_cues.iter_decoded_chunks(chunks))
+    return srt_cues.collect_cues(srt_cues.iter_cues(lines))
+
+
+def measure(parse_fn, raw, repeats):
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        parse_fn(raw)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    result = parse_fn(raw)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the legacy regex SRT parser with srt_cues.")
+    parser.add_argument("srt_file", nargs="?", help="SRT file to parse (default: synthetic file)")
+    parser.add_argument("--cues", type=int, default=8000, help="cue count for the synthetic file")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.srt_file:
+        raw = Path(args.srt_file).read_bytes()
+        label = args.srt_file
+    else:
+        raw = build_synthetic_srt(args.cues).encode("utf-8")
+        label = "synthetic ({0} cues)".format(args.cues)
+
+    print("Input: {0} | {1:.1f} KiB".format(label, len(raw) / 1024.0))
+
+    legacy_time, legacy_peak, legacy_result = measure(legacy_from_bytes, raw, args.repeats)
+    stream_time, stream_peak, stream_result = measure(streaming_from_bytes, raw, args.repeats)
+
+    legacy_cues = len(legacy_result[1] or [])
+    stream_cues = len(stream_result[1] or [])
+
+    for name, elapsed, peak, cues in (
+        ("legacy regex", legacy_time, legacy_peak, legacy_cues),
+        ("srt_cues stream", stream_time, stream_peak, stream_cues),
+    ):
+        rate = cues / elapsed if elapsed else 0
+        print(
+            "{0:<16} {1:>8.1f} ms | {2:>10.0f} cues/s | peak {3:>8.1f} KiB | cues {4}".format(
+                name, elapsed * 1000, rate, peak / 1024.0, cues
+            )
+        )
+
+    if legacy_result[1] is not None and stream_result[1] is not None:
+        same_texts = legacy_result[1] == stream_result[1]
+        same_timings = list(legacy_result[0]) == list(stream_result[0])
+        print("Output identical: texts={0} timings={1}".format(same_texts, same_timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+import re
+
+import srt_cues
+
+
+ASS_TIME_RE = re.compile(r"^\s*(\d+):(\d{1,2}):(\d{1,2})[.:](\d{1,3})\s*$")
+OVERRIDE_BLOCK_RE = re.compile(r"\{[^}]*\}")
+DRAWING_MODE_RE = re.compile(r"\\p(\d+)")
+DEFAULT_EVENT_FORMAT = (
+    "layer", "start", "end", "style", "name", "marginl", "marginr", "marginv", "effect", "text",
+)
+# Matroska stores ReadOrder, Layer, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+MATROSKA_EVENT_FIELD_COUNT = 9
+ADJACENT_GAP_MS = 10
+
+
+def _parse_time(value):
+    match = ASS_TIME_RE.match(value)
+    if not match:
+        raise ValueError("Invalid ASS timestamp: {0!r}".format(value))
+    hours, minutes, seconds, fraction = match.groups()
+    # ASS uses centiseconds: "0:00:01.5" means 500 ms
+    millis = int((fraction + "00")[:3])
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + millis
+
+
+def clean_dialogue_text(text):
+    """
+    Turn the Text field of an ASS/SSA event into plain subtitle text.
+    Override blocks and vector drawings are dropped, \\N becomes a line
+    break, \\n and \\h become spaces. Returns "" when nothing readable is left.
+    """
+    if "{" in text:
+        parts = []
+        drawing = False
+        position = 0
+        for match in OVERRIDE_BLOCK_RE.finditer(text):
+            if not drawing:
+                parts.append(text[position:match.start()])
+            for level in DRAWING_MODE_RE.findall(match.group(0)):
+                drawing = level != "0"
+            position = match.end()
+        if not drawing:
+            parts.append(text[position:])
+        text = "".join(parts)
+
+    if "\\" in text:
+        text = text.replace("\\N", "\n").replace("\\n", " ").replace("\\h", " ")
+
+    lines = []
+    for line in text.split("\n"):
+        line = " ".join(line.split())
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+def matroska_event_text(payload_text):
+    """
+    Return the cleaned dialogue of one S_TEXT/ASS or S_TEXT/SSA Matroska block.
+    """
+    fields = payload_text.split(",", MATROSKA_EVENT_FIELD_COUNT - 1)
+    if len(fields) < MATROSKA_EVENT_FIELD_COUNT:
+        return clean_dialogue_text(payload_text)
+    return clean_dialogue_text(fields[-1])
+
+
+def iter_events(lines):
+    """
+    Yield (start_ms, end_ms, text) for every Dialogue line of the [Events]
+    section, in file order. Field positions come from the section's Format
+    line; the Text field may contain commas.
+    """
+    section = None
+    event_format = DEFAULT_EVENT_FORMAT
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line or line.startswith(";"):
+            continue
+
+        if line.startswith("[") and line.endswith("]"):
+            section = line[1:-1].strip().lower()
+            continue
+        if section != "events":
+            continue
+
+        key, separator, value = line.partition(":")
+        if not separator:
+            continue
+        key = key.strip().lower()
+        if key == "format":
+            event_format = tuple(field.strip().lower() for field in value.split(","))
+            continue
+        if key != "dialogue":
+            continue
+
+        values = value.split(",", len(event_format) - 1)
+        if len(values) < len(event_format):
+            continue
+        event = dict(zip(event_format, values))
+        try:
+            start_ms = _parse_time(event.get("start", ""))
+            end_ms = _parse_time(event.get("end", ""))
+        except ValueError:
+            continue
+
+        text = clean_dialogue_text(event.get("text", ""))
+        if text and end_ms > start_ms:
+            yield start_ms, end_ms, text
+
+
+def iter_merged_cues(events):
+    """
+    Merge (start_ms, end_ms, text) events sorted by start into SRT cues.
+    Events with the same timing become one cue and lines repeated across
+    layers appear once. Identical text split over touching events, as
+    frame-by-frame typesetting does, becomes a single cue.
+    A cue is yielded as soon as no later event can extend it, so long
+    cues may come after shorter ones that started later.
+    """
+    open_cues = []
+    for start_ms, end_ms, text in events:
+        still_open = []
+        for cue in open_cues:
+            if cue[1] + ADJACENT_GAP_MS < start_ms:
+                yield cue[0], cue[1], "\n".join(cue[2])
+            else:
+                still_open.append(cue)
+        open_cues = still_open
+
+        lines = text.split("\n")
+        for cue in open_cues:
+            if cue[0] == start_ms and cue[1] == end_ms:
+                for line in lines:
+                    if line not in cue[2]:
+                        cue[2].append(line)
+                break
+            if cue[2] == lines and start_ms <= cue[1] + ADJACENT_GAP_MS:
+                cue[1] = max(cue[1], end_ms)
+                break
+        else:
+            open_cues.append([start_ms, end_ms, lines])
+
+    for cue in open_cues:
+        yield cue[0], cue[1], "\n".join(cue[2])
+
+
+def parse_text(content):
+    """
+    Return the merged (start_ms, end_ms, text) cues of an ASS/SSA script,
+    sorted by start time.
+    """
+    events = sorted(iter_events(content.splitlines()), key=lambda event: event[0])
+    return sorted(iter_merged_cues(events), key=lambda cue: (cue[0], cue[1]))
+
+
+def format_srt(cues):
+    return "".join(
+        "{0}\n{1}\n{2}\n\n".format(number, srt_cues.format_timing(start_ms, end_ms), text)
+        for number, (start_ms, end_ms, text) in enumerate(cues, 1)
+    )
+
+
+def _decode_script(data):
+    if data.startswith((b"\xff\xfe", b"\xfe\xff")):
+        return data.decode("utf-16", errors="replace")
+    return data.decode("utf-8-sig", errors="replace")
+
+
+def convert_file(input_path, output_path):
+    """
+    Convert an ASS/SSA script to an SRT file without external tools.
+    """
+    try:
+        with open(input_path, "rb") as handle:
+            content = _decode_script(handle.read())
+    except OSError as exc:
+        return {"success": False, "reason": "ass_read_failed", "error": str(exc)}
+
+    cues = parse_text(content)
+    if not cues:
+        return {"success": False, "reason": "ass_no_dialogue"}
+
+    try:
+        with open(output_path, "w", encoding="utf-8", newline="\n") as output:
+            output.write(format_srt(cues))
+    except OSError as exc:
+        return {"success": False, "reason": "ass_write_failed", "error": str(exc)}
+
+    return {"success": True, "output_path": output_path, "cue_count": len(cues)}
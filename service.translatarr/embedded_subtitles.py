@@ -1,12 +1,22 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import json
 import os
+import queue
 import re
 import shutil
 import subprocess
+import sys
 import tempfile
+import threading
+import time
 from urllib.parse import unquote, urlsplit
 
+import ass_converter
+import mkv_demuxer
+import mp4_demuxer
+import srt_cues
+
 
 SDH_MARKERS_RE = re.compile(
     r"(sdh|cc|hi|hearing.?impaired|closed.?caption|forced)",
@@ -15,6 +25,21 @@ SDH_MARKERS_RE = re.compile(
 LOCAL_COMMAND_TIMEOUT_SECONDS = 60
 NETWORK_COMMAND_TIMEOUT_SECONDS = 900
 SUPPORTED_EMBEDDED_SUBTITLE_EXTENSIONS = (".mkv", ".mp4")
+PROBE_CACHE_VERSION = 1
+MAX_PROBE_CACHE_ENTRIES = 200
+MAX_TRACK_CACHE_ENTRIES = 100
+COMMAND_POLL_SECONDS = 0.25
+MKVINFO_TRACK_RE = re.compile(r"^\|\s+\+\sTrack$")
+MKVINFO_FIELD_RE = re.compile(r"^\|\s+\+\s(.+?):\s*(.*)$")
+MKVINFO_TRACK_ID_RE = re.compile(r"track ID for mkvmerge & mkvextract:\s*([0-9]+)", re.IGNORECASE)
+MKVINFO_LANGUAGE_RE = re.compile(r"^([a-zA-Z0-9_-]+)")
+TOOL_VERSION_RE = re.compile(r"\bv?(\d+)\.(\d+)")
+TOOL_VERSION_TIMEOUT_SECONDS = 10
+# mkvmerge 9.0 added -J as shorthand for --identification-format json
+MKVMERGE_JSON_MIN_VERSION = (9, 0)
+PRIORITY_PLAYBACK = 0
+PRIORITY_PREFETCH = 10
+JOB_WAIT_POLL_SECONDS = 0.25
 
 
 def _log(log_fn, message, level="debug"):
@@ -101,6 +126,21 @@ def _resolve_filesystem_path(path):
     return None
 
 
+def is_locally_extractable(media_path):
+    """
+    True when media_path maps to a file this machine can open directly in a
+    container the built-in demuxers read (MKV, MP4). smb://, nfs:// and other
+    VFS paths that do not map to a filesystem path are left to the remote
+    extractor.
+    """
+    resolved_media_path = _resolve_filesystem_path(media_path)
+    if not resolved_media_path:
+        return False
+    if not resolved_media_path.lower().endswith(SUPPORTED_EMBEDDED_SUBTITLE_EXTENSIONS):
+        return False
+    return os.path.isfile(resolved_media_path)
+
+
 def _is_network_filesystem_path(path):
     return bool(path and path.startswith("\\\\"))
 
@@ -111,190 +151,302 @@ def _build_output_path(output_dir, media_path, source_lang_iso):
     return os.path.join(output_dir, "{0}.{1}.srt".format(safe_base, source_lang_iso))
 
 
-def _run_command(command, log_fn=None, timeout_seconds=LOCAL_COMMAND_TIMEOUT_SECONDS):
+# Set per worker thread by ExtractionScheduler for background jobs
+_process_context = threading.local()
+
+
+def _with_process_priority(command):
+    return list(getattr(_process_context, "command_prefix", ())) + command
+
+
+def _run_command(command, log_fn=None, timeout_seconds=LOCAL_COMMAND_TIMEOUT_SECONDS, cancel_event=None):
+    """
+    Run command to completion and return (ok, stdout, error). The child is
+    killed when it outlives timeout_seconds or when cancel_event is set.
+    """
     try:
-        completed = subprocess.run(
-            command,
-            capture_output=True,
+        process = subprocess.Popen(
+            _with_process_priority(command),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            check=False,
             encoding="utf-8",
-            errors="ignore",
-            timeout=timeout_seconds
-        )
-    except subprocess.TimeoutExpired:
-        _log(
-            log_fn,
-            "Command timed out after {0}s: {1}".format(timeout_seconds, command[0]),
-            "error"
+            errors="ignore"
         )
-        return False, "", "timeout"
     except Exception as exc:
         _log(log_fn, "Command failed to start: {0} | Error: {1}".format(command[0], exc), "error")
         return False, "", str(exc)
 
-    if completed.returncode != 0:
-        stderr = (completed.stderr or completed.stdout or "").strip()
-        return False, completed.stdout or "", stderr
-
-    return True, completed.stdout or "", ""
-
+    deadline = time.time() + timeout_seconds
+    while True:
+        try:
+            stdout, stderr = process.communicate(timeout=COMMAND_POLL_SECONDS)
+            break
+        except subprocess.TimeoutExpired:
+            if cancel_event is not None and cancel_event.is_set():
+                process.kill()
+                process.communicate()
+                _log(log_fn, "Command cancelled: {0}".format(command[0]))
+                return False, "", "cancelled"
+            if time.time() >= deadline:
+                process.kill()
+                process.communicate()
+                _log(
+                    log_fn,
+                    "Command timed out after {0}s: {1}".format(timeout_seconds, command[0]),
+                    "error"
+                )
+                return False, "", "timeout"
+
+    if process.returncode != 0:
+        return False, stdout or "", (stderr or stdout or "").strip()
+
+    return True, stdout or "", ""
+
+
+def _stream_command_lines(
+    command,
+    on_line,
+    log_fn=None,
+    timeout_seconds=LOCAL_COMMAND_TIMEOUT_SECONDS,
+    cancel_event=None
+):
+    """
+    Run command and hand every stdout line to on_line as soon as it is
+    printed. The child is killed as soon as on_line returns True, on
+    timeout, or when cancel_event is set.
+    Returns (ok, stopped_early, error).
+    """
+    try:
+        process = subprocess.Popen(
+            _with_process_priority(command),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding="utf-8",
+            errors="ignore"
+        )
+    except Exception as exc:
+        _log(log_fn, "Command failed to start: {0} | Error: {1}".format(command[0], exc), "error")
+        return False, False, str(exc)
+
+    finished = threading.Event()
+    stop_reason = []
+
+    def watch():
+        deadline = time.time() + timeout_seconds
+        while not finished.wait(COMMAND_POLL_SECONDS):
+            if cancel_event is not None and cancel_event.is_set():
+                stop_reason.append("cancelled")
+            elif time.time() >= deadline:
+                stop_reason.append("timeout")
+            else:
+                continue
+            process.kill()
+            return
 
-def _parse_mkvinfo_tracks(output, source_variants, source_lang_name):
-    source_tokens = set(v.lower() for v in source_variants)
-    source_name = (source_lang_name or "").strip().lower()
-    tracks = []
+    watcher = threading.Thread(target=watch)
+    watcher.daemon = True
+    watcher.start()
 
-    current = None
+    stopped_early = False
+    last_line = ""
+    try:
+        for line in process.stdout:
+            line = line.rstrip("\r\n")
+            if on_line(line):
+                stopped_early = True
+                break
+            if line.strip():
+                last_line = line.strip()
+    finally:
+        finished.set()
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        return_code = process.wait()
 
-    def finalize_track():
-        if not current:
-            return
-        if current.get("is_subtitle") and current.get("is_source_language") and current.get("track_id"):
-            tracks.append(
-                {
-                    "track_id": current["track_id"],
-                    "is_sdh": current.get("is_sdh", False),
-                    "name": current.get("name", ""),
-                }
-            )
+    if stop_reason == ["timeout"]:
+        _log(
+            log_fn,
+            "Command timed out after {0}s: {1}".format(timeout_seconds, command[0]),
+            "error"
+        )
+        return False, False, "timeout"
+
+    if stop_reason == ["cancelled"]:
+        _log(log_fn, "Command cancelled: {0}".format(command[0]))
+        return False, False, "cancelled"
+
+    if stopped_early:
+        return True, True, ""
+
+    if return_code != 0:
+        return False, False, last_line
+
+    return True, False, ""
+
+
+class _MkvinfoTrackParser(object):
+    """
+    Incremental parser for mkvinfo output that collects every subtitle
+    track, whatever its language. feed() returns True once the Tracks
+    element has been listed completely, so the caller can stop mkvinfo
+    instead of waiting for the rest of the file to be described.
+    """
+
+    def __init__(self):
+        self.tracks = []
+        self.line_count = 0
+        self._current = None
+        self._in_tracks = False
+
+    def _finalize_track(self):
+        current = self._current
+        self._current = None
+        if current and current["is_subtitle"] and current["track_id"]:
+            del current["is_subtitle"]
+            self.tracks.append(current)
+
+    def feed(self, raw_line):
+        self.line_count += 1
+        if raw_line.startswith("|+ "):
+            # Top-level Segment children: the one after Tracks closes the track list
+            if self._in_tracks:
+                self._finalize_track()
+                return True
+            self._in_tracks = raw_line[3:].strip().lower().startswith("tracks")
+            return False
 
-    for raw_line in output.splitlines():
         line = raw_line.strip()
-
-        if re.match(r"^\|\s+\+\sTrack$", line):
-            finalize_track()
-            current = {
+        if MKVINFO_TRACK_RE.match(line):
+            self._finalize_track()
+            self._current = {
                 "track_id": None,
-                "is_subtitle": False,
-                "is_source_language": False,
-                "is_sdh": False,
+                "codec": "",
+                "language": "",
+                "language_ietf": "",
                 "name": "",
+                "is_forced": False,
+                "is_hearing_impaired": False,
+                "is_subtitle": False,
             }
-            continue
-
-        if current is None:
-            continue
+            return False
+
+        if self._current is None:
+            return False
+
+        field_match = MKVINFO_FIELD_RE.match(line)
+        if not field_match:
+            return False
+
+        key, value = field_match.group(1), field_match.group(2)
+        current = self._current
+        if key == "Track number":
+            track_id_match = MKVINFO_TRACK_ID_RE.search(value)
+            if track_id_match:
+                current["track_id"] = track_id_match.group(1)
+        elif key == "Track type":
+            current["is_subtitle"] = value.startswith("subtitles")
+        elif key == "Codec ID":
+            current["codec"] = value.split()[0] if value.split() else ""
+        elif key == "Language":
+            language_match = MKVINFO_LANGUAGE_RE.match(value)
+            if language_match:
+                current["language"] = language_match.group(1).lower()
+        elif key == "Language (IETF BCP 47)":
+            language_match = MKVINFO_LANGUAGE_RE.match(value)
+            if language_match:
+                current["language_ietf"] = language_match.group(1).lower()
+        elif key == '"Forced display" flag':
+            current["is_forced"] = value.startswith("1")
+        elif key == '"Hearing impaired" flag':
+            current["is_hearing_impaired"] = value.startswith("1")
+        elif key == "Name":
+            current["name"] = value.strip()
+        return False
 
-        track_id_match = re.search(
-            r"track ID for mkvmerge & mkvextract:\s*([0-9]+)",
-            line,
-            re.IGNORECASE
-        )
-        if track_id_match:
-            current["track_id"] = track_id_match.group(1)
-
-        if "Track type: subtitles" in line:
-            current["is_subtitle"] = True
-
-        for pattern in (
-            r"Language:\s*([a-zA-Z0-9_-]+)",
-            r"Language \(IETF BCP 47\):\s*([a-zA-Z0-9_-]+)",
-        ):
-            lang_match = re.search(pattern, line, re.IGNORECASE)
-            if lang_match:
-                lang_token = lang_match.group(1).lower()
-                primary_token = lang_token.split("-")[0]
-                if lang_token in source_tokens or primary_token in source_tokens:
-                    current["is_source_language"] = True
-
-        name_match = re.search(r"\+\sName:\s*(.+)$", line)
-        if name_match:
-            track_name = name_match.group(1).strip()
-            current["name"] = track_name
-            lowered_name = track_name.lower()
-            if source_name and source_name in lowered_name:
-                current["is_source_language"] = True
-            if SDH_MARKERS_RE.search(track_name):
-                current["is_sdh"] = True
-
-    finalize_track()
-    return tracks
+    def close(self):
+        self._finalize_track()
+        return self.tracks
 
 
-def _pick_best_track(tracks):
-    if not tracks:
+def _parse_mkvmerge_json_tracks(output):
+    """
+    Return every subtitle track listed by mkvmerge -J, whatever its language.
+    """
+    try:
+        payload = json.loads(output or "{}")
+    except Exception:
         return None
 
-    for track in tracks:
-        if not track.get("is_sdh"):
-            return track
-    return tracks[0]
-
+    tracks = []
+    for track in payload.get("tracks") or []:
+        if track.get("type") != "subtitles" or track.get("id") is None:
+            continue
 
-def _find_matching_mkv_track(
-    resolved_media_path,
-    language_variants,
-    language_name,
-    command_timeout_seconds,
-    mkvinfo_path,
-    mkvextract_path,
-    log_fn=None
-):
-    mkvinfo = _find_tool("mkvinfo", mkvinfo_path)
-    mkvextract = _find_tool("mkvextract", mkvextract_path)
-    if not mkvinfo or not mkvextract:
-        return None, "required_tools_missing"
+        properties = track.get("properties") or {}
+        tracks.append(
+            {
+                "track_id": str(track["id"]),
+                "codec": str(properties.get("codec_id") or "").strip(),
+                "language": str(properties.get("language") or "").strip().lower(),
+                "language_ietf": str(properties.get("language_ietf") or "").strip().lower(),
+                "name": str(properties.get("track_name") or "").strip(),
+                "is_forced": bool(properties.get("forced_track")),
+                "is_hearing_impaired": bool(properties.get("flag_hearing_impaired")),
+            }
+        )
+    return tracks
 
-    _log(log_fn, "Running mkvinfo for embedded subtitle inspection.")
-    ok, mkvinfo_output, mkvinfo_error = _run_command(
-        [mkvinfo, resolved_media_path],
-        log_fn=log_fn,
-        timeout_seconds=command_timeout_seconds
-    )
-    if not ok:
-        _log(log_fn, "mkvinfo failed for {0}: {1}".format(resolved_media_path, mkvinfo_error), "error")
-        return None, "mkvinfo_failed"
 
-    tracks = _parse_mkvinfo_tracks(mkvinfo_output, language_variants, language_name)
-    best_track = _pick_best_track(tracks)
-    if not best_track:
-        return None, "no_matching_subtitle_track"
+def _parse_ffprobe_subtitle_streams(output):
+    """
+    Return every subtitle stream listed by ffprobe, whatever its language.
+    """
+    try:
+        payload = json.loads(output or "{}")
+    except Exception:
+        return []
 
-    return best_track, None
+    streams = payload.get("streams") or []
+    tracks = []
 
+    for stream in streams:
+        if str(stream.get("codec_type") or "").lower() != "subtitle":
+            continue
 
-def _find_matching_mp4_track(
-    resolved_media_path,
-    language_variants,
-    language_name,
-    command_timeout_seconds,
-    ffmpeg_path,
-    log_fn=None
-):
-    ffmpeg = _find_tool("ffmpeg", ffmpeg_path)
-    ffprobe = _find_sibling_tool(ffmpeg_path, "ffprobe") if ffmpeg_path else None
-    if not ffprobe:
-        ffprobe = _find_tool("ffprobe")
+        stream_index = stream.get("index")
+        if stream_index is None:
+            continue
 
-    if not ffmpeg or not ffprobe:
-        return None, "ffmpeg_or_ffprobe_missing"
+        tags = stream.get("tags") or {}
+        disposition = stream.get("disposition") or {}
+        tracks.append(
+            {
+                "track_id": str(stream_index),
+                "codec": str(stream.get("codec_name") or "").strip(),
+                "language": str(tags.get("language") or tags.get("LANGUAGE") or "").strip().lower(),
+                "language_ietf": "",
+                "name": str(tags.get("title") or tags.get("TITLE") or "").strip(),
+                "is_forced": bool(disposition.get("forced")),
+                "is_hearing_impaired": bool(disposition.get("hearing_impaired")),
+            }
+        )
 
-    _log(log_fn, "Running ffprobe for MP4 embedded subtitle inspection.")
-    ok, ffprobe_output, ffprobe_error = _run_command(
-        [
-            ffprobe,
-            "-v",
-            "error",
-            "-print_format",
-            "json",
-            "-show_entries",
-            "stream=index,codec_type,codec_name:stream_tags=language,title:stream_disposition=forced,hearing_impaired",
-            resolved_media_path,
-        ],
-        log_fn=log_fn,
-        timeout_seconds=command_timeout_seconds
-    )
-    if not ok:
-        _log(log_fn, "ffprobe failed for {0}: {1}".format(resolved_media_path, ffprobe_error), "error")
-        return None, "ffprobe_failed"
+    return tracks
 
-    tracks = _parse_ffprobe_subtitle_streams(ffprobe_output, language_variants, language_name)
-    best_track = _pick_best_track(tracks)
-    if not best_track:
-        return None, "no_matching_subtitle_track"
 
-    return best_track, None
+def _demuxer_track_info(track):
+    return {
+        "track_id": track["track_id"],
+        "codec": track.get("codec_id") or track.get("codec_name") or "",
+        "language": (track.get("language") or "").lower(),
+        "language_ietf": (track.get("language_ietf") or "").lower(),
+        "name": track.get("name", ""),
+        "is_forced": bool(track.get("is_forced")),
+        "is_hearing_impaired": bool(track.get("is_hearing_impaired")),
+    }
 
 
 def _is_source_language_match(language_token, source_tokens):
@@ -306,234 +458,893 @@ def _is_source_language_match(language_token, source_tokens):
     return normalized in source_tokens or primary in source_tokens
 
 
-def _parse_ffprobe_subtitle_streams(output, source_variants, source_lang_name):
+def _select_matching_tracks(tracks, source_variants, source_lang_name):
     source_tokens = set(v.lower() for v in source_variants)
     source_name = (source_lang_name or "").strip().lower()
+    matches = []
 
-    try:
-        payload = json.loads(output or "{}")
-    except Exception:
-        return []
+    for track in tracks:
+        track_name = track.get("name", "")
+        is_source_language = (
+            _is_source_language_match(track.get("language_ietf"), source_tokens)
+            or _is_source_language_match(track.get("language"), source_tokens)
+            or bool(source_name and source_name in track_name.lower())
+        )
+        if not is_source_language:
+            continue
 
-    streams = payload.get("streams") or []
-    tracks = []
+        matches.append(
+            {
+                "track_id": track["track_id"],
+                "is_sdh": bool(
+                    track.get("is_hearing_impaired")
+                    or track.get("is_forced")
+                    or (track_name and SDH_MARKERS_RE.search(track_name))
+                ),
+                "name": track_name,
+                "codec": track.get("codec", ""),
+            }
+        )
 
-    for stream in streams:
-        if str(stream.get("codec_type") or "").lower() != "subtitle":
-            continue
+    return matches
 
-        stream_index = stream.get("index")
-        if stream_index is None:
-            continue
 
-        tags = stream.get("tags") or {}
-        language_token = str(tags.get("language") or tags.get("LANGUAGE") or "").strip()
-        title = str(tags.get("title") or tags.get("TITLE") or "").strip()
-        disposition = stream.get("disposition") or {}
-        lowered_title = title.lower()
+def _pick_best_track(tracks):
+    if not tracks:
+        return None
 
-        is_sdh = bool(
-            disposition.get("hearing_impaired")
-            or disposition.get("forced")
-            or (title and SDH_MARKERS_RE.search(title))
-        )
+    for track in tracks:
+        if not track.get("is_sdh"):
+            return track
+    return tracks[0]
 
-        is_source_language = _is_source_language_match(language_token, source_tokens)
-        if not is_source_language and source_name and source_name in lowered_title:
-            is_source_language = True
-
-        if is_source_language:
-            tracks.append(
-                {
-                    "track_id": str(stream_index),
-                    "is_sdh": is_sdh,
-                    "name": title,
-                    "codec_name": str(stream.get("codec_name") or "").strip(),
-                }
-            )
 
-    return tracks
+def _media_identity(resolved_media_path):
+    try:
+        stat = os.stat(resolved_media_path)
+    except OSError:
+        return None
+    return {
+        "path": resolved_media_path,
+        "size": stat.st_size,
+        "mtime": int(stat.st_mtime),
+    }
 
 
-def _looks_like_ass_or_ssa(path):
+def _media_cache_key(identity):
+    raw_key = "{0}|{1}|{2}".format(identity["path"], identity["size"], identity["mtime"])
+    return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+
+def _probe_cache_file(probe_cache_dir, identity):
+    return os.path.join(probe_cache_dir, _media_cache_key(identity) + ".json")
+
+
+def _load_cached_probe(probe_cache_dir, identity):
+    if not probe_cache_dir or not identity:
+        return None
+
     try:
-        with open(path, "rb") as handle:
-            header = handle.read(512)
+        with open(_probe_cache_file(probe_cache_dir, identity), "r", encoding="utf-8") as handle:
+            entry = json.load(handle)
     except Exception:
-        return False
+        return None
+
+    if not isinstance(entry, dict) or entry.get("version") != PROBE_CACHE_VERSION:
+        return None
+    for field in ("path", "size", "mtime"):
+        if entry.get(field) != identity[field]:
+            return None
+
+    tracks = entry.get("tracks")
+    if not isinstance(tracks, list):
+        return None
+    return tracks
+
 
+def _prune_probe_cache(probe_cache_dir):
     try:
-        text_header = header.decode("utf-8", errors="ignore")
+        names = [name for name in os.listdir(probe_cache_dir) if name.endswith(".json")]
     except Exception:
-        return False
+        return
 
-    return "[Script Info]" in text_header or "[V4+ Styles]" in text_header
+    if len(names) <= MAX_PROBE_CACHE_ENTRIES:
+        return
 
+    entries = []
+    for name in names:
+        path = os.path.join(probe_cache_dir, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except Exception:
+            continue
 
-def _extract_mkv_subtitle(
-    resolved_media_path,
-    output_path,
-    source_variants,
-    source_lang_name,
-    command_timeout_seconds,
-    mkvinfo_path,
-    mkvextract_path,
-    ffmpeg_path,
-    log_fn=None
-):
-    mkvextract = _find_tool("mkvextract", mkvextract_path)
-    if not mkvextract:
-        return {"success": False, "reason": "required_tools_missing"}
+    entries.sort(reverse=True)
+    for _, stale_path in entries[MAX_PROBE_CACHE_ENTRIES:]:
+        try:
+            os.remove(stale_path)
+        except Exception:
+            pass
 
-    best_track, error_reason = _find_matching_mkv_track(
-        resolved_media_path,
-        source_variants,
-        source_lang_name,
-        command_timeout_seconds,
-        mkvinfo_path,
-        mkvextract_path,
-        log_fn=log_fn
-    )
-    if not best_track:
-        return {"success": False, "reason": error_reason}
 
-    fd, temp_path = tempfile.mkstemp(prefix="translatarr_extract_", suffix=".sub", dir=os.path.dirname(output_path))
-    os.close(fd)
+def _store_cached_probe(probe_cache_dir, identity, tracks, source, log_fn=None):
+    if not probe_cache_dir or not identity:
+        return
+
+    entry = dict(identity)
+    entry.update({
+        "version": PROBE_CACHE_VERSION,
+        "source": source,
+        "created": int(time.time()),
+        "tracks": tracks,
+    })
+
     try:
-        extract_spec = "{0}:{1}".format(best_track["track_id"], temp_path)
-        _log(log_fn, "Running mkvextract for subtitle track {0}.".format(best_track["track_id"]))
-        ok, _, extract_error = _run_command(
-            [mkvextract, "tracks", resolved_media_path, extract_spec],
-            log_fn=log_fn,
-            timeout_seconds=command_timeout_seconds
-        )
-        if not ok:
-            _log(log_fn, "mkvextract failed for {0}: {1}".format(resolved_media_path, extract_error), "error")
-            return {"success": False, "reason": "mkvextract_failed"}
+        os.makedirs(probe_cache_dir, exist_ok=True)
+        cache_file = _probe_cache_file(probe_cache_dir, identity)
+        temp_file = cache_file + ".tmp"
+        with open(temp_file, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle, ensure_ascii=False)
+        os.replace(temp_file, cache_file)
+    except Exception as exc:
+        _log(log_fn, "Failed to store embedded track probe cache: {0}".format(exc), "error")
+        return
 
-        if _looks_like_ass_or_ssa(temp_path):
-            ffmpeg = _find_tool("ffmpeg", ffmpeg_path)
-            if not ffmpeg:
-                return {"success": False, "reason": "ffmpeg_required_for_conversion"}
+    _prune_probe_cache(probe_cache_dir)
 
-            _log(log_fn, "Embedded subtitle requires ASS/SSA conversion via ffmpeg.")
-            ok, _, ffmpeg_error = _run_command(
-                [ffmpeg, "-y", "-loglevel", "error", "-i", temp_path, output_path],
-                log_fn=log_fn,
-                timeout_seconds=command_timeout_seconds
-            )
-            if not ok:
-                _log(log_fn, "ffmpeg conversion failed for {0}: {1}".format(temp_path, ffmpeg_error), "error")
-                return {"success": False, "reason": "ffmpeg_conversion_failed"}
-        else:
-            shutil.move(temp_path, output_path)
-            temp_path = None
 
-        if not os.path.isfile(output_path) or os.path.getsize(output_path) <= 100:
-            return {"success": False, "reason": "output_invalid"}
+def _find_mkvmerge(mkvinfo_path):
+    if mkvinfo_path and os.path.isfile(mkvinfo_path):
+        return _find_sibling_tool(mkvinfo_path, "mkvmerge")
+    return _find_tool("mkvmerge", mkvinfo_path)
 
-        return {
-            "success": True,
-            "output_path": output_path,
-            "track_id": best_track["track_id"],
-            "was_sdh": best_track.get("is_sdh", False),
+
+def _parse_tool_version(version_line):
+    match = TOOL_VERSION_RE.search(version_line or "")
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+class ToolRegistry(object):
+    """
+    Paths, versions and capabilities of the external tools used for
+    embedded subtitles. Paths are resolved when the registry is built; a
+    tool is only run to read its version or capabilities the first time
+    they are needed, and the answer is kept for the registry's lifetime.
+    Build a new registry when the tool settings change.
+    """
+
+    def __init__(self, mkvinfo_path=None, mkvextract_path=None, ffmpeg_path=None, log_fn=None):
+        self.log_fn = log_fn
+        ffmpeg = _find_tool("ffmpeg", ffmpeg_path)
+        self.paths = {
+            "mkvinfo": _find_tool("mkvinfo", mkvinfo_path),
+            "mkvextract": _find_tool("mkvextract", mkvextract_path),
+            "mkvmerge": _find_mkvmerge(mkvinfo_path),
+            "ffmpeg": ffmpeg,
+            "ffprobe": (_find_sibling_tool(ffmpeg, "ffprobe") if ffmpeg else None) or _find_tool("ffprobe"),
         }
-    finally:
-        if temp_path and os.path.exists(temp_path):
-            try:
-                os.remove(temp_path)
-            except Exception:
-                pass
+        self._versions = {}
+        self._capabilities = {}
+        self._lock = threading.RLock()
+
+    def path(self, name):
+        return self.paths.get(name)
+
+    def describe(self):
+        return ", ".join(
+            "{0}={1}".format(name, self.paths[name] or "missing")
+            for name in sorted(self.paths)
+        )
+
+    def version(self, name):
+        """
+        Return the first line the tool prints for its version, or None.
+        """
+        with self._lock:
+            if name not in self._versions:
+                self._versions[name] = self._read_version(name)
+            return self._versions[name]
+
+    def supports(self, capability):
+        """
+        "mkvmerge_json": mkvmerge accepts -J.
+        "ffmpeg_pipe_output": ffmpeg can write to pipe:1.
+        """
+        with self._lock:
+            if capability not in self._capabilities:
+                self._capabilities[capability] = self._detect(capability)
+                _log(
+                    self.log_fn,
+                    "Tool capability {0}: {1}".format(capability, self._capabilities[capability])
+                )
+            return self._capabilities[capability]
+
+    def _read_version(self, name):
+        tool = self.paths.get(name)
+        if not tool:
+            return None
+
+        flag = "-version" if name in ("ffmpeg", "ffprobe") else "--version"
+        ok, output, error = _run_command([tool, flag], timeout_seconds=TOOL_VERSION_TIMEOUT_SECONDS)
+        lines = (output if ok else error or output).strip().splitlines()
+        version_line = lines[0].strip() if lines else None
+        _log(self.log_fn, "Tool version {0}: {1}".format(name, version_line or "unknown"))
+        return version_line
+
+    def _detect(self, capability):
+        if capability == "mkvmerge_json":
+            if not self.paths.get("mkvmerge"):
+                return False
+            # An unreadable version is still tried; -J failing falls back to mkvinfo
+            version = _parse_tool_version(self.version("mkvmerge"))
+            return version is None or version >= MKVMERGE_JSON_MIN_VERSION
+
+        if capability == "ffmpeg_pipe_output":
+            ffmpeg = self.paths.get("ffmpeg")
+            if not ffmpeg:
+                return False
+            self.version("ffmpeg")
+            ok, output, _ = _run_command(
+                [ffmpeg, "-hide_banner", "-protocols"],
+                timeout_seconds=TOOL_VERSION_TIMEOUT_SECONDS
+            )
+            return ok and "pipe" in output.partition("Output:")[2].split()
+
+        return False
 
 
-def _extract_mp4_subtitle(
+def _probe_mkv_tracks_with_tools(
     resolved_media_path,
-    output_path,
-    source_variants,
-    source_lang_name,
     command_timeout_seconds,
-    ffmpeg_path,
-    log_fn=None
+    tools,
+    log_fn=None,
+    cancel_event=None
 ):
-    ffmpeg = _find_tool("ffmpeg", ffmpeg_path)
-    if not ffmpeg:
-        return {"success": False, "reason": "ffmpeg_or_ffprobe_missing"}
+    mkvmerge = tools.path("mkvmerge") if tools.supports("mkvmerge_json") else None
+    if mkvmerge:
+        _log(log_fn, "Running mkvmerge -J for embedded subtitle inspection.")
+        started = time.time()
+        ok, mkvmerge_output, mkvmerge_error = _run_command(
+            [mkvmerge, "-J", resolved_media_path],
+            log_fn=log_fn,
+            timeout_seconds=command_timeout_seconds,
+            cancel_event=cancel_event
+        )
+        tracks = _parse_mkvmerge_json_tracks(mkvmerge_output) if ok else None
+        _log(
+            log_fn,
+            "mkvmerge -J finished in {0:.0f} ms ({1}).".format(
+                (time.time() - started) * 1000,
+                "{0} subtitle tracks".format(len(tracks)) if tracks is not None else "failed: {0}".format(
+                    mkvmerge_error or "invalid JSON"
+                )
+            )
+        )
+        if tracks is not None:
+            return tracks, "mkvmerge", None
+        if mkvmerge_error == "cancelled":
+            return None, None, "cancelled"
 
-    best_track, error_reason = _find_matching_mp4_track(
-        resolved_media_path,
-        source_variants,
-        source_lang_name,
-        command_timeout_seconds,
-        ffmpeg_path,
-        log_fn=log_fn
+    mkvinfo = tools.path("mkvinfo")
+    if not mkvinfo:
+        return None, None, "required_tools_missing"
+
+    _log(log_fn, "Running mkvinfo for embedded subtitle inspection.")
+    started = time.time()
+    parser = _MkvinfoTrackParser()
+    ok, stopped_early, mkvinfo_error = _stream_command_lines(
+        [mkvinfo, resolved_media_path],
+        parser.feed,
+        log_fn=log_fn,
+        timeout_seconds=command_timeout_seconds,
+        cancel_event=cancel_event
     )
-    if not best_track:
-        return {"success": False, "reason": error_reason}
+    if mkvinfo_error == "cancelled":
+        return None, None, "cancelled"
+    if not ok:
+        _log(log_fn, "mkvinfo failed for {0}: {1}".format(resolved_media_path, mkvinfo_error), "error")
+        return None, None, "mkvinfo_failed"
 
+    tracks = parser.close()
     _log(
         log_fn,
-        "Running ffmpeg for MP4 subtitle stream {0} ({1}).".format(
-            best_track["track_id"],
-            best_track.get("codec_name", "unknown")
+        "mkvinfo finished in {0:.0f} ms after {1} lines{2} ({3} subtitle tracks).".format(
+            (time.time() - started) * 1000,
+            parser.line_count,
+            ", stopped after Tracks" if stopped_early else "",
+            len(tracks)
         )
     )
-    ok, _, ffmpeg_error = _run_command(
-        [
-            ffmpeg,
-            "-y",
-            "-loglevel",
-            "error",
-            "-i",
-            resolved_media_path,
-            "-map",
-            "0:{0}".format(best_track["track_id"]),
-            output_path,
-        ],
-        log_fn=log_fn,
-        timeout_seconds=command_timeout_seconds
-    )
-    if not ok:
-        _log(log_fn, "ffmpeg MP4 extraction failed for {0}: {1}".format(resolved_media_path, ffmpeg_error), "error")
-        return {"success": False, "reason": "ffmpeg_mp4_extraction_failed"}
+    return tracks, "mkvinfo", None
 
-    if not os.path.isfile(output_path) or os.path.getsize(output_path) <= 100:
-        return {"success": False, "reason": "output_invalid"}
 
-    return {
-        "success": True,
-        "output_path": output_path,
-        "track_id": best_track["track_id"],
-        "was_sdh": best_track.get("is_sdh", False),
-    }
+def _probe_mkv_tracks(resolved_media_path, command_timeout_seconds, tools, log_fn=None, cancel_event=None):
+    started = time.time()
+    probe = mkv_demuxer.probe_subtitle_tracks(resolved_media_path)
+    if probe.get("success"):
+        _log(
+            log_fn,
+            "Read Matroska track list natively in {0:.0f} ms ({1} bytes read).".format(
+                (time.time() - started) * 1000,
+                probe.get("bytes_read", 0)
+            )
+        )
+        return [_demuxer_track_info(track) for track in probe["tracks"]], "native_mkv", None
 
+    _log(
+        log_fn,
+        "Native Matroska probe failed ({0}), falling back to MKVToolNix.".format(probe.get("error", "unknown")),
+        "debug"
+    )
+    return _probe_mkv_tracks_with_tools(
+        resolved_media_path,
+        command_timeout_seconds,
+        tools,
+        log_fn=log_fn,
+        cancel_event=cancel_event
+    )
 
-def try_extract_embedded_subtitle(
-    media_path,
-    output_dir,
-    source_lang_iso,
-    source_lang_name,
-    source_variants,
-    mkvinfo_path=None,
-    mkvextract_path=None,
-    ffmpeg_path=None,
+
+def _probe_mp4_tracks(resolved_media_path, command_timeout_seconds, tools, log_fn=None, cancel_event=None):
+    started = time.time()
+    probe = mp4_demuxer.probe_subtitle_tracks(resolved_media_path)
+    if probe.get("success"):
+        _log(
+            log_fn,
+            "Read MP4 track list natively in {0:.0f} ms ({1} bytes read).".format(
+                (time.time() - started) * 1000,
+                probe.get("bytes_read", 0)
+            )
+        )
+        return [_demuxer_track_info(track) for track in probe["tracks"]], "native_mp4", None
+
+    _log(
+        log_fn,
+        "Native MP4 probe failed ({0}), falling back to ffprobe.".format(probe.get("error", "unknown")),
+        "debug"
+    )
+
+    ffprobe = tools.path("ffprobe")
+    if not ffprobe:
+        return None, None, "ffmpeg_or_ffprobe_missing"
+
+    _log(log_fn, "Running ffprobe for MP4 embedded subtitle inspection.")
+    started = time.time()
+    ok, ffprobe_output, ffprobe_error = _run_command(
+        [
+            ffprobe,
+            "-v",
+            "error",
+            "-select_streams",
+            "s",
+            "-print_format",
+            "json",
+            "-show_entries",
+            "stream=index,codec_type,codec_name:stream_tags=language,title:stream_disposition=forced,hearing_impaired",
+            resolved_media_path,
+        ],
+        log_fn=log_fn,
+        timeout_seconds=command_timeout_seconds,
+        cancel_event=cancel_event
+    )
+    if ffprobe_error == "cancelled":
+        return None, None, "cancelled"
+    if not ok:
+        _log(log_fn, "ffprobe failed for {0}: {1}".format(resolved_media_path, ffprobe_error), "error")
+        return None, None, "ffprobe_failed"
+
+    tracks = _parse_ffprobe_subtitle_streams(ffprobe_output)
+    _log(
+        log_fn,
+        "ffprobe finished in {0:.0f} ms ({1} subtitle streams).".format((time.time() - started) * 1000, len(tracks))
+    )
+    return tracks, "ffprobe", None
+
+
+def _probe_subtitle_tracks(
+    resolved_media_path,
+    command_timeout_seconds,
+    tools,
+    probe_cache_dir=None,
+    log_fn=None,
+    cancel_event=None
+):
+    """
+    Return (tracks, error_reason) with every subtitle track of the file.
+    The full track list is cached on disk per path, size and mtime so that
+    target-language checks, source selection and replays share one probe.
+    """
+    identity = _media_identity(resolved_media_path)
+    cached_tracks = _load_cached_probe(probe_cache_dir, identity)
+    if cached_tracks is not None:
+        _log(log_fn, "Embedded subtitle tracks answered from probe cache ({0} tracks).".format(len(cached_tracks)))
+        return cached_tracks, None
+
+    media_extension = os.path.splitext(resolved_media_path)[1].lower()
+    if media_extension == ".mp4":
+        tracks, source, error_reason = _probe_mp4_tracks(
+            resolved_media_path,
+            command_timeout_seconds,
+            tools,
+            log_fn=log_fn,
+            cancel_event=cancel_event
+        )
+    else:
+        tracks, source, error_reason = _probe_mkv_tracks(
+            resolved_media_path,
+            command_timeout_seconds,
+            tools,
+            log_fn=log_fn,
+            cancel_event=cancel_event
+        )
+
+    if tracks is None:
+        return None, error_reason
+
+    _store_cached_probe(probe_cache_dir, identity, tracks, source, log_fn=log_fn)
+    return tracks, None
+
+
+def _find_matching_track(
+    resolved_media_path,
+    language_variants,
+    language_name,
+    command_timeout_seconds,
+    tools,
+    probe_cache_dir=None,
     log_fn=None
 ):
+    tracks, error_reason = _probe_subtitle_tracks(
+        resolved_media_path,
+        command_timeout_seconds,
+        tools,
+        probe_cache_dir=probe_cache_dir,
+        log_fn=log_fn
+    )
+    if tracks is None:
+        return None, error_reason
+
+    best_track = _pick_best_track(_select_matching_tracks(tracks, language_variants, language_name))
+    if not best_track:
+        return None, "no_matching_subtitle_track"
+
+    return best_track, None
+
+
+def _looks_like_ass_or_ssa(path):
+    try:
+        with open(path, "rb") as handle:
+            header = handle.read(512)
+    except Exception:
+        return False
+
+    try:
+        text_header = header.decode("utf-8", errors="ignore")
+    except Exception:
+        return False
+
+    return "[Script Info]" in text_header or "[V4+ Styles]" in text_header
+
+
+def _is_valid_subtitle_file(path):
+    return os.path.isfile(path) and os.path.getsize(path) > 100
+
+
+def _track_cache_file(track_cache_dir, identity, track_id):
+    return os.path.join(track_cache_dir, "{0}.{1}.srt".format(_media_cache_key(identity), track_id))
+
+
+def _load_cached_track(track_cache_dir, identity, track_id):
+    if not track_cache_dir or not identity:
+        return None
+
+    cache_file = _track_cache_file(track_cache_dir, identity, track_id)
+    if not _is_valid_subtitle_file(cache_file):
+        return None
+    return cache_file
+
+
+def _prune_track_cache(track_cache_dir):
+    try:
+        names = [name for name in os.listdir(track_cache_dir) if name.endswith(".srt")]
+    except Exception:
+        return
+
+    if len(names) <= MAX_TRACK_CACHE_ENTRIES:
+        return
+
+    entries = []
+    for name in names:
+        path = os.path.join(track_cache_dir, name)
+        try:
+            entries.append((os.path.getmtime(path), path))
+        except Exception:
+            continue
+
+    entries.sort(reverse=True)
+    for _, stale_path in entries[MAX_TRACK_CACHE_ENTRIES:]:
+        try:
+            os.remove(stale_path)
+        except Exception:
+            pass
+
+
+def _store_cached_tracks(track_cache_dir, identity, extracted_paths, log_fn=None):
+    if not track_cache_dir or not identity or not extracted_paths:
+        return
+
+    try:
+        os.makedirs(track_cache_dir, exist_ok=True)
+        for track_id, extracted_path in extracted_paths.items():
+            cache_file = _track_cache_file(track_cache_dir, identity, track_id)
+            temp_file = cache_file + ".tmp"
+            shutil.copyfile(extracted_path, temp_file)
+            os.replace(temp_file, cache_file)
+    except Exception as exc:
+        _log(log_fn, "Failed to store extracted subtitle track cache: {0}".format(exc), "error")
+        return
+
+    _prune_track_cache(track_cache_dir)
+
+
+def _extract_mkv_tracks_natively(resolved_media_path, work_dir, tracks, log_fn=None, cancel_event=None):
+    outputs = dict(
+        (track["track_id"], os.path.join(work_dir, "track_{0}.srt".format(track["track_id"])))
+        for track in tracks
+    )
+    _log(
+        log_fn,
+        "Reading subtitle tracks {0} with the built-in Matroska demuxer.".format(", ".join(sorted(outputs)))
+    )
+    result = mkv_demuxer.extract_srt_tracks(resolved_media_path, outputs, cancel_event)
+    if result.get("reason") == "cancelled":
+        _log(log_fn, "Built-in Matroska extraction cancelled for {0}.".format(resolved_media_path))
+        return {}
+    if not result.get("success"):
+        _log(
+            log_fn,
+            "Built-in Matroska extraction failed for {0}: {1}".format(
+                resolved_media_path,
+                result.get("error") or result.get("reason")
+            ),
+            "debug"
+        )
+        return {}
+
+    _log(
+        log_fn,
+        "Built-in Matroska extraction read {0} KiB of {1} MiB via {2} for {3} track(s).".format(
+            result["bytes_read"] // 1024,
+            result["file_size"] // (1024 * 1024),
+            result["method"],
+            len(outputs)
+        )
+    )
+    return dict(
+        (track_id, outputs[track_id])
+        for track_id, track_result in result["tracks"].items()
+        if track_result.get("success") and _is_valid_subtitle_file(outputs[track_id])
+    )
+
+
+def _extract_mkv_tracks(
+    resolved_media_path,
+    work_dir,
+    tracks,
+    command_timeout_seconds,
+    tools,
+    log_fn=None,
+    cancel_event=None
+):
+    """
+    Extract every requested Matroska track to an SRT in work_dir with one
+    pass over the container: text tracks through the built-in demuxer and
+    everything else through a single mkvextract call with one spec per track.
+    Returns (extracted_paths, error_reason).
+    """
+    native_tracks = [track for track in tracks if track.get("codec") in mkv_demuxer.TEXT_CODEC_IDS]
+    extracted = (
+        _extract_mkv_tracks_natively(resolved_media_path, work_dir, native_tracks, log_fn, cancel_event)
+        if native_tracks
+        else {}
+    )
+    if cancel_event is not None and cancel_event.is_set():
+        return extracted, "cancelled"
+
+    remaining = [track for track in tracks if track["track_id"] not in extracted]
+    if not remaining:
+        return extracted, None
+
+    mkvextract = tools.path("mkvextract")
+    if not mkvextract:
+        return extracted, "required_tools_missing"
+
+    raw_paths = dict(
+        (track["track_id"], os.path.join(work_dir, "track_{0}.sub".format(track["track_id"])))
+        for track in remaining
+    )
+    _log(log_fn, "Running mkvextract for subtitle tracks {0}.".format(", ".join(sorted(raw_paths))))
+    ok, _, extract_error = _run_command(
+        [mkvextract, "tracks", resolved_media_path] + [
+            "{0}:{1}".format(track_id, raw_path) for track_id, raw_path in sorted(raw_paths.items())
+        ],
+        log_fn=log_fn,
+        timeout_seconds=command_timeout_seconds,
+        cancel_event=cancel_event
+    )
+    if extract_error == "cancelled":
+        return extracted, "cancelled"
+    if not ok:
+        _log(log_fn, "mkvextract failed for {0}: {1}".format(resolved_media_path, extract_error), "error")
+        return extracted, "mkvextract_failed"
+
+    error_reason = None
+    for track_id, raw_path in raw_paths.items():
+        srt_path = os.path.join(work_dir, "track_{0}.srt".format(track_id))
+        if _looks_like_ass_or_ssa(raw_path):
+            started = time.time()
+            conversion = ass_converter.convert_file(raw_path, srt_path)
+            if conversion.get("success"):
+                _log(
+                    log_fn,
+                    "Converted ASS/SSA track {0} to SRT in {1:.0f} ms ({2} cues).".format(
+                        track_id,
+                        (time.time() - started) * 1000,
+                        conversion["cue_count"]
+                    )
+                )
+            else:
+                _log(
+                    log_fn,
+                    "Built-in ASS/SSA conversion failed for track {0}: {1}".format(
+                        track_id,
+                        conversion.get("error") or conversion.get("reason")
+                    ),
+                    "debug"
+                )
+                ffmpeg = tools.path("ffmpeg")
+                if not ffmpeg:
+                    error_reason = "ffmpeg_required_for_conversion"
+                    continue
+
+                _log(log_fn, "Embedded subtitle track {0} requires ASS/SSA conversion via ffmpeg.".format(track_id))
+                ok, _, ffmpeg_error = _run_command(
+                    [ffmpeg, "-y", "-loglevel", "error", "-i", raw_path, srt_path],
+                    log_fn=log_fn,
+                    timeout_seconds=command_timeout_seconds,
+                    cancel_event=cancel_event
+                )
+                if ffmpeg_error == "cancelled":
+                    return extracted, "cancelled"
+                if not ok:
+                    _log(log_fn, "ffmpeg conversion failed for {0}: {1}".format(raw_path, ffmpeg_error), "error")
+                    error_reason = "ffmpeg_conversion_failed"
+                    continue
+        elif os.path.isfile(raw_path):
+            os.replace(raw_path, srt_path)
+
+        if _is_valid_subtitle_file(srt_path):
+            extracted[track_id] = srt_path
+        else:
+            error_reason = error_reason or "output_invalid"
+
+    return extracted, error_reason
+
+
+def _extract_mp4_tracks_natively(resolved_media_path, work_dir, tracks, log_fn=None, cancel_event=None):
+    outputs = dict(
+        (track["track_id"], os.path.join(work_dir, "track_{0}.srt".format(track["track_id"])))
+        for track in tracks
+    )
+    _log(
+        log_fn,
+        "Reading MP4 subtitle streams {0} with the built-in MP4 demuxer.".format(", ".join(sorted(outputs)))
+    )
+    result = mp4_demuxer.extract_srt_tracks(resolved_media_path, outputs, cancel_event)
+    if result.get("reason") == "cancelled":
+        _log(log_fn, "Built-in MP4 extraction cancelled for {0}.".format(resolved_media_path))
+        return {}
+    if not result.get("success"):
+        _log(
+            log_fn,
+            "Built-in MP4 extraction failed for {0}: {1}".format(
+                resolved_media_path,
+                result.get("error") or result.get("reason")
+            ),
+            "debug"
+        )
+        return {}
+
+    _log(
+        log_fn,
+        "Built-in MP4 extraction read {0} KiB of {1} MiB in {2} reads for {3} stream(s).".format(
+            result["bytes_read"] // 1024,
+            result["file_size"] // (1024 * 1024),
+            result["read_calls"],
+            len(outputs)
+        )
+    )
+    return dict(
+        (track_id, outputs[track_id])
+        for track_id, track_result in result["tracks"].items()
+        if track_result.get("success") and _is_valid_subtitle_file(outputs[track_id])
+    )
+
+
+def _extract_mp4_tracks(
+    resolved_media_path,
+    work_dir,
+    tracks,
+    command_timeout_seconds,
+    tools,
+    log_fn=None,
+    cancel_event=None
+):
+    """
+    Extract every requested MP4 subtitle stream to an SRT in work_dir:
+    mov_text through the built-in demuxer, everything else through a single
+    ffmpeg call with one -map output per stream.
+    Returns (extracted_paths, error_reason).
+    """
+    native_tracks = [track for track in tracks if track.get("codec") == "mov_text"]
+    extracted = (
+        _extract_mp4_tracks_natively(resolved_media_path, work_dir, native_tracks, log_fn, cancel_event)
+        if native_tracks
+        else {}
+    )
+    if cancel_event is not None and cancel_event.is_set():
+        return extracted, "cancelled"
+
+    remaining = [track for track in tracks if track["track_id"] not in extracted]
+    if not remaining:
+        return extracted, None
+
+    ffmpeg = tools.path("ffmpeg")
+    if not ffmpeg:
+        return extracted, "ffmpeg_or_ffprobe_missing"
+
+    output_paths = dict(
+        (track["track_id"], os.path.join(work_dir, "track_{0}.srt".format(track["track_id"])))
+        for track in remaining
+    )
+    command = [ffmpeg, "-y", "-loglevel", "error", "-i", resolved_media_path]
+    for track_id, output_path in sorted(output_paths.items()):
+        command.extend(["-map", "0:{0}".format(track_id), output_path])
+
+    _log(
+        log_fn,
+        "Running ffmpeg for MP4 subtitle streams {0} ({1}).".format(
+            ", ".join(sorted(output_paths)),
+            ", ".join(sorted(set(track.get("codec") or "unknown" for track in remaining)))
+        )
+    )
+    ok, _, ffmpeg_error = _run_command(
+        command,
+        log_fn=log_fn,
+        timeout_seconds=command_timeout_seconds,
+        cancel_event=cancel_event
+    )
+    if ffmpeg_error == "cancelled":
+        return extracted, "cancelled"
+    if not ok:
+        _log(log_fn, "ffmpeg MP4 extraction failed for {0}: {1}".format(resolved_media_path, ffmpeg_error), "error")
+        return extracted, "ffmpeg_mp4_extraction_failed"
+
+    error_reason = None
+    for track_id, output_path in output_paths.items():
+        if _is_valid_subtitle_file(output_path):
+            extracted[track_id] = output_path
+        else:
+            error_reason = "output_invalid"
+
+    return extracted, error_reason
+
+
+def _extract_tracks(resolved_media_path, work_dir, tracks, command_timeout_seconds, tools, log_fn=None, cancel_event=None):
+    media_extension = os.path.splitext(resolved_media_path)[1].lower()
+    if media_extension == ".mp4":
+        return _extract_mp4_tracks(
+            resolved_media_path,
+            work_dir,
+            tracks,
+            command_timeout_seconds,
+            tools,
+            log_fn=log_fn,
+            cancel_event=cancel_event
+        )
+    return _extract_mkv_tracks(
+        resolved_media_path,
+        work_dir,
+        tracks,
+        command_timeout_seconds,
+        tools,
+        log_fn=log_fn,
+        cancel_event=cancel_event
+    )
+
+
+def _select_wanted_tracks(tracks, source_variants, source_lang_name, prefetch_languages):
+    """
+    Return (source_track, wanted_tracks): the best source-language track and
+    the best track of every prefetch language, deduplicated by track id.
+    """
+    source_track = _pick_best_track(_select_matching_tracks(tracks, source_variants, source_lang_name))
+    if not source_track:
+        return None, []
+
+    wanted = [source_track]
+    for language_name, language_variants in prefetch_languages or ():
+        track = _pick_best_track(_select_matching_tracks(tracks, language_variants, language_name))
+        if track and all(track["track_id"] != existing["track_id"] for existing in wanted):
+            wanted.append(track)
+    return source_track, wanted
+
+
+def _resolve_extraction_paths(media_path, output_dir):
+    """
+    Return (resolved_media_path, resolved_output_dir, error_reason).
+    """
     resolved_media_path = _resolve_filesystem_path(media_path)
     if not resolved_media_path:
-        return {"success": False, "reason": "media_path_not_local"}
+        return None, None, "media_path_not_local"
 
     resolved_output_dir = _resolve_filesystem_path(output_dir)
     if not resolved_output_dir:
-        return {"success": False, "reason": "output_dir_not_local"}
+        return None, None, "output_dir_not_local"
 
     if not resolved_media_path.lower().endswith(SUPPORTED_EMBEDDED_SUBTITLE_EXTENSIONS):
-        return {"success": False, "reason": "unsupported_container"}
+        return None, None, "unsupported_container"
 
     if not os.path.isfile(resolved_media_path):
-        return {"success": False, "reason": "media_file_missing"}
+        return None, None, "media_file_missing"
 
     if not os.path.isdir(resolved_output_dir):
-        return {"success": False, "reason": "output_dir_missing"}
+        return None, None, "output_dir_missing"
+
+    return resolved_media_path, resolved_output_dir, None
+
+
+def try_extract_embedded_subtitle(
+    media_path,
+    output_dir,
+    source_lang_iso,
+    source_lang_name,
+    source_variants,
+    mkvinfo_path=None,
+    mkvextract_path=None,
+    ffmpeg_path=None,
+    probe_cache_dir=None,
+    track_cache_dir=None,
+    prefetch_languages=None,
+    log_fn=None,
+    cancel_event=None,
+    claim_fn=None,
+    tools=None
+):
+    """
+    Extract the best source-language subtitle track of media_path into
+    output_dir.
+
+    prefetch_languages is a sequence of (language_name, language_variants)
+    pairs whose best tracks are extracted in the same container pass. With
+    track_cache_dir set, every extracted track is kept per file identity so
+    a later run for any of those languages copies it without reading the
+    container again.
+
+    When another extractor races this one, setting cancel_event kills the
+    running tool and claim_fn() is asked right before output_path is
+    written; the result is "cancelled" if it returns False.
+
+    tools is a ToolRegistry; without one, the tool paths are resolved for
+    this call only.
+    """
+    resolved_media_path, resolved_output_dir, error_reason = _resolve_extraction_paths(media_path, output_dir)
+    if error_reason:
+        return {"success": False, "reason": error_reason}
+
+    tools = tools or ToolRegistry(mkvinfo_path, mkvextract_path, ffmpeg_path, log_fn=log_fn)
 
     command_timeout_seconds = (
         NETWORK_COMMAND_TIMEOUT_SECONDS
@@ -550,34 +1361,436 @@ def try_extract_embedded_subtitle(
         )
     )
 
+    def claim_output():
+        return claim_fn is None or claim_fn()
+
     output_path = _build_output_path(resolved_output_dir, resolved_media_path, source_lang_iso)
-    if os.path.isfile(output_path) and os.path.getsize(output_path) > 100:
+    if _is_valid_subtitle_file(output_path):
+        if not claim_output():
+            return {"success": False, "reason": "cancelled"}
         _log(log_fn, "Embedded subtitle output already exists: {0}".format(output_path))
         return {"success": True, "output_path": output_path, "reason": "already_exists"}
 
-    media_extension = os.path.splitext(resolved_media_path)[1].lower()
-    if media_extension == ".mp4":
-        return _extract_mp4_subtitle(
-            resolved_media_path=resolved_media_path,
-            output_path=output_path,
-            source_variants=source_variants,
-            source_lang_name=source_lang_name,
-            command_timeout_seconds=command_timeout_seconds,
-            ffmpeg_path=ffmpeg_path,
-            log_fn=log_fn
+    tracks, error_reason = _probe_subtitle_tracks(
+        resolved_media_path,
+        command_timeout_seconds,
+        tools,
+        probe_cache_dir=probe_cache_dir,
+        log_fn=log_fn,
+        cancel_event=cancel_event
+    )
+    if tracks is None:
+        return {"success": False, "reason": error_reason}
+    if cancel_event is not None and cancel_event.is_set():
+        return {"success": False, "reason": "cancelled"}
+
+    source_track, wanted_tracks = _select_wanted_tracks(
+        tracks,
+        source_variants,
+        source_lang_name,
+        prefetch_languages
+    )
+    if not source_track:
+        return {"success": False, "reason": "no_matching_subtitle_track"}
+
+    success_result = {
+        "success": True,
+        "output_path": output_path,
+        "track_id": source_track["track_id"],
+        "was_sdh": source_track.get("is_sdh", False),
+    }
+
+    identity = _media_identity(resolved_media_path) if track_cache_dir else None
+    cached_path = _load_cached_track(track_cache_dir, identity, source_track["track_id"])
+    if cached_path:
+        if not claim_output():
+            return {"success": False, "reason": "cancelled"}
+        shutil.copyfile(cached_path, output_path)
+        _log(log_fn, "Embedded subtitle track {0} copied from the extracted track cache.".format(source_track["track_id"]))
+        success_result["method"] = "track_cache"
+        return success_result
+
+    pending_tracks = [
+        track for track in wanted_tracks
+        if track is source_track or not _load_cached_track(track_cache_dir, identity, track["track_id"])
+    ]
+    work_dir = tempfile.mkdtemp(prefix="translatarr_extract_", dir=resolved_output_dir)
+    try:
+        extracted, error_reason = _extract_tracks(
+            resolved_media_path,
+            work_dir,
+            pending_tracks,
+            command_timeout_seconds,
+            tools,
+            log_fn=log_fn,
+            cancel_event=cancel_event
         )
 
-    return _extract_mkv_subtitle(
-        resolved_media_path=resolved_media_path,
-        output_path=output_path,
-        source_variants=source_variants,
-        source_lang_name=source_lang_name,
-        command_timeout_seconds=command_timeout_seconds,
-        mkvinfo_path=mkvinfo_path,
-        mkvextract_path=mkvextract_path,
-        ffmpeg_path=ffmpeg_path,
+        _store_cached_tracks(track_cache_dir, identity, extracted, log_fn=log_fn)
+
+        source_path = extracted.get(source_track["track_id"])
+        if not source_path:
+            return {"success": False, "reason": error_reason or "output_invalid"}
+
+        if not claim_output():
+            return {"success": False, "reason": "cancelled"}
+        shutil.move(source_path, output_path)
+        if len(extracted) > 1:
+            _log(
+                log_fn,
+                "Extracted {0} subtitle tracks in one pass; {1} kept for later language changes.".format(
+                    len(extracted),
+                    len(extracted) - 1
+                )
+            )
+        return success_result
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def prefetch_embedded_tracks(
+    media_path,
+    prefetch_languages,
+    track_cache_dir,
+    probe_cache_dir=None,
+    tools=None,
+    log_fn=None,
+    cancel_event=None
+):
+    """
+    Extract the best track of every (language_name, language_variants) pair
+    into track_cache_dir only, skipping tracks that are already cached.
+    """
+    resolved_media_path = _resolve_filesystem_path(media_path)
+    if not resolved_media_path or not track_cache_dir:
+        return {"success": False, "reason": "media_path_not_local"}
+
+    if not resolved_media_path.lower().endswith(SUPPORTED_EMBEDDED_SUBTITLE_EXTENSIONS):
+        return {"success": False, "reason": "unsupported_container"}
+
+    if not os.path.isfile(resolved_media_path):
+        return {"success": False, "reason": "media_file_missing"}
+
+    tools = tools or ToolRegistry(log_fn=log_fn)
+    command_timeout_seconds = (
+        NETWORK_COMMAND_TIMEOUT_SECONDS
+        if _is_network_filesystem_path(resolved_media_path)
+        else LOCAL_COMMAND_TIMEOUT_SECONDS
+    )
+    tracks, error_reason = _probe_subtitle_tracks(
+        resolved_media_path,
+        command_timeout_seconds,
+        tools,
+        probe_cache_dir=probe_cache_dir,
+        log_fn=log_fn,
+        cancel_event=cancel_event
+    )
+    if tracks is None:
+        return {"success": False, "reason": error_reason}
+
+    identity = _media_identity(resolved_media_path)
+    pending_tracks = []
+    for language_name, language_variants in prefetch_languages or ():
+        track = _pick_best_track(_select_matching_tracks(tracks, language_variants, language_name))
+        if not track or _load_cached_track(track_cache_dir, identity, track["track_id"]):
+            continue
+        if all(track["track_id"] != pending["track_id"] for pending in pending_tracks):
+            pending_tracks.append(track)
+
+    if not pending_tracks:
+        return {"success": True, "reason": "nothing_to_prefetch", "track_ids": []}
+
+    try:
+        os.makedirs(track_cache_dir, exist_ok=True)
+        work_dir = tempfile.mkdtemp(prefix="translatarr_prefetch_", dir=track_cache_dir)
+    except Exception as exc:
+        return {"success": False, "reason": "track_cache_unavailable", "error": str(exc)}
+
+    try:
+        extracted, error_reason = _extract_tracks(
+            resolved_media_path,
+            work_dir,
+            pending_tracks,
+            command_timeout_seconds,
+            tools,
+            log_fn=log_fn,
+            cancel_event=cancel_event
+        )
+        _store_cached_tracks(track_cache_dir, identity, extracted, log_fn=log_fn)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if not extracted:
+        return {"success": False, "reason": error_reason or "output_invalid"}
+
+    _log(log_fn, "Prefetched embedded subtitle tracks {0} into the track cache.".format(", ".join(sorted(extracted))))
+    return {"success": True, "reason": "prefetched", "track_ids": sorted(extracted)}
+
+
+class EmbeddedSubtitleStream(object):
+    """
+    Read one embedded subtitle track in a background thread and hand its
+    cues over as they are decoded, so translation can start while the rest
+    of the container is still being read. The complete SRT is moved to
+    output_path once the whole track has been read.
+    """
+
+    def __init__(self, cue_source, output_path, description, on_complete=None, log_fn=None):
+        self.output_path = output_path
+        self.description = description
+        self.finished = False
+        self.error_reason = None
+        self.cue_count = 0
+        self.cancel_event = threading.Event()
+        self._cue_source = cue_source
+        self._on_complete = on_complete
+        self._log_fn = log_fn
+        self._pending = []
+        self._cancelled = False
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="TranslatarrSubtitleStream")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def take_cues(self):
+        """
+        Return the cues decoded since the last call as srt_cues.Cue objects
+        with [BR] line breaks, numbered from 1 across calls.
+        """
+        with self._condition:
+            cues = self._pending
+            self._pending = []
+        return cues
+
+    def wait_for_cues(self, timeout):
+        with self._condition:
+            if not self._pending and not self.finished:
+                self._condition.wait(timeout)
+            return bool(self._pending)
+
+    def cancel(self):
+        self._cancelled = True
+        self.cancel_event.set()
+
+    def _run(self):
+        started = time.time()
+        output_dir = os.path.dirname(self.output_path)
+        fd, temp_path = tempfile.mkstemp(prefix="translatarr_stream_", suffix=".part", dir=output_dir)
+        os.close(fd)
+        cues = None
+        try:
+            cues = self._cue_source(self)
+            with open(temp_path, "w", encoding="utf-8", newline="\n") as output:
+                for start_ms, end_ms, text in cues:
+                    if self._cancelled:
+                        break
+                    lines = [line for line in text.split("\n") if line.strip()]
+                    if not lines:
+                        continue
+
+                    self.cue_count += 1
+                    output.write("{0}\n{1}\n{2}\n\n".format(
+                        self.cue_count,
+                        srt_cues.format_timing(start_ms, end_ms),
+                        "\n".join(lines)
+                    ))
+                    with self._condition:
+                        self._pending.append(srt_cues.Cue(self.cue_count, start_ms, end_ms, " [BR] ".join(lines)))
+                        self._condition.notify_all()
+
+            if self._cancelled:
+                self.error_reason = "stream_cancelled"
+            elif not self.cue_count:
+                self.error_reason = "output_invalid"
+            else:
+                shutil.move(temp_path, self.output_path)
+                temp_path = None
+                _log(
+                    self._log_fn,
+                    "Streamed {0} cues from {1} in {2:.1f}s.".format(
+                        self.cue_count,
+                        self.description,
+                        time.time() - started
+                    )
+                )
+                if self._on_complete:
+                    self._on_complete(self.output_path)
+        except Exception as exc:
+            self.error_reason = "stream_cancelled" if self._cancelled else "stream_failed"
+            _log(self._log_fn, "Subtitle stream from {0} failed: {1}".format(self.description, exc), "error")
+        finally:
+            if cues is not None:
+                cues.close()
+            if temp_path and os.path.exists(temp_path):
+                try:
+                    os.remove(temp_path)
+                except Exception:
+                    pass
+            with self._condition:
+                self.finished = True
+                self._condition.notify_all()
+
+
+def _native_mkv_cue_source(resolved_media_path, track_id):
+    def cue_source(stream):
+        return mkv_demuxer.iter_srt_cues(resolved_media_path, track_id)
+    return cue_source
+
+
+def _ffmpeg_cue_source(ffmpeg, resolved_media_path, track_id, timeout_seconds, log_fn=None):
+    # mkvmerge track IDs and ffprobe stream indexes both follow container track order
+    command = [
+        ffmpeg,
+        "-nostdin",
+        "-nostats",
+        "-loglevel",
+        "error",
+        "-i",
+        resolved_media_path,
+        "-map",
+        "0:{0}".format(track_id),
+        "-flush_packets",
+        "1",
+        "-f",
+        "srt",
+        "pipe:1",
+    ]
+    # The command runs on its own thread, which must keep the caller's priority
+    command_prefix = getattr(_process_context, "command_prefix", ())
+
+    def cue_source(stream):
+        lines = queue.Queue()
+        outcome = []
+
+        def run_ffmpeg():
+            _process_context.command_prefix = command_prefix
+            try:
+                outcome.append(_stream_command_lines(
+                    command,
+                    lambda line: lines.put(line) or stream.cancel_event.is_set(),
+                    log_fn=log_fn,
+                    timeout_seconds=timeout_seconds,
+                    cancel_event=stream.cancel_event
+                ))
+            finally:
+                lines.put(None)
+
+        def queued_lines():
+            while True:
+                line = lines.get()
+                if line is None:
+                    return
+                yield line
+
+        runner = threading.Thread(target=run_ffmpeg, name="TranslatarrSubtitleStreamCommand")
+        runner.daemon = True
+        runner.start()
+        try:
+            for cue in srt_cues.iter_cues(queued_lines()):
+                yield cue.start_ms, cue.end_ms, cue.text.replace(" [BR] ", "\n")
+
+            runner.join()
+            ok, _, error = outcome[0] if outcome else (False, False, "no_result")
+            if not ok:
+                raise OSError("ffmpeg failed: {0}".format(error or "unknown_error"))
+        finally:
+            if runner.is_alive():
+                stream.cancel_event.set()
+                runner.join()
+    return cue_source
+
+
+def open_embedded_subtitle_stream(
+    media_path,
+    output_dir,
+    source_lang_iso,
+    source_lang_name,
+    source_variants,
+    mkvinfo_path=None,
+    mkvextract_path=None,
+    ffmpeg_path=None,
+    probe_cache_dir=None,
+    track_cache_dir=None,
+    log_fn=None,
+    tools=None
+):
+    """
+    Start streaming the best source-language track of media_path.
+    Returns {"success": True, "stream": EmbeddedSubtitleStream, ...} when the
+    track is read incrementally, or a failure reason; "stream_not_needed"
+    means try_extract_embedded_subtitle is already quick for this file.
+    """
+    resolved_media_path, resolved_output_dir, error_reason = _resolve_extraction_paths(media_path, output_dir)
+    if error_reason:
+        return {"success": False, "reason": error_reason}
+
+    tools = tools or ToolRegistry(mkvinfo_path, mkvextract_path, ffmpeg_path, log_fn=log_fn)
+
+    output_path = _build_output_path(resolved_output_dir, resolved_media_path, source_lang_iso)
+    if _is_valid_subtitle_file(output_path):
+        return {"success": False, "reason": "already_exists"}
+
+    command_timeout_seconds = (
+        NETWORK_COMMAND_TIMEOUT_SECONDS
+        if _is_network_filesystem_path(resolved_media_path)
+        else LOCAL_COMMAND_TIMEOUT_SECONDS
+    )
+    source_track, error_reason = _find_matching_track(
+        resolved_media_path,
+        source_variants,
+        source_lang_name,
+        command_timeout_seconds,
+        tools,
+        probe_cache_dir=probe_cache_dir,
+        log_fn=log_fn
+    )
+    if not source_track:
+        return {"success": False, "reason": error_reason}
+
+    identity = _media_identity(resolved_media_path) if track_cache_dir else None
+    if _load_cached_track(track_cache_dir, identity, source_track["track_id"]):
+        return {"success": False, "reason": "stream_not_needed"}
+
+    track_id = source_track["track_id"]
+    media_extension = os.path.splitext(resolved_media_path)[1].lower()
+    if media_extension == ".mkv" and source_track.get("codec") in mkv_demuxer.TEXT_CODEC_IDS:
+        cue_source = _native_mkv_cue_source(resolved_media_path, track_id)
+        method = "native_mkv"
+    elif media_extension == ".mp4" and source_track.get("codec") == "mov_text":
+        # The MP4 reader only touches the sample table and the subtitle samples
+        return {"success": False, "reason": "stream_not_needed"}
+    else:
+        ffmpeg = tools.path("ffmpeg")
+        if not ffmpeg:
+            return {"success": False, "reason": "ffmpeg_or_ffprobe_missing"}
+        if not tools.supports("ffmpeg_pipe_output"):
+            return {"success": False, "reason": "ffmpeg_pipe_unsupported"}
+        cue_source = _ffmpeg_cue_source(ffmpeg, resolved_media_path, track_id, command_timeout_seconds, log_fn=log_fn)
+        method = "ffmpeg"
+
+    def store_in_track_cache(path):
+        _store_cached_tracks(track_cache_dir, identity, {track_id: path}, log_fn=log_fn)
+
+    stream = EmbeddedSubtitleStream(
+        cue_source,
+        output_path,
+        "track {0} via {1}".format(track_id, method),
+        on_complete=store_in_track_cache,
         log_fn=log_fn
     )
+    stream.start()
+    _log(log_fn, "Streaming embedded subtitle track {0} via {1} from {2}.".format(track_id, method, resolved_media_path))
+    return {
+        "success": True,
+        "stream": stream,
+        "output_path": output_path,
+        "track_id": track_id,
+        "was_sdh": source_track.get("is_sdh", False),
+        "method": method,
+    }
 
 
 def has_embedded_subtitle(
@@ -587,7 +1800,9 @@ def has_embedded_subtitle(
     mkvinfo_path=None,
     mkvextract_path=None,
     ffmpeg_path=None,
-    log_fn=None
+    probe_cache_dir=None,
+    log_fn=None,
+    tools=None
 ):
     resolved_media_path = _resolve_filesystem_path(media_path)
     if not resolved_media_path:
@@ -614,26 +1829,15 @@ def has_embedded_subtitle(
         )
     )
 
-    media_extension = os.path.splitext(resolved_media_path)[1].lower()
-    if media_extension == ".mp4":
-        best_track, error_reason = _find_matching_mp4_track(
-            resolved_media_path,
-            language_variants,
-            language_name,
-            command_timeout_seconds,
-            ffmpeg_path,
-            log_fn=log_fn
-        )
-    else:
-        best_track, error_reason = _find_matching_mkv_track(
-            resolved_media_path,
-            language_variants,
-            language_name,
-            command_timeout_seconds,
-            mkvinfo_path,
-            mkvextract_path,
-            log_fn=log_fn
-        )
+    best_track, error_reason = _find_matching_track(
+        resolved_media_path,
+        language_variants,
+        language_name,
+        command_timeout_seconds,
+        tools or ToolRegistry(mkvinfo_path, mkvextract_path, ffmpeg_path, log_fn=log_fn),
+        probe_cache_dir=probe_cache_dir,
+        log_fn=log_fn
+    )
 
     if not best_track:
         return {"found": False, "reason": error_reason}
@@ -642,6 +1846,192 @@ def has_embedded_subtitle(
         "found": True,
         "reason": "embedded_subtitle_found",
         "track_id": best_track.get("track_id"),
-        "codec_name": best_track.get("codec_name"),
+        "codec_name": best_track.get("codec"),
         "name": best_track.get("name", ""),
     }
+
+
+class ExtractionJob(object):
+    """
+    One scheduled extraction. fn(cancel_event) returns a result dict; wait()
+    blocks until it is available.
+    """
+
+    def __init__(self, scheduler, key, priority, fn, sequence):
+        self.scheduler = scheduler
+        self.key = key
+        self.priority = priority
+        self.fn = fn
+        self.sequence = sequence
+        self.cancel_event = threading.Event()
+        self.done = threading.Event()
+        self.result = None
+        self.background = False
+        self.preempted = False
+        self.cancelled = False
+        self.detached = False
+        self.waiters = 0
+
+    def wait(self, cancel_event=None):
+        """
+        Return the job result. When cancel_event is set first, stop waiting
+        and return "cancelled"; the job itself is only cancelled once nobody
+        else is waiting for it.
+        """
+        while not self.done.wait(JOB_WAIT_POLL_SECONDS):
+            if cancel_event is not None and cancel_event.is_set():
+                self.scheduler._release(self)
+                return {"success": False, "reason": "cancelled"}
+        return self.result
+
+
+class ExtractionScheduler(object):
+    """
+    Run extraction jobs in worker threads, at most max_jobs at a time. Each
+    job runs one tool process at a time, so this also caps concurrent tool
+    processes.
+
+    Lower priority numbers start first. A job submitted under the key of a
+    pending or running job shares that job instead of starting it twice.
+    Jobs above PRIORITY_PLAYBACK are background work: on Linux their thread,
+    and every tool it starts, runs at background_nice and, with
+    background_idle_io, in the idle I/O class. When playback work is waiting
+    and every slot is taken by background work, the newest background job
+    is cancelled and queued again.
+    """
+
+    def __init__(self, max_jobs=1, background_nice=10, background_idle_io=True, log_fn=None):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._jobs = {}
+        self._pending = []
+        self._running = []
+        self._sequence = 0
+        self.configure(max_jobs, background_nice, background_idle_io, log_fn)
+        # New threads inherit the nice value of the thread that starts them,
+        # so workers are only started from this never-reniced thread
+        dispatcher = threading.Thread(target=self._dispatch_loop, name="TranslatarrExtractionDispatch")
+        dispatcher.daemon = True
+        dispatcher.start()
+
+    def configure(self, max_jobs=1, background_nice=10, background_idle_io=True, log_fn=None):
+        ionice = shutil.which("ionice") if background_idle_io and sys.platform.startswith("linux") else None
+        with self._lock:
+            self.max_jobs = max(1, int(max_jobs))
+            self.background_nice = max(0, min(19, int(background_nice)))
+            self.background_command_prefix = (ionice, "-c", "3") if ionice else ()
+            self.log_fn = log_fn
+            self._dispatch_locked()
+
+    def submit(self, key, priority, fn, wait=False):
+        """
+        Queue fn(cancel_event) under key and return its ExtractionJob. With
+        wait=False the job runs even if nobody waits for it.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None:
+                self._sequence += 1
+                job = ExtractionJob(self, key, priority, fn, self._sequence)
+                self._jobs[key] = job
+                self._pending.append(job)
+            else:
+                _log(self.log_fn, "Extraction job {0} is already queued or running; sharing it.".format(key))
+                if priority < job.priority:
+                    job.priority = priority
+                    if job.background and job in self._running and not job.preempted:
+                        # Restart it without the background priority
+                        job.preempted = True
+                        job.cancel_event.set()
+
+            if wait:
+                job.waiters += 1
+            else:
+                job.detached = True
+            self._dispatch_locked()
+        return job
+
+    def run(self, key, priority, fn, cancel_event=None):
+        """
+        Submit fn and wait for its result dict.
+        """
+        return self.submit(key, priority, fn, wait=True).wait(cancel_event)
+
+    def _release(self, job):
+        with self._lock:
+            job.waiters -= 1
+            if job.waiters > 0 or job.detached or job.done.is_set():
+                return
+
+            job.cancelled = True
+            if job in self._pending:
+                self._pending.remove(job)
+                self._jobs.pop(job.key, None)
+                job.result = {"success": False, "reason": "cancelled"}
+                job.done.set()
+            else:
+                job.cancel_event.set()
+
+    def _dispatch_loop(self):
+        with self._lock:
+            while True:
+                self._pending.sort(key=lambda job: (job.priority, job.sequence))
+                while self._pending and len(self._running) < self.max_jobs:
+                    self._start_locked(self._pending.pop(0))
+                self._wakeup.wait()
+
+    def _dispatch_locked(self):
+        self._wakeup.notify()
+        waiting_playback = sum(1 for job in self._pending if job.priority <= PRIORITY_PLAYBACK)
+        needed = waiting_playback - sum(1 for job in self._running if job.preempted)
+        preemptible = sorted(
+            (job for job in self._running if job.background and not job.preempted),
+            key=lambda job: job.sequence,
+            reverse=True
+        )
+        for job in preemptible[:max(0, needed)]:
+            _log(self.log_fn, "Pausing background extraction {0} for playback work.".format(job.key))
+            job.preempted = True
+            job.cancel_event.set()
+
+    def _start_locked(self, job):
+        job.background = job.priority > PRIORITY_PLAYBACK
+        job.cancel_event = threading.Event()
+        self._running.append(job)
+        worker = threading.Thread(target=self._run_job, args=(job,), name="TranslatarrExtraction")
+        worker.daemon = True
+        worker.start()
+
+    def _lower_thread_priority(self):
+        _process_context.command_prefix = self.background_command_prefix
+        if not self.background_nice or not sys.platform.startswith("linux") or not hasattr(threading, "get_native_id"):
+            return
+        try:
+            # Linux applies nice per thread, and tools started from this thread inherit it
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.background_nice)
+        except Exception as exc:
+            _log(self.log_fn, "Could not lower background extraction priority: {0}".format(exc))
+
+    def _run_job(self, job):
+        if job.background:
+            self._lower_thread_priority()
+        try:
+            result = job.fn(job.cancel_event)
+        except Exception as exc:
+            _log(self.log_fn, "Extraction job {0} failed: {1}".format(job.key, exc), "error")
+            result = {"success": False, "reason": "job_failed", "error": str(exc)}
+
+        with self._lock:
+            self._running.remove(job)
+            requeue = job.preempted and not job.cancelled and (result or {}).get("reason") == "cancelled"
+            job.preempted = False
+            if requeue:
+                self._pending.append(job)
+            else:
+                self._jobs.pop(job.key, None)
+                job.result = result or {"success": False, "reason": "job_failed"}
+                job.done.set()
+            self._dispatch_locked()
+
+
+EXTRACTION_SCHEDULER = ExtractionScheduler()
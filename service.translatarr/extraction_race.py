@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+
+
+LATENCY_PROFILE_VERSION = 1
+LATENCY_EWMA_ALPHA = 0.3
+# A failed attempt counts as at least this slow, so a route that keeps
+# failing quickly is not preferred over one that succeeds slowly.
+FAILURE_PENALTY_SECONDS = 300.0
+
+# Racing routes record their attempts from their own threads
+_PROFILE_LOCK = threading.Lock()
+
+
+def _log(log_fn, message, level="debug"):
+    if log_fn:
+        log_fn(message, level)
+
+
+def load_latency_profile(profile_path):
+    """
+    Return {route: {"ewma_seconds", "samples", "failures"}} or {} when the
+    profile is missing, unreadable, or from another version.
+    """
+    if not profile_path:
+        return {}
+
+    try:
+        with open(profile_path, "r", encoding="utf-8") as handle:
+            entry = json.load(handle)
+    except Exception:
+        return {}
+
+    if not isinstance(entry, dict) or entry.get("version") != LATENCY_PROFILE_VERSION:
+        return {}
+
+    routes = entry.get("routes")
+    return routes if isinstance(routes, dict) else {}
+
+
+def record_route_latency(profile_path, route, elapsed_seconds, success, log_fn=None):
+    """
+    Fold one extraction attempt into the route's moving average.
+    """
+    if not profile_path:
+        return
+
+    with _PROFILE_LOCK:
+        routes = load_latency_profile(profile_path)
+        stats = routes.get(route) or {"ewma_seconds": None, "samples": 0, "failures": 0}
+        sample = elapsed_seconds if success else max(elapsed_seconds, FAILURE_PENALTY_SECONDS)
+        previous = stats.get("ewma_seconds")
+        if previous is None:
+            stats["ewma_seconds"] = round(sample, 3)
+        else:
+            stats["ewma_seconds"] = round(LATENCY_EWMA_ALPHA * sample + (1 - LATENCY_EWMA_ALPHA) * previous, 3)
+        stats["samples"] = stats.get("samples", 0) + 1
+        stats["failures"] = stats.get("failures", 0) + (0 if success else 1)
+        stats["last_seconds"] = round(elapsed_seconds, 3)
+        stats["last_success"] = bool(success)
+        routes[route] = stats
+
+        temp_path = "{0}.{1}.tmp".format(profile_path, uuid.uuid4().hex)
+        try:
+            os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as handle:
+                json.dump({"version": LATENCY_PROFILE_VERSION, "routes": routes}, handle)
+            os.replace(temp_path, profile_path)
+        except Exception as exc:
+            _log(log_fn, "Failed to store extraction latency profile: {0}".format(exc), "error")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+
+def order_routes(routes, latency_profile):
+    """
+    Return routes fastest first by moving average. The given order is kept
+    until every route has at least one sample.
+    """
+    averages = dict(
+        (route, (latency_profile.get(route) or {}).get("ewma_seconds"))
+        for route in routes
+    )
+    if any(average is None for average in averages.values()):
+        return list(routes)
+    return sorted(routes, key=lambda route: averages[route])
+
+
+class ExtractionRace(object):
+    """
+    Run several extraction routes at once and keep the first valid result.
+
+    Every route is called as attempt(cancel_event, claim_fn) in its own
+    thread and returns a result dict. A route calls claim_fn() right before
+    it writes its output; only one route holds the claim at a time, so the
+    losers never overwrite the winner. Another route asking meanwhile waits
+    until the claim is settled: it becomes final when the claiming route
+    returns success, and is released again when that route fails, so a
+    failed write does not end the race without a winner. cancel_event is
+    set once there is a winner so the losers can kill their tools or drop
+    their requests.
+    """
+
+    def __init__(self, log_fn=None):
+        self.log_fn = log_fn
+        self.cancel_event = threading.Event()
+        self.winner = None
+        self.claimant = None
+        self._settled = threading.Condition(threading.Lock())
+
+    def claim(self, route):
+        with self._settled:
+            while self.winner is None and self.claimant not in (None, route):
+                self._settled.wait()
+            if self.winner is None:
+                self.claimant = route
+                return True
+            return self.winner == route
+
+    def _settle(self, route, success):
+        """
+        Turn route's claim into the win when it succeeded, or release it
+        when it failed. Returns True when route won.
+        """
+        with self._settled:
+            if self.winner is None:
+                if success and self.claimant in (None, route):
+                    self.winner = route
+                    self.cancel_event.set()
+                elif self.claimant == route:
+                    self.claimant = None
+                self._settled.notify_all()
+            return self.winner == route
+
+    def _run_route(self, route, attempt, results, started):
+        try:
+            result = attempt(self.cancel_event, lambda: self.claim(route))
+        except Exception as exc:
+            _log(self.log_fn, "Extraction route {0} crashed: {1}".format(route, exc), "error")
+            result = {"success": False, "reason": "route_failed", "error": str(exc)}
+        results.put((route, time.time() - started, result or {"success": False, "reason": "route_failed"}))
+
+    def run(self, routes):
+        """
+        routes is a sequence of (name, attempt) pairs. Returns a dict with
+        "winner", "result" and "elapsed" of the winning route (None when all
+        failed) and "finished": the (name, elapsed, result) of every route
+        that returned before the race was decided, cancelled ones excluded.
+        """
+        results = queue.Queue()
+        started = time.time()
+        for route, attempt in routes:
+            worker = threading.Thread(target=self._run_route, args=(route, attempt, results, started))
+            worker.daemon = True
+            worker.start()
+
+        outcome = {"winner": None, "result": None, "elapsed": None, "finished": []}
+        for _ in routes:
+            route, elapsed, result = results.get()
+            won = self._settle(route, bool(result.get("success")))
+            if result.get("reason") == "cancelled":
+                continue
+            outcome["finished"].append((route, elapsed, result))
+            if won:
+                outcome.update(winner=route, result=result, elapsed=elapsed)
+                break
+            _log(
+                self.log_fn,
+                "Extraction route {0} failed after {1:.1f}s: {2}".format(
+                    route,
+                    elapsed,
+                    result.get("reason", "unknown")
+                )
+            )
+
+        self.cancel_event.set()
+        return outcome
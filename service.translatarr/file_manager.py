@@ -3,12 +3,12 @@ import os
 import re
 import xbmcvfs
 import xbmcaddon
+import sdh_cleaner
+import srt_cues
 from languages import get_lang_params, get_active_language_setting
 
 ADDON = xbmcaddon.Addon('service.translatarr')
 
-MUSIC_NOTE_CHARS = u"\u266a\u266b\u266c\u2669"
-
 
 # -----------------------------------
 # Filename Sanitization
@@ -69,120 +69,40 @@ def get_target_path(original_path, video_name):
     return full_path, clean_name
 
 
-def _normalize_sdh_hi_fragment(fragment):
-    cleaned = fragment.strip().strip("[](){}")
-    cleaned = re.sub(r'\s+', ' ', cleaned)
-    return cleaned.strip()
-
-
-def _looks_like_spoken_dialogue_fragment(fragment):
-    cleaned = _normalize_sdh_hi_fragment(fragment)
-    if not cleaned:
-        return False
-
-    words = re.findall(r"[A-Za-z0-9']+", cleaned)
-    if not words:
-        return False
-
-    if any(ch in cleaned for ch in '"?!'):
-        return True
-
-    if "..." in cleaned or "\u2026" in cleaned:
-        return False
-
-    if "," in cleaned or ";" in cleaned:
-        return True
-
-    if "." in cleaned and len(words) <= 2:
-        return True
-
-    return False
-
-
-def _clean_sdh_hi_line(line):
-    stripped = line.strip()
-    if not stripped:
-        return ""
-
-    no_music = stripped.translate({ord(ch): None for ch in MUSIC_NOTE_CHARS}).strip()
-    if stripped != no_music:
-        if not no_music:
-            return ""
-        if stripped.startswith(tuple(MUSIC_NOTE_CHARS)) or stripped.endswith(tuple(MUSIC_NOTE_CHARS)):
-            return ""
-
-    if re.match(r'^\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*$', stripped):
-        if not _looks_like_spoken_dialogue_fragment(stripped):
-            return ""
-
-    working = stripped
-    prefix_pattern = r'^\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*'
-    while True:
-        match = re.match(prefix_pattern, working)
-        if not match:
-            break
-        fragment = match.group(1)
-        if _looks_like_spoken_dialogue_fragment(fragment):
-            break
-        working = working[match.end():].lstrip()
-
-    suffix_pattern = r'\s*(\[[^\[\]]{1,80}\]|\([^\(\)]{1,80}\))\s*$'
-    while True:
-        match = re.search(suffix_pattern, working)
-        if not match:
-            break
-        fragment = match.group(1)
-        if _looks_like_spoken_dialogue_fragment(fragment):
-            break
-        working = working[:match.start()].rstrip()
-
-    speaker_match = re.match(r"^\s*[A-Z][A-Z0-9 .'\-]{1,24}:\s+(.+)$", working)
-    if speaker_match:
-        working = speaker_match.group(1).strip()
-
-    return working.strip()
-
-
-def clean_sdh_hi_text(text):
+# -----------------------------------
+# SDH/HI Cleanup
+# -----------------------------------
+def clean_sdh_hi_texts(texts):
     """
-    Conservatively remove high-confidence SDH/HI cues while preserving dialogue.
-    Returns None when the entry is cue-only and should be skipped.
+    Conservatively remove high-confidence SDH/HI cues from all cues of one
+    subtitle while preserving dialogue. Cue-only entries come back as None
+    and should be skipped.
     """
-    lines = text.split(' [BR] ')
-    cleaned_lines = []
-
-    for line in lines:
-        cleaned = _clean_sdh_hi_line(line)
-        if cleaned:
-            cleaned_lines.append(cleaned)
-
-    if not cleaned_lines:
-        return None
-
-    return ' [BR] '.join(cleaned_lines)
+    return sdh_cleaner.clean_sdh_hi_texts(texts)
 
 
 # -----------------------------------
-# Parse SRT
+# Read SRT
 # -----------------------------------
-def parse_srt(content):
-    """
-    Parse an SRT file and return timestamps + text lines.
-    Newlines inside a block are replaced with [BR].
-    """
-    content = content.replace('\r\n', '\n').replace('\r', '\n')
-    blocks = re.findall(
-        r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3} --> \d{2}:\d{2}:\d{2},\d{3})\n(.*?)(?=\n\n|\n$|$)',
-        content,
-        re.DOTALL
-    )
-    if not blocks:
-        return None, None
+def _iter_file_bytes(path):
+    with xbmcvfs.File(path) as f:
+        while True:
+            chunk = f.readBytes(srt_cues.READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
 
-    timestamps = [(b[0], b[1]) for b in blocks]
-    texts = [b[2].replace('\n', ' [BR] ') for b in blocks]
 
-    return timestamps, texts
+def read_srt(path):
+    """
+    Stream an SRT file from any Kodi path and parse it incrementally,
+    without holding the whole file as one string.
+    Returns (timestamps, texts): timestamps is a compact CueTimings
+    sequence of (index, timing) tuples, multi-line texts are joined with
+    [BR]. Both are None when the file has no cues.
+    """
+    chunks = srt_cues.iter_decoded_chunks(_iter_file_bytes(path))
+    return srt_cues.collect_cues(srt_cues.iter_cues(srt_cues.iter_lines(chunks)))
 
 
 # -----------------------------------
@@ -199,37 +119,91 @@ def _compose_dual_language_text(source_text, translated_text):
     return translated_text
 
 
+LINE_PREFIX_RE = re.compile(r'^[ \t]*L\d{1,4}[:\-\s\.]*', re.IGNORECASE)
+BR_MARKER_RE = re.compile(r'\s*\[BR\]\s*', re.IGNORECASE)
+PUNCTUATION_AFTER_BREAK_RE = re.compile(r'\n([,.;:!?])')
+EXTRA_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
 def _restore_block_breaks(text):
-    text = re.sub(r'\s*\[BR\]\s*', '\n', text, flags=re.IGNORECASE)
-    text = re.sub(r'\n([,.;:!?])', r'\1\n', text)
-    text = re.sub(r'\n{3,}', '\n\n', text)
+    text = BR_MARKER_RE.sub('\n', text)
+    text = PUNCTUATION_AFTER_BREAK_RE.sub(r'\1\n', text)
+    text = EXTRA_BLANK_LINES_RE.sub('\n\n', text)
     return text.strip()
 
 
-def write_srt(path, timestamps, translated_texts, source_texts=None, dual_language=False):
+def _render_srt_block(timing, translated_text, source_text=None, dual_language=False):
     """
-    Write translated texts to SRT file with proper formatting.
-    Ensures Lxxx prefixes are removed and [BR] is converted back to line breaks.
+    Render one SRT block, or return None when the cue has no text left.
     """
-    nl = "\n"
-    final_srt = []
-
-    for idx, (t, txt) in enumerate(zip(timestamps, translated_texts)):
-        # Remove any surviving Lxxx prefixes
-        scrubbed_txt = re.sub(r'^[ \t]*L\d{1,4}[:\-\s\.]*', '', txt, flags=re.IGNORECASE).strip()
-        if dual_language:
-            source_txt = ""
-            if source_texts and idx < len(source_texts):
-                source_txt = (source_texts[idx] or "").strip()
-            scrubbed_txt = _compose_dual_language_text(source_txt, scrubbed_txt)
-
-        # Convert [BR] markers back to real line breaks, including loose variants.
-        final_txt = _restore_block_breaks(scrubbed_txt).replace('\n', nl).strip()
-        if not final_txt:
-            continue
-        # Build SRT block
-        final_srt.append(f"{t[0]}{nl}{t[1]}{nl}{final_txt}{nl}")
-
-    # Write to file using xbmcvfs
-    with xbmcvfs.File(path, 'w') as f:
-        f.write(nl.join(final_srt))
+    # Remove any surviving Lxxx prefixes
+    scrubbed_txt = LINE_PREFIX_RE.sub('', translated_text or '', count=1).strip()
+    if dual_language:
+        scrubbed_txt = _compose_dual_language_text((source_text or "").strip(), scrubbed_txt)
+
+    # Convert [BR] markers back to real line breaks, including loose variants.
+    final_txt = _restore_block_breaks(scrubbed_txt)
+    if not final_txt:
+        return None
+    return f"{timing[0]}\n{timing[1]}\n{final_txt}\n"
+
+
+def _local_filesystem_path(path):
+    if not path:
+        return None
+    resolved = xbmcvfs.translatePath(path) if path.startswith("special://") else path
+    if re.match(r'^[a-zA-Z]:[\\/]', resolved) or resolved.startswith("/"):
+        return resolved
+    return None
+
+
+class IncrementalSrtWriter(object):
+    """
+    Grow a translated SRT file cue by cue during live translation.
+    Each cue is rendered once. On local storage new blocks are appended
+    to the file, so every partial reload costs only the new blocks.
+    Other VFS paths are rewritten from the cached rendered blocks.
+    """
+
+    def __init__(self, path, timestamps, source_texts=None, dual_language=False):
+        self.path = path
+        self.timestamps = timestamps
+        self.source_texts = source_texts
+        self.dual_language = dual_language
+        self.rendered_count = 0
+        self.block_count = 0
+        self.local_path = _local_filesystem_path(path)
+        self.cached_blocks = [] if self.local_path is None else None
+
+    def write_through(self, translated_texts, count):
+        """
+        Render cues [rendered_count, count) and persist them.
+        Returns True when the file changed.
+        """
+        new_blocks = []
+        for idx in range(self.rendered_count, count):
+            source_txt = None
+            if self.dual_language and self.source_texts and idx < len(self.source_texts):
+                source_txt = self.source_texts[idx]
+            block = _render_srt_block(self.timestamps[idx], translated_texts[idx], source_txt, self.dual_language)
+            if block:
+                new_blocks.append(block)
+
+        first_write = self.rendered_count == 0
+        self.rendered_count = max(self.rendered_count, count)
+        if not new_blocks and not first_write:
+            return False
+
+        if self.local_path is not None:
+            payload = "\n".join(new_blocks)
+            if self.block_count and payload:
+                payload = "\n" + payload
+            with open(self.local_path, "wb" if first_write else "ab") as f:
+                f.write(payload.encode("utf-8"))
+        else:
+            self.cached_blocks.extend(new_blocks)
+            with xbmcvfs.File(self.path, 'w') as f:
+                f.write("\n".join(self.cached_blocks))
+
+        self.block_count += len(new_blocks)
+        return True
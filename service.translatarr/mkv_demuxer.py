@@ -0,0 +1,825 @@
+# -*- coding: utf-8 -*-
+import os
+import zlib
+
+import ass_converter
+import srt_cues
+
+
+EBML_HEADER_ID = 0x1A45DFA3
+SEGMENT_ID = 0x18538067
+SEEK_HEAD_ID = 0x114D9B74
+SEEK_ID = 0x4DBB
+SEEK_ID_ID = 0x53AB
+SEEK_POSITION_ID = 0x53AC
+INFO_ID = 0x1549A966
+TIMECODE_SCALE_ID = 0x2AD7B1
+MUXING_APP_ID = 0x4D80
+WRITING_APP_ID = 0x5741
+TRACKS_ID = 0x1654AE6B
+TRACK_ENTRY_ID = 0xAE
+TRACK_NUMBER_ID = 0xD7
+TRACK_TYPE_ID = 0x83
+CODEC_ID_ID = 0x86
+CODEC_PRIVATE_ID = 0x63A2
+LANGUAGE_ID = 0x22B59C
+LANGUAGE_IETF_ID = 0x22B59D
+NAME_ID = 0x536E
+FLAG_DEFAULT_ID = 0x88
+FLAG_FORCED_ID = 0x55AA
+FLAG_HEARING_IMPAIRED_ID = 0x55AB
+DEFAULT_DURATION_ID = 0x23E383
+CONTENT_ENCODINGS_ID = 0x6D80
+CONTENT_ENCODING_ID = 0x6240
+CONTENT_ENCODING_SCOPE_ID = 0x5032
+CONTENT_ENCODING_TYPE_ID = 0x5033
+CONTENT_COMPRESSION_ID = 0x5034
+CONTENT_COMP_ALGO_ID = 0x4254
+CONTENT_COMP_SETTINGS_ID = 0x4255
+CUES_ID = 0x1C53BB6B
+CUE_POINT_ID = 0xBB
+CUE_TIME_ID = 0xB3
+CUE_TRACK_POSITIONS_ID = 0xB7
+CUE_TRACK_ID = 0xF7
+CUE_CLUSTER_POSITION_ID = 0xF1
+CUE_RELATIVE_POSITION_ID = 0xF0
+CUE_DURATION_ID = 0xB2
+CLUSTER_ID = 0x1F43B675
+CLUSTER_TIMECODE_ID = 0xE7
+SIMPLE_BLOCK_ID = 0xA3
+BLOCK_GROUP_ID = 0xA0
+BLOCK_ID = 0xA1
+BLOCK_DURATION_ID = 0x9B
+CHAPTERS_ID = 0x1043A770
+TAGS_ID = 0x1254C367
+ATTACHMENTS_ID = 0x1941A469
+
+TOP_LEVEL_IDS = frozenset((
+    SEEK_HEAD_ID, INFO_ID, TRACKS_ID, CUES_ID, CLUSTER_ID, CHAPTERS_ID, TAGS_ID, ATTACHMENTS_ID,
+))
+
+TRACK_TYPE_SUBTITLE = 0x11
+COMPRESSION_ZLIB = 0
+COMPRESSION_HEADER_STRIPPING = 3
+SRT_CODEC_IDS = ("S_TEXT/UTF8", "S_TEXT/ASCII")
+ASS_CODEC_IDS = ("S_TEXT/ASS", "S_TEXT/SSA")
+TEXT_CODEC_IDS = SRT_CODEC_IDS + ASS_CODEC_IDS
+
+DEFAULT_TIMECODE_SCALE = 1000000
+DEFAULT_SUBTITLE_DURATION_MS = 2000
+READ_AHEAD_SIZE = 4096
+ELEMENT_HEADER_MAX_SIZE = 12
+MAX_METADATA_ELEMENT_SIZE = 32 * 1024 * 1024
+MAX_ELEMENTS_BEFORE_CLUSTER = 256
+# Writing apps known to add a cue point for every subtitle block. Other
+# muxers may index only some of them, and reading only the indexed blocks
+# would silently drop cues.
+FULL_SUBTITLE_CUES_WRITING_APPS = ("mkvmerge",)
+
+
+class _RangeReader(object):
+    """
+    Positional reader with a small read-ahead window.
+    bytes_read counts what was actually fetched from the file, which is
+    what matters when the media sits on an SMB/NFS share.
+    """
+
+    def __init__(self, handle, size):
+        self.handle = handle
+        self.size = size
+        self.buffer = b""
+        self.buffer_start = 0
+        self.bytes_read = 0
+        self.read_calls = 0
+
+    def read_at(self, position, length):
+        if length <= 0 or position >= self.size:
+            return b""
+
+        buffer_end = self.buffer_start + len(self.buffer)
+        if self.buffer_start <= position and position + length <= buffer_end:
+            offset = position - self.buffer_start
+            return self.buffer[offset:offset + length]
+
+        self.handle.seek(position)
+        data = self.handle.read(max(length, READ_AHEAD_SIZE))
+        self.bytes_read += len(data)
+        self.read_calls += 1
+        self.buffer = data
+        self.buffer_start = position
+        return data[:length]
+
+
+def _decode_vint(data, offset, keep_marker=False):
+    if offset >= len(data):
+        raise ValueError("truncated_element")
+
+    first = data[offset]
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+    if length > 8 or offset + length > len(data):
+        raise ValueError("invalid_vint")
+
+    value = first if keep_marker else first & (mask - 1)
+    for byte in data[offset + 1:offset + length]:
+        value = (value << 8) | byte
+    return value, length
+
+
+def _decode_element_header(data, offset):
+    """
+    Return (element_id, header_length, size); size is None for elements
+    of unknown size (live-muxed clusters and segments).
+    """
+    element_id, id_length = _decode_vint(data, offset, keep_marker=True)
+    if id_length > 4:
+        raise ValueError("invalid_element_id")
+    size, size_length = _decode_vint(data, offset + id_length)
+    if size == (1 << (7 * size_length)) - 1:
+        size = None
+    return element_id, id_length + size_length, size
+
+
+def _iter_children(data, start, end):
+    position = start
+    while position < end:
+        element_id, header_length, size = _decode_element_header(data, position)
+        data_start = position + header_length
+        if size is None or data_start + size > end:
+            raise ValueError("element_overflows_parent")
+        yield element_id, data_start, data_start + size
+        position = data_start + size
+
+
+def _read_uint(data, start, end):
+    return int.from_bytes(data[start:end], "big") if end > start else 0
+
+
+def _read_string(data, start, end):
+    return data[start:end].rstrip(b"\x00").decode("utf-8", errors="replace").strip()
+
+
+def _parse_content_encodings(data, start, end):
+    encodings = []
+    for element_id, child_start, child_end in _iter_children(data, start, end):
+        if element_id != CONTENT_ENCODING_ID:
+            continue
+
+        encoding = {"scope": 1, "type": 0, "algo": COMPRESSION_ZLIB, "settings": b""}
+        for field_id, field_start, field_end in _iter_children(data, child_start, child_end):
+            if field_id == CONTENT_ENCODING_SCOPE_ID:
+                encoding["scope"] = _read_uint(data, field_start, field_end)
+            elif field_id == CONTENT_ENCODING_TYPE_ID:
+                encoding["type"] = _read_uint(data, field_start, field_end)
+            elif field_id == CONTENT_COMPRESSION_ID:
+                for comp_id, comp_start, comp_end in _iter_children(data, field_start, field_end):
+                    if comp_id == CONTENT_COMP_ALGO_ID:
+                        encoding["algo"] = _read_uint(data, comp_start, comp_end)
+                    elif comp_id == CONTENT_COMP_SETTINGS_ID:
+                        encoding["settings"] = bytes(data[comp_start:comp_end])
+        encodings.append(encoding)
+    return encodings
+
+
+def _parse_track_entry(data, start, end, order):
+    track = {
+        "track_id": str(order),
+        "track_number": 0,
+        "track_type": 0,
+        "codec_id": "",
+        "codec_private": b"",
+        "language": "eng",
+        "language_ietf": "",
+        "name": "",
+        "is_default": True,
+        "is_forced": False,
+        "is_hearing_impaired": False,
+        "default_duration_ns": 0,
+        "encodings": [],
+    }
+
+    for element_id, child_start, child_end in _iter_children(data, start, end):
+        if element_id == TRACK_NUMBER_ID:
+            track["track_number"] = _read_uint(data, child_start, child_end)
+        elif element_id == TRACK_TYPE_ID:
+            track["track_type"] = _read_uint(data, child_start, child_end)
+        elif element_id == CODEC_ID_ID:
+            track["codec_id"] = _read_string(data, child_start, child_end)
+        elif element_id == CODEC_PRIVATE_ID:
+            track["codec_private"] = bytes(data[child_start:child_end])
+        elif element_id == LANGUAGE_ID:
+            track["language"] = _read_string(data, child_start, child_end) or "eng"
+        elif element_id == LANGUAGE_IETF_ID:
+            track["language_ietf"] = _read_string(data, child_start, child_end)
+        elif element_id == NAME_ID:
+            track["name"] = _read_string(data, child_start, child_end)
+        elif element_id == FLAG_DEFAULT_ID:
+            track["is_default"] = bool(_read_uint(data, child_start, child_end))
+        elif element_id == FLAG_FORCED_ID:
+            track["is_forced"] = bool(_read_uint(data, child_start, child_end))
+        elif element_id == FLAG_HEARING_IMPAIRED_ID:
+            track["is_hearing_impaired"] = bool(_read_uint(data, child_start, child_end))
+        elif element_id == DEFAULT_DURATION_ID:
+            track["default_duration_ns"] = _read_uint(data, child_start, child_end)
+        elif element_id == CONTENT_ENCODINGS_ID:
+            track["encodings"] = _parse_content_encodings(data, child_start, child_end)
+
+    return track
+
+
+def _decode_frame(payload, encodings):
+    # Encodings are listed in the order they were applied when muxing
+    for encoding in reversed(encodings):
+        if not encoding["scope"] & 1:
+            continue
+        if encoding["algo"] == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        else:
+            payload = encoding["settings"] + payload
+    return payload
+
+
+class _MatroskaFile(object):
+    def __init__(self, handle, file_size):
+        self.reader = _RangeReader(handle, file_size)
+        self.file_size = file_size
+        self.segment_start = 0
+        self.segment_end = file_size
+        self.first_cluster_position = None
+        self.positions = {}
+        self.timecode_scale = DEFAULT_TIMECODE_SCALE
+        self.writing_app = ""
+        self.tracks = []
+
+    def _element_header(self, position):
+        data = self.reader.read_at(position, ELEMENT_HEADER_MAX_SIZE)
+        element_id, header_length, size = _decode_element_header(data, 0)
+        return element_id, position + header_length, size
+
+    def _read_element_data(self, data_start, size):
+        if size is None or size > MAX_METADATA_ELEMENT_SIZE:
+            raise ValueError("metadata_element_too_large")
+        data = self.reader.read_at(data_start, size)
+        if len(data) < size:
+            raise ValueError("truncated_element")
+        return data
+
+    def open(self):
+        element_id, data_start, size = self._element_header(0)
+        if element_id != EBML_HEADER_ID or size is None:
+            raise ValueError("not_matroska")
+
+        position = data_start + size
+        while True:
+            element_id, data_start, size = self._element_header(position)
+            if element_id == SEGMENT_ID:
+                break
+            if size is None:
+                raise ValueError("segment_not_found")
+            position = data_start + size
+
+        self.segment_start = data_start
+        if size is not None:
+            self.segment_end = min(data_start + size, self.file_size)
+
+        self._scan_segment_head()
+
+        info_position = self.positions.get(INFO_ID)
+        if info_position is not None:
+            self._parse_info(info_position)
+
+        tracks_position = self.positions.get(TRACKS_ID)
+        if tracks_position is None:
+            raise ValueError("tracks_not_found")
+        self._parse_tracks(tracks_position)
+
+    def _scan_segment_head(self):
+        """
+        Walk the top-level elements up to the first Cluster and follow the
+        SeekHead so that metadata stored behind the clusters (usually Cues)
+        is found without reading the clusters themselves.
+        """
+        seek_heads = []
+        position = self.segment_start
+        for _ in range(MAX_ELEMENTS_BEFORE_CLUSTER):
+            if position >= self.segment_end:
+                break
+            element_id, data_start, size = self._element_header(position)
+            if element_id == CLUSTER_ID:
+                self.first_cluster_position = position
+                break
+            if element_id in TOP_LEVEL_IDS:
+                self.positions.setdefault(element_id, position)
+            if element_id == SEEK_HEAD_ID:
+                seek_heads.append(position)
+            if size is None:
+                raise ValueError("unknown_size_metadata")
+            position = data_start + size
+
+        visited = set()
+        while seek_heads:
+            seek_head_position = seek_heads.pop(0)
+            if seek_head_position in visited:
+                continue
+            visited.add(seek_head_position)
+            for element_id, target in self._parse_seek_head(seek_head_position):
+                self.positions.setdefault(element_id, target)
+                if element_id == SEEK_HEAD_ID:
+                    seek_heads.append(target)
+                elif element_id == CLUSTER_ID and self.first_cluster_position is None:
+                    self.first_cluster_position = target
+
+    def _parse_seek_head(self, position):
+        _, data_start, size = self._element_header(position)
+        data = self._read_element_data(data_start, size)
+        entries = []
+        for element_id, child_start, child_end in _iter_children(data, 0, len(data)):
+            if element_id != SEEK_ID:
+                continue
+            seek_id = None
+            seek_position = None
+            for field_id, field_start, field_end in _iter_children(data, child_start, child_end):
+                if field_id == SEEK_ID_ID:
+                    seek_id = _read_uint(data, field_start, field_end)
+                elif field_id == SEEK_POSITION_ID:
+                    seek_position = _read_uint(data, field_start, field_end)
+            if seek_id is not None and seek_position is not None:
+                entries.append((seek_id, self.segment_start + seek_position))
+        return entries
+
+    def _parse_info(self, position):
+        _, data_start, size = self._element_header(position)
+        data = self._read_element_data(data_start, size)
+        for element_id, child_start, child_end in _iter_children(data, 0, len(data)):
+            if element_id == TIMECODE_SCALE_ID:
+                self.timecode_scale = _read_uint(data, child_start, child_end) or DEFAULT_TIMECODE_SCALE
+            elif element_id == WRITING_APP_ID:
+                self.writing_app = _read_string(data, child_start, child_end)
+
+    def _parse_tracks(self, position):
+        _, data_start, size = self._element_header(position)
+        data = self._read_element_data(data_start, size)
+        order = 0
+        for element_id, child_start, child_end in _iter_children(data, 0, len(data)):
+            if element_id != TRACK_ENTRY_ID:
+                continue
+            self.tracks.append(_parse_track_entry(data, child_start, child_end, order))
+            order += 1
+
+    def parse_cue_positions(self, track_numbers):
+        """
+        Return [(cluster_position, relative_position, cue_duration)] for the
+        tracks in file order, or None when one of them has no usable index.
+        The index is only used for files from a writing app that indexes
+        every subtitle block.
+        """
+        cues_position = self.positions.get(CUES_ID)
+        if cues_position is None or not self.writing_app.startswith(FULL_SUBTITLE_CUES_WRITING_APPS):
+            return None
+
+        _, data_start, size = self._element_header(cues_position)
+        data = self._read_element_data(data_start, size)
+        entries = []
+        indexed_tracks = set()
+        for element_id, point_start, point_end in _iter_children(data, 0, len(data)):
+            if element_id != CUE_POINT_ID:
+                continue
+            for child_id, child_start, child_end in _iter_children(data, point_start, point_end):
+                if child_id != CUE_TRACK_POSITIONS_ID:
+                    continue
+                fields = {}
+                for field_id, field_start, field_end in _iter_children(data, child_start, child_end):
+                    fields[field_id] = _read_uint(data, field_start, field_end)
+                if fields.get(CUE_TRACK_ID) not in track_numbers:
+                    continue
+                if CUE_CLUSTER_POSITION_ID not in fields or CUE_RELATIVE_POSITION_ID not in fields:
+                    return None
+                indexed_tracks.add(fields[CUE_TRACK_ID])
+                entries.append((
+                    self.segment_start + fields[CUE_CLUSTER_POSITION_ID],
+                    fields[CUE_RELATIVE_POSITION_ID],
+                    fields.get(CUE_DURATION_ID),
+                ))
+
+        if indexed_tracks != set(track_numbers):
+            return None
+        entries.sort(key=lambda entry: (entry[0], entry[1]))
+        return entries
+
+    def _ticks_to_ms(self, ticks):
+        return max(0, ticks) * self.timecode_scale // 1000000
+
+    def _read_block(self, data_start, size, track_numbers, cluster_timecode):
+        """
+        Read a (Simple)Block header and, only when it belongs to one of the
+        wanted tracks, its payload. Returns (track_number, start_ms, payload)
+        or None.
+        """
+        header = self.reader.read_at(data_start, min(size, ELEMENT_HEADER_MAX_SIZE))
+        block_track, track_length = _decode_vint(header, 0)
+        if block_track not in track_numbers:
+            return None
+        if len(header) < track_length + 3:
+            raise ValueError("truncated_block")
+
+        relative_timecode = int.from_bytes(header[track_length:track_length + 2], "big", signed=True)
+        flags = header[track_length + 2]
+        if flags & 0x06:
+            # Text subtitles are never laced
+            raise ValueError("laced_subtitle_block")
+
+        payload_start = data_start + track_length + 3
+        payload_size = size - track_length - 3
+        payload = self.reader.read_at(payload_start, payload_size)
+        if len(payload) < payload_size:
+            raise ValueError("truncated_block")
+        return block_track, self._ticks_to_ms(cluster_timecode + relative_timecode), payload
+
+    def _read_block_element(self, element_id, data_start, size, track_numbers, cluster_timecode):
+        """
+        Return (track_number, start_ms, duration_ms or None, payload) for a
+        SimpleBlock or BlockGroup of a wanted track, else None.
+        """
+        if element_id == SIMPLE_BLOCK_ID:
+            block = self._read_block(data_start, size, track_numbers, cluster_timecode)
+            if block is None:
+                return None
+            return block[0], block[1], None, block[2]
+
+        if element_id != BLOCK_GROUP_ID:
+            return None
+
+        block = None
+        duration_ms = None
+        position = data_start
+        end = data_start + size
+        while position < end:
+            child_id, child_start, child_size = self._element_header(position)
+            if child_size is None:
+                raise ValueError("unknown_size_block_group")
+            if child_id == BLOCK_ID:
+                block = self._read_block(child_start, child_size, track_numbers, cluster_timecode)
+                if block is None:
+                    # Someone else's block: skip the rest of the group
+                    return None
+            elif child_id == BLOCK_DURATION_ID:
+                duration_data = self.reader.read_at(child_start, child_size)
+                duration_ms = self._ticks_to_ms(_read_uint(duration_data, 0, len(duration_data)))
+            position = child_start + child_size
+
+        if block is None:
+            return None
+        return block[0], block[1], duration_ms, block[2]
+
+    def _read_cluster_timecode(self, cluster_data_start, cluster_end):
+        position = cluster_data_start
+        while position < cluster_end:
+            element_id, data_start, size = self._element_header(position)
+            if size is None:
+                raise ValueError("unknown_size_cluster_child")
+            if element_id == CLUSTER_TIMECODE_ID:
+                data = self.reader.read_at(data_start, size)
+                return _read_uint(data, 0, len(data))
+            position = data_start + size
+        raise ValueError("cluster_timecode_missing")
+
+    def iter_indexed_blocks(self, track_numbers, cue_positions, cancel_event=None):
+        clusters = {}
+        for cluster_position, relative_position, cue_duration in cue_positions:
+            cluster = clusters.get(cluster_position)
+            if cluster is None:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                element_id, cluster_data_start, cluster_size = self._element_header(cluster_position)
+                if element_id != CLUSTER_ID:
+                    raise ValueError("cue_points_to_non_cluster")
+                cluster_end = (
+                    cluster_data_start + cluster_size if cluster_size is not None else self.segment_end
+                )
+                cluster = (cluster_data_start, self._read_cluster_timecode(cluster_data_start, cluster_end))
+                clusters[cluster_position] = cluster
+            cluster_data_start, cluster_timecode = cluster
+
+            block_id, block_start, block_size = self._element_header(cluster_data_start + relative_position)
+            if block_size is None:
+                raise ValueError("unknown_size_block")
+            block = self._read_block_element(block_id, block_start, block_size, track_numbers, cluster_timecode)
+            if block is None:
+                raise ValueError("cue_points_to_other_track")
+
+            track_number, start_ms, duration_ms, payload = block
+            if duration_ms is None and cue_duration is not None:
+                duration_ms = self._ticks_to_ms(cue_duration)
+            yield track_number, start_ms, duration_ms, payload
+
+    def iter_cluster_blocks(self, track_numbers, cancel_event=None):
+        """
+        Walk every cluster but only read element headers; payloads of
+        other tracks are skipped with a seek. Stops at the next cluster once
+        cancel_event is set.
+        """
+        position = self.first_cluster_position
+        if position is None:
+            return
+
+        while position < self.segment_end:
+            if cancel_event is not None and cancel_event.is_set():
+                return
+            element_id, data_start, size = self._element_header(position)
+            if element_id != CLUSTER_ID:
+                if size is None:
+                    raise ValueError("unknown_size_metadata")
+                position = data_start + size
+                continue
+
+            cluster_end = data_start + size if size is not None else self.segment_end
+            cluster_timecode = 0
+            position = data_start
+            while position < cluster_end:
+                child_id, child_start, child_size = self._element_header(position)
+                if size is None and child_id in TOP_LEVEL_IDS:
+                    # End of an unknown-size cluster
+                    break
+                if child_size is None:
+                    raise ValueError("unknown_size_cluster_child")
+
+                if child_id == CLUSTER_TIMECODE_ID:
+                    data = self.reader.read_at(child_start, child_size)
+                    cluster_timecode = _read_uint(data, 0, len(data))
+                else:
+                    block = self._read_block_element(
+                        child_id, child_start, child_size, track_numbers, cluster_timecode
+                    )
+                    if block is not None:
+                        yield block
+                position = child_start + child_size
+
+            if size is not None:
+                position = cluster_end
+
+
+def _open_matroska(handle):
+    handle.seek(0, os.SEEK_END)
+    file_size = handle.tell()
+    matroska = _MatroskaFile(handle, file_size)
+    matroska.open()
+    return matroska
+
+
+def _public_track_info(track):
+    return {
+        "track_id": track["track_id"],
+        "track_number": track["track_number"],
+        "codec_id": track["codec_id"],
+        "language": track["language"],
+        "language_ietf": track["language_ietf"],
+        "name": track["name"],
+        "is_default": track["is_default"],
+        "is_forced": track["is_forced"],
+        "is_hearing_impaired": track["is_hearing_impaired"],
+    }
+
+
+def probe_subtitle_tracks(path):
+    """
+    List the subtitle tracks of a Matroska file by reading only its header,
+    SeekHead and Tracks elements. track_id matches mkvmerge/mkvextract IDs.
+    """
+    try:
+        with open(path, "rb", buffering=0) as handle:
+            matroska = _open_matroska(handle)
+    except (OSError, ValueError) as exc:
+        return {"success": False, "reason": "mkv_parse_failed", "error": str(exc)}
+
+    tracks = [
+        _public_track_info(track)
+        for track in matroska.tracks
+        if track["track_type"] == TRACK_TYPE_SUBTITLE
+    ]
+    return {
+        "success": True,
+        "tracks": tracks,
+        "bytes_read": matroska.reader.bytes_read,
+        "file_size": matroska.file_size,
+    }
+
+
+def _unsupported_track_reason(track):
+    if track is None or track["track_type"] != TRACK_TYPE_SUBTITLE:
+        return "mkv_track_not_found"
+    if track["codec_id"] not in TEXT_CODEC_IDS:
+        return "mkv_codec_unsupported"
+    for encoding in track["encodings"]:
+        if encoding["type"] != 0 or encoding["algo"] not in (
+            COMPRESSION_ZLIB,
+            COMPRESSION_HEADER_STRIPPING,
+        ):
+            return "mkv_encoding_unsupported"
+    return None
+
+
+def _decode_cue_text(payload, encodings, is_ass=False):
+    text = _decode_frame(payload, encodings).decode("utf-8", errors="replace")
+    text = text.replace("\r\n", "\n").replace("\r", "\n").strip("\x00").strip()
+    if is_ass:
+        return ass_converter.matroska_event_text(text)
+    return text
+
+
+def _collect_cues(blocks, encodings, default_duration_ms, is_ass=False):
+    cues = []
+    for start_ms, duration_ms, payload in blocks:
+        text = _decode_cue_text(payload, encodings, is_ass)
+        if not text:
+            continue
+        cues.append([start_ms, duration_ms if duration_ms is not None else default_duration_ms, text])
+
+    cues.sort(key=lambda cue: cue[0])
+    for position, cue in enumerate(cues):
+        if cue[1] is None:
+            if position + 1 < len(cues):
+                cue[1] = max(cues[position + 1][0] - cue[0], 1)
+            else:
+                cue[1] = DEFAULT_SUBTITLE_DURATION_MS
+
+    if is_ass:
+        merged = sorted(ass_converter.iter_merged_cues(
+            (start_ms, start_ms + duration_ms, text) for start_ms, duration_ms, text in cues
+        ))
+        cues = [[start_ms, end_ms - start_ms, text] for start_ms, end_ms, text in merged]
+    return cues
+
+
+def _write_srt(output_path, cues):
+    with open(output_path, "w", encoding="utf-8", newline="\n") as output:
+        for number, (start_ms, duration_ms, text) in enumerate(cues, 1):
+            output.write("{0}\n{1}\n{2}\n\n".format(
+                number,
+                srt_cues.format_timing(start_ms, start_ms + duration_ms),
+                text
+            ))
+
+
+def extract_srt_tracks(path, outputs, cancel_event=None):
+    """
+    Extract several text subtitle tracks in a single pass over the file.
+    outputs maps track_id to an SRT output path; per-track results are
+    returned under "tracks".
+    Uses the Cues index to jump to the subtitle blocks when the file has
+    one for every requested track, otherwise walks the clusters and seeks
+    past the payloads of every other track.
+    Setting cancel_event stops reading at the next cluster and returns
+    "cancelled" without writing any output.
+    """
+    results = {}
+    method = None
+    try:
+        with open(path, "rb", buffering=0) as handle:
+            matroska = _open_matroska(handle)
+            tracks_by_id = dict((track["track_id"], track) for track in matroska.tracks)
+
+            wanted = {}
+            for track_id, output_path in outputs.items():
+                track = tracks_by_id.get(str(track_id))
+                reason = _unsupported_track_reason(track)
+                if reason:
+                    results[str(track_id)] = {"success": False, "reason": reason}
+                else:
+                    wanted[track["track_number"]] = (track, output_path)
+
+            payloads = dict((track_number, []) for track_number in wanted)
+            if wanted:
+                cue_positions = matroska.parse_cue_positions(set(wanted))
+                if cue_positions:
+                    method = "cues"
+                    blocks = matroska.iter_indexed_blocks(set(wanted), cue_positions, cancel_event)
+                else:
+                    method = "clusters"
+                    blocks = matroska.iter_cluster_blocks(set(wanted), cancel_event)
+
+                for track_number, start_ms, duration_ms, payload in blocks:
+                    payloads[track_number].append((start_ms, duration_ms, payload))
+                if cancel_event is not None and cancel_event.is_set():
+                    return {"success": False, "reason": "cancelled"}
+
+            collected = []
+            for track_number, (track, output_path) in wanted.items():
+                default_duration_ms = (
+                    track["default_duration_ns"] // 1000000 if track["default_duration_ns"] else None
+                )
+                cues = _collect_cues(
+                    payloads[track_number],
+                    track["encodings"],
+                    default_duration_ms,
+                    track["codec_id"] in ASS_CODEC_IDS
+                )
+                collected.append((track, output_path, cues))
+    except (OSError, ValueError, zlib.error) as exc:
+        return {"success": False, "reason": "mkv_parse_failed", "error": str(exc)}
+
+    for track, output_path, cues in collected:
+        if not cues:
+            results[track["track_id"]] = {"success": False, "reason": "mkv_no_subtitle_blocks"}
+            continue
+        try:
+            _write_srt(output_path, cues)
+        except OSError as exc:
+            results[track["track_id"]] = {"success": False, "reason": "mkv_write_failed", "error": str(exc)}
+            continue
+        results[track["track_id"]] = {
+            "success": True,
+            "output_path": output_path,
+            "cue_count": len(cues),
+        }
+
+    return {
+        "success": True,
+        "tracks": results,
+        "method": method,
+        "bytes_read": matroska.reader.bytes_read,
+        "read_calls": matroska.reader.read_calls,
+        "file_size": matroska.file_size,
+    }
+
+
+def iter_srt_cues(path, track_id):
+    """
+    Yield (start_ms, end_ms, text) for one text subtitle track while its
+    blocks are being read, so callers can use the first cues before the
+    rest of the file has been walked. Cues come in file order, which is
+    presentation order for muxed subtitle tracks. ASS/SSA events are
+    reduced to plain text and merged like ass_converter does for files.
+    Raises ValueError or OSError when the track cannot be read.
+    """
+    with open(path, "rb", buffering=0) as handle:
+        matroska = _open_matroska(handle)
+        track = None
+        for candidate in matroska.tracks:
+            if candidate["track_id"] == str(track_id):
+                track = candidate
+                break
+        reason = _unsupported_track_reason(track)
+        if reason:
+            raise ValueError(reason)
+
+        track_numbers = set([track["track_number"]])
+        cue_positions = matroska.parse_cue_positions(track_numbers)
+        if cue_positions:
+            blocks = matroska.iter_indexed_blocks(track_numbers, cue_positions)
+        else:
+            blocks = matroska.iter_cluster_blocks(track_numbers)
+        default_duration_ms = (
+            track["default_duration_ns"] // 1000000 if track["default_duration_ns"] else None
+        )
+
+        is_ass = track["codec_id"] in ASS_CODEC_IDS
+
+        def iter_block_cues():
+            # A block without any duration ends where the next cue starts
+            held = None
+            for _, start_ms, duration_ms, payload in blocks:
+                try:
+                    text = _decode_cue_text(payload, track["encodings"], is_ass)
+                except zlib.error as exc:
+                    raise ValueError("Corrupt compressed subtitle block: {0}".format(exc))
+                if not text:
+                    continue
+
+                if held is not None:
+                    yield held[0], held[0] + max(start_ms - held[0], 1), held[1]
+                    held = None
+
+                if duration_ms is None:
+                    duration_ms = default_duration_ms
+                if duration_ms is None:
+                    held = (start_ms, text)
+                    continue
+                yield start_ms, start_ms + duration_ms, text
+
+            if held is not None:
+                yield held[0], held[0] + DEFAULT_SUBTITLE_DURATION_MS, held[1]
+
+        if is_ass:
+            for cue in ass_converter.iter_merged_cues(iter_block_cues()):
+                yield cue
+        else:
+            for cue in iter_block_cues():
+                yield cue
+
+
+def extract_srt(path, track_id, output_path):
+    """
+    Extract one text subtitle track straight to an SRT file.
+    """
+    result = extract_srt_tracks(path, {str(track_id): output_path})
+    if not result.get("success"):
+        return result
+
+    track_result = dict(result["tracks"][str(track_id)])
+    if track_result.get("success"):
+        for field in ("method", "bytes_read", "read_calls", "file_size"):
+            track_result[field] = result[field]
+    return track_result
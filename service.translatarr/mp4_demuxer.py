@@ -0,0 +1,472 @@
+# -*- coding: utf-8 -*-
+import os
+import struct
+
+import srt_cues
+
+
+TEXT_HANDLER_TYPES = (b"sbtl", b"text", b"subt")
+TX3G_SAMPLE_FORMATS = (b"tx3g", b"text")
+MAX_MOOV_SIZE = 64 * 1024 * 1024
+MAX_TOP_LEVEL_BOXES = 1024
+UTF16_BOMS = (b"\xfe\xff", b"\xff\xfe")
+
+
+class _CountingReader(object):
+    """
+    Positional reads on an unbuffered file, counting what is fetched so the
+    caller can report how little of the media file was touched.
+    """
+
+    def __init__(self, handle, size):
+        self.handle = handle
+        self.size = size
+        self.bytes_read = 0
+        self.read_calls = 0
+
+    def read_at(self, position, length):
+        if length <= 0 or position >= self.size:
+            return b""
+        self.handle.seek(position)
+        chunks = []
+        remaining = length
+        while remaining > 0:
+            data = self.handle.read(remaining)
+            if not data:
+                break
+            chunks.append(data)
+            remaining -= len(data)
+        data = b"".join(chunks)
+        self.bytes_read += len(data)
+        self.read_calls += 1
+        return data
+
+
+def _read_box_header(data, offset, end):
+    """
+    Return (box_type, payload_start, box_end) for the box at offset.
+    """
+    if offset + 8 > end:
+        raise ValueError("truncated_box")
+    size, box_type = struct.unpack_from(">I4s", data, offset)
+    header_size = 8
+    if size == 1:
+        if offset + 16 > end:
+            raise ValueError("truncated_box")
+        size = struct.unpack_from(">Q", data, offset + 8)[0]
+        header_size = 16
+    elif size == 0:
+        size = end - offset
+    if size < header_size or offset + size > end:
+        raise ValueError("invalid_box_size")
+    return box_type, offset + header_size, offset + size
+
+
+def _iter_boxes(data, start, end):
+    position = start
+    while position + 8 <= end:
+        box_type, payload_start, box_end = _read_box_header(data, position, end)
+        yield box_type, payload_start, box_end
+        position = box_end
+
+
+def _find_child(data, start, end, box_type):
+    for child_type, child_start, child_end in _iter_boxes(data, start, end):
+        if child_type == box_type:
+            return child_start, child_end
+    return None, None
+
+
+def _find_path(data, start, end, path):
+    for box_type in path:
+        start, end = _find_child(data, start, end, box_type)
+        if start is None:
+            return None, None
+    return start, end
+
+
+def _decode_mdhd_language(packed):
+    if not packed or packed == 0x7FFF:
+        return "und"
+    chars = [((packed >> shift) & 0x1F) + 0x60 for shift in (10, 5, 0)]
+    if not all(0x61 <= ch <= 0x7A for ch in chars):
+        return "und"
+    return "".join(chr(ch) for ch in chars)
+
+
+def _parse_mdhd(data, start, end):
+    version = data[start]
+    if version == 1:
+        timescale = struct.unpack_from(">I", data, start + 20)[0]
+        language = struct.unpack_from(">H", data, start + 32)[0]
+    else:
+        timescale = struct.unpack_from(">I", data, start + 12)[0]
+        language = struct.unpack_from(">H", data, start + 20)[0]
+    return timescale, _decode_mdhd_language(language)
+
+
+def _read_cstring(data, start, end):
+    raw = bytes(data[start:end]).split(b"\x00", 1)[0]
+    return raw.decode("utf-8", errors="replace").strip()
+
+
+def _parse_stts(data, start):
+    count = struct.unpack_from(">I", data, start + 4)[0]
+    return [struct.unpack_from(">II", data, start + 8 + index * 8) for index in range(count)]
+
+
+def _parse_stsc(data, start):
+    count = struct.unpack_from(">I", data, start + 4)[0]
+    return [struct.unpack_from(">III", data, start + 8 + index * 12) for index in range(count)]
+
+
+def _parse_stsz(data, start):
+    sample_size, count = struct.unpack_from(">II", data, start + 4)
+    if sample_size:
+        return [sample_size] * count
+    return list(struct.unpack_from(">{0}I".format(count), data, start + 12))
+
+
+def _parse_chunk_offsets(data, stbl_start, stbl_end):
+    start, _ = _find_child(data, stbl_start, stbl_end, b"stco")
+    if start is not None:
+        count = struct.unpack_from(">I", data, start + 4)[0]
+        return list(struct.unpack_from(">{0}I".format(count), data, start + 8))
+
+    start, _ = _find_child(data, stbl_start, stbl_end, b"co64")
+    if start is not None:
+        count = struct.unpack_from(">I", data, start + 4)[0]
+        return list(struct.unpack_from(">{0}Q".format(count), data, start + 8))
+
+    raise ValueError("chunk_offsets_missing")
+
+
+def _parse_trak(data, start, end, order):
+    track = {
+        "track_id": str(order),
+        "handler_type": b"",
+        "sample_format": b"",
+        "codec_name": "",
+        "language": "und",
+        "name": "",
+        "timescale": 0,
+        "stbl": (None, None),
+    }
+
+    mdia_start, mdia_end = _find_child(data, start, end, b"mdia")
+    if mdia_start is None:
+        return track
+
+    hdlr_start, hdlr_end = _find_child(data, mdia_start, mdia_end, b"hdlr")
+    if hdlr_start is not None:
+        track["handler_type"] = bytes(data[hdlr_start + 8:hdlr_start + 12])
+        track["name"] = _read_cstring(data, hdlr_start + 24, hdlr_end)
+
+    mdhd_start, mdhd_end = _find_child(data, mdia_start, mdia_end, b"mdhd")
+    if mdhd_start is not None:
+        track["timescale"], track["language"] = _parse_mdhd(data, mdhd_start, mdhd_end)
+
+    elng_start, elng_end = _find_child(data, mdia_start, mdia_end, b"elng")
+    if elng_start is not None:
+        track["language"] = _read_cstring(data, elng_start + 4, elng_end) or track["language"]
+
+    udta_name_start, udta_name_end = _find_path(data, start, end, (b"udta", b"name"))
+    if udta_name_start is not None:
+        track["name"] = _read_cstring(data, udta_name_start, udta_name_end) or track["name"]
+
+    stbl = _find_path(data, mdia_start, mdia_end, (b"minf", b"stbl"))
+    track["stbl"] = stbl
+    if stbl[0] is not None:
+        stsd_start, _ = _find_child(data, stbl[0], stbl[1], b"stsd")
+        if stsd_start is not None and struct.unpack_from(">I", data, stsd_start + 4)[0] > 0:
+            track["sample_format"] = bytes(data[stsd_start + 12:stsd_start + 16])
+
+    if track["sample_format"] in TX3G_SAMPLE_FORMATS:
+        track["codec_name"] = "mov_text"
+    else:
+        track["codec_name"] = track["sample_format"].decode("ascii", errors="replace").strip()
+    return track
+
+
+def _build_sample_table(data, stbl_start, stbl_end):
+    """
+    Expand stts/stsc/stsz/stco into [(offset, size, start, duration)] in
+    media timescale units.
+    """
+    stts_start, _ = _find_child(data, stbl_start, stbl_end, b"stts")
+    stsc_start, _ = _find_child(data, stbl_start, stbl_end, b"stsc")
+    stsz_start, _ = _find_child(data, stbl_start, stbl_end, b"stsz")
+    if stts_start is None or stsc_start is None or stsz_start is None:
+        raise ValueError("sample_table_incomplete")
+
+    sizes = _parse_stsz(data, stsz_start)
+    chunk_offsets = _parse_chunk_offsets(data, stbl_start, stbl_end)
+    chunk_runs = _parse_stsc(data, stsc_start)
+
+    offsets = []
+    for run_index, (first_chunk, samples_per_chunk, _) in enumerate(chunk_runs):
+        last_chunk = (
+            chunk_runs[run_index + 1][0] - 1
+            if run_index + 1 < len(chunk_runs)
+            else len(chunk_offsets)
+        )
+        for chunk_number in range(first_chunk, last_chunk + 1):
+            if chunk_number < 1 or chunk_number > len(chunk_offsets):
+                raise ValueError("invalid_chunk_reference")
+            position = chunk_offsets[chunk_number - 1]
+            for _ in range(samples_per_chunk):
+                if len(offsets) >= len(sizes):
+                    break
+                offsets.append(position)
+                position += sizes[len(offsets) - 1]
+
+    samples = []
+    sample_time = 0
+    sample_index = 0
+    for count, delta in _parse_stts(data, stts_start):
+        for _ in range(count):
+            if sample_index >= len(offsets):
+                break
+            samples.append((offsets[sample_index], sizes[sample_index], sample_time, delta))
+            sample_time += delta
+            sample_index += 1
+    return samples
+
+
+def _decode_tx3g_sample(payload):
+    if len(payload) < 2:
+        return ""
+    text_length = struct.unpack_from(">H", payload, 0)[0]
+    raw = payload[2:2 + text_length]
+    if raw[:2] in UTF16_BOMS:
+        text = raw.decode("utf-16", errors="replace")
+    else:
+        text = raw.decode("utf-8", errors="replace")
+    return text.replace("\r\n", "\n").replace("\r", "\n").strip("\x00").strip()
+
+
+class _Mp4File(object):
+    def __init__(self, handle, file_size):
+        self.reader = _CountingReader(handle, file_size)
+        self.file_size = file_size
+        self.moov = None
+        self.tracks = []
+
+    def open(self):
+        position = 0
+        for _ in range(MAX_TOP_LEVEL_BOXES):
+            if position + 8 > self.file_size:
+                break
+            header = self.reader.read_at(position, 16)
+            box_type, _, box_end = self._top_level_header(header, position)
+            if box_type == b"moov":
+                size = box_end - position
+                if size > MAX_MOOV_SIZE:
+                    raise ValueError("moov_too_large")
+                self.moov = self.reader.read_at(position, size)
+                if len(self.moov) < size:
+                    raise ValueError("truncated_moov")
+                break
+            # mdat and everything else is skipped without reading it
+            position = box_end
+
+        if self.moov is None:
+            raise ValueError("moov_not_found")
+
+        _, moov_start, moov_end = _read_box_header(self.moov, 0, len(self.moov))
+        order = 0
+        for box_type, trak_start, trak_end in _iter_boxes(self.moov, moov_start, moov_end):
+            if box_type != b"trak":
+                continue
+            self.tracks.append(_parse_trak(self.moov, trak_start, trak_end, order))
+            order += 1
+
+    def _top_level_header(self, header, position):
+        if len(header) < 8:
+            raise ValueError("truncated_box")
+        size, box_type = struct.unpack_from(">I4s", header, 0)
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                raise ValueError("truncated_box")
+            size = struct.unpack_from(">Q", header, 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = self.file_size - position
+        if size < header_size:
+            raise ValueError("invalid_box_size")
+        return box_type, position + header_size, position + size
+
+    def read_samples(self, samples, cancel_event=None):
+        """
+        Read sample payloads, merging samples that are stored back to back
+        (one tx3g chunk) into a single read. Stops before the next read once
+        cancel_event is set.
+        """
+        payloads = []
+        index = 0
+        while index < len(samples):
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            run_start = samples[index][0]
+            run_end = run_start + samples[index][1]
+            last = index
+            while last + 1 < len(samples) and samples[last + 1][0] == run_end:
+                last += 1
+                run_end += samples[last][1]
+
+            data = self.reader.read_at(run_start, run_end - run_start)
+            if len(data) < run_end - run_start:
+                raise ValueError("truncated_sample")
+            for sample_index in range(index, last + 1):
+                offset = samples[sample_index][0] - run_start
+                payloads.append(data[offset:offset + samples[sample_index][1]])
+            index = last + 1
+        return payloads
+
+
+def _open_mp4(handle):
+    handle.seek(0, os.SEEK_END)
+    file_size = handle.tell()
+    mp4 = _Mp4File(handle, file_size)
+    mp4.open()
+    return mp4
+
+
+def _is_subtitle_track(track):
+    return track["handler_type"] in TEXT_HANDLER_TYPES
+
+
+def probe_subtitle_tracks(path):
+    """
+    List the subtitle tracks of an MP4 file from its moov box alone.
+    track_id matches the ffmpeg/ffprobe stream index.
+    """
+    try:
+        with open(path, "rb", buffering=0) as handle:
+            mp4 = _open_mp4(handle)
+    except (OSError, ValueError, struct.error) as exc:
+        return {"success": False, "reason": "mp4_parse_failed", "error": str(exc)}
+
+    tracks = [
+        {
+            "track_id": track["track_id"],
+            "codec_name": track["codec_name"],
+            "language": track["language"],
+            "name": track["name"],
+        }
+        for track in mp4.tracks
+        if _is_subtitle_track(track)
+    ]
+    return {
+        "success": True,
+        "tracks": tracks,
+        "bytes_read": mp4.reader.bytes_read,
+        "file_size": mp4.file_size,
+    }
+
+
+def _unsupported_track_reason(track):
+    if track is None or not _is_subtitle_track(track):
+        return "mp4_track_not_found"
+    if track["sample_format"] not in TX3G_SAMPLE_FORMATS:
+        return "mp4_codec_unsupported"
+    if track["stbl"][0] is None or not track["timescale"]:
+        return "mp4_sample_table_missing"
+    return None
+
+
+def _collect_cues(samples, payloads, timescale):
+    cues = []
+    for (_, _, sample_time, duration), payload in zip(samples, payloads):
+        text = _decode_tx3g_sample(payload)
+        if not text:
+            continue
+        start_ms = sample_time * 1000 // timescale
+        end_ms = (sample_time + duration) * 1000 // timescale
+        cues.append((start_ms, max(end_ms, start_ms + 1), text))
+    return cues
+
+
+def _write_srt(output_path, cues):
+    with open(output_path, "w", encoding="utf-8", newline="\n") as output:
+        for number, (start_ms, end_ms, text) in enumerate(cues, 1):
+            output.write("{0}\n{1}\n{2}\n\n".format(
+                number,
+                srt_cues.format_timing(start_ms, end_ms),
+                text
+            ))
+
+
+def extract_srt_tracks(path, outputs, cancel_event=None):
+    """
+    Convert several tx3g/mov_text tracks to SRT after reading moov once.
+    outputs maps track_id to an SRT output path; per-track results are
+    returned under "tracks". Only the sample byte ranges listed in each
+    track's sample table are read. Setting cancel_event stops reading and
+    returns "cancelled" without writing any output.
+    """
+    results = {}
+    collected = []
+    try:
+        with open(path, "rb", buffering=0) as handle:
+            mp4 = _open_mp4(handle)
+            tracks_by_id = dict((track["track_id"], track) for track in mp4.tracks)
+
+            for track_id, output_path in outputs.items():
+                track = tracks_by_id.get(str(track_id))
+                reason = _unsupported_track_reason(track)
+                if reason:
+                    results[str(track_id)] = {"success": False, "reason": reason}
+                    continue
+
+                stbl_start, stbl_end = track["stbl"]
+                samples = [
+                    sample
+                    for sample in _build_sample_table(mp4.moov, stbl_start, stbl_end)
+                    if sample[1] > 2
+                ]
+                payloads = mp4.read_samples(samples, cancel_event)
+                if cancel_event is not None and cancel_event.is_set():
+                    return {"success": False, "reason": "cancelled"}
+                collected.append((track, output_path, _collect_cues(samples, payloads, track["timescale"])))
+    except (OSError, ValueError, struct.error) as exc:
+        return {"success": False, "reason": "mp4_parse_failed", "error": str(exc)}
+
+    for track, output_path, cues in collected:
+        if not cues:
+            results[track["track_id"]] = {"success": False, "reason": "mp4_no_subtitle_samples"}
+            continue
+        try:
+            _write_srt(output_path, cues)
+        except OSError as exc:
+            results[track["track_id"]] = {"success": False, "reason": "mp4_write_failed", "error": str(exc)}
+            continue
+        results[track["track_id"]] = {
+            "success": True,
+            "output_path": output_path,
+            "cue_count": len(cues),
+        }
+
+    return {
+        "success": True,
+        "tracks": results,
+        "bytes_read": mp4.reader.bytes_read,
+        "read_calls": mp4.reader.read_calls,
+        "file_size": mp4.file_size,
+    }
+
+
+def extract_srt(path, track_id, output_path):
+    """
+    Convert one tx3g/mov_text track to SRT.
+    """
+    result = extract_srt_tracks(path, {str(track_id): output_path})
+    if not result.get("success"):
+        return result
+
+    track_result = dict(result["tracks"][str(track_id)])
+    if track_result.get("success"):
+        for field in ("bytes_read", "read_calls", "file_size"):
+            track_result[field] = result[field]
+    return track_result
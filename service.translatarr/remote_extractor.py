@@ -1,6 +1,9 @@
 # -*- coding: utf-8 -*-
+import hashlib
 import json
 import os
+import threading
+import time
 
 import xbmc
 import xbmcvfs
@@ -11,6 +14,15 @@ except Exception:
     requests = None
 
 
+CANCEL_POLL_SECONDS = 0.25
+# Each GET /jobs/{id} is held open this long on the server; the HTTP timeout
+# adds JOB_POLL_SLACK_SECONDS on top for network latency.
+JOB_LONG_POLL_SECONDS = 20
+JOB_POLL_SLACK_SECONDS = 10
+JOB_FINAL_STATES = ("completed", "failed", "cancelled")
+JOB_BUSY_RETRY_SECONDS = 5
+
+
 def safe_bool(value):
     if isinstance(value, bool):
         return value
@@ -36,6 +48,23 @@ def is_linux():
     return xbmc.getCondVisibility("System.Platform.Linux")
 
 
+def _local_etag(path):
+    """
+    Return the extractor ETag (quoted SHA-256) of an existing local file, or
+    None when there is no readable file.
+    """
+    if not xbmcvfs.exists(path):
+        return None
+    local_file = xbmcvfs.File(path)
+    try:
+        content = bytes(local_file.readBytes())
+    except Exception:
+        return None
+    finally:
+        local_file.close()
+    return '"{0}"'.format(hashlib.sha256(content).hexdigest())
+
+
 def _safe_filename(name):
     name = os.path.basename(name or "")
     for invalid_char in '<>:"/\\|?*':
@@ -54,10 +83,66 @@ class RemoteExtractorClient(object):
     def is_configured(self):
         return self.enabled and bool(self.base_url) and requests is not None
 
-    def should_prefer_remote(self, local_tools_available):
-        if not self.is_configured():
-            return False
-        return not local_tools_available
+    def _headers(self):
+        headers = {"Content-Type": "application/json"}
+        if self.api_token:
+            headers["Authorization"] = "Bearer {0}".format(self.api_token)
+        return headers
+
+    def _post(self, url, headers, payload, cancel_event=None):
+        return self._send("POST", url, headers, payload=payload, cancel_event=cancel_event)
+
+    def _send(self, method, url, headers, payload=None, params=None, cancel_event=None, timeout=None):
+        """
+        Send the request and return (response, error). With cancel_event the
+        request runs on its own session in a worker thread; setting the event
+        closes the session and returns (None, "cancelled") right away, and
+        whatever the server still sends is dropped.
+        """
+        timeout = timeout or self.timeout
+        data = json.dumps(payload) if payload is not None else None
+        if cancel_event is None:
+            try:
+                return requests.request(
+                    method, url, headers=headers, data=data, params=params, timeout=timeout
+                ), None
+            except Exception as exc:
+                return None, str(exc)
+
+        session = requests.Session()
+        outcome = {}
+        done = threading.Event()
+
+        def send():
+            try:
+                outcome["response"] = session.request(
+                    method, url, headers=headers, data=data, params=params, timeout=timeout
+                )
+            except Exception as exc:
+                outcome["error"] = str(exc)
+            finally:
+                done.set()
+
+        worker = threading.Thread(target=send)
+        worker.daemon = True
+        worker.start()
+        while not done.wait(CANCEL_POLL_SECONDS):
+            if cancel_event.is_set():
+                session.close()
+                self.log_fn("Remote extractor request abandoned: another extractor finished first.")
+                return None, "cancelled"
+
+        session.close()
+        return outcome.get("response"), outcome.get("error")
+
+    def _log_server_timing(self, response, label):
+        """
+        Log the extractor's Server-Timing header: the milliseconds it spent
+        per stage (identity, mkvinfo, mkvextract, ...) and in total.
+        """
+        timing = response.headers.get("Server-Timing")
+        if timing:
+            self.log_fn("Remote extractor {0} timing: {1}".format(label, timing))
 
     def probe_embedded_subtitle(self, video_path, language_name):
         if not self.is_configured():
@@ -72,9 +157,7 @@ class RemoteExtractorClient(object):
             "timeout": self.timeout,
             "prefer_non_sdh": True
         }
-        headers = {"Content-Type": "application/json"}
-        if self.api_token:
-            headers["Authorization"] = "Bearer {0}".format(self.api_token)
+        headers = self._headers()
 
         url = "{0}/probe".format(self.base_url)
         self.log_fn(
@@ -85,15 +168,10 @@ class RemoteExtractorClient(object):
             )
         )
 
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=self.timeout
-            )
-        except Exception as exc:
-            return {"success": False, "reason": "remote_extractor_probe_failed", "error": str(exc)}
+        response, error = self._post(url, headers, payload)
+        if response is None:
+            return {"success": False, "reason": "remote_extractor_probe_failed", "error": error}
+        self._log_server_timing(response, "probe")
 
         try:
             data = response.json()
@@ -123,25 +201,30 @@ class RemoteExtractorClient(object):
             "diagnostic_preview": data.get("diagnostic_preview"),
         }
 
-    def extract_embedded_subtitle(self, video_path, source_lang_name, output_dir, source_lang_iso=None):
-        if not self.is_configured():
-            return {"success": False, "reason": "remote_extractor_not_configured"}
+    def _parse_response(self, response):
+        """
+        Return (data, None) for a 200 JSON response, else (None, failure).
+        """
+        try:
+            data = response.json()
+        except Exception:
+            return None, {
+                "success": False,
+                "reason": "remote_extractor_invalid_json",
+                "status_code": response.status_code
+            }
 
-        if not video_path or not output_dir:
-            return {"success": False, "reason": "remote_extractor_missing_path"}
+        if response.status_code not in (200, 202):
+            return None, {
+                "success": False,
+                "reason": "remote_extractor_http_error",
+                "status_code": response.status_code,
+                "message": data.get("detail") or data.get("message") or "unknown_http_error"
+            }
 
-        payload = {
-            "video_path": video_path,
-            "source_lang": source_lang_name,
-            "timeout": self.timeout,
-            "prefer_non_sdh": True,
-            "allow_ffmpeg_fallback": True,
-            "force_reextract": False
-        }
-        headers = {"Content-Type": "application/json"}
-        if self.api_token:
-            headers["Authorization"] = "Bearer {0}".format(self.api_token)
+        return data, None
 
+    def _extract_blocking(self, payload, headers, video_path, source_lang_name, cancel_event=None):
         url = "{0}/extract".format(self.base_url)
         self.log_fn(
             "Remote extractor request → url: {0} | media: {1} | language: {2}".format(
@@ -151,35 +234,225 @@ class RemoteExtractorClient(object):
             )
         )
 
-        try:
-            response = requests.post(
-                url,
-                headers=headers,
-                data=json.dumps(payload),
-                timeout=self.timeout
+        response, error = self._post(url, headers, payload, cancel_event=cancel_event)
+        if error == "cancelled":
+            return None, {"success": False, "reason": "cancelled"}
+        if response is None:
+            return None, {"success": False, "reason": "remote_extractor_request_failed", "error": error}
+        self._log_server_timing(response, "extract")
+        return self._parse_response(response)
+
+    def _cancel_job(self, job_url, headers):
+        response, error = self._send("DELETE", job_url, headers, timeout=JOB_POLL_SLACK_SECONDS)
+        if response is None:
+            self.log_fn("Remote extractor job could not be cancelled: {0}".format(error))
+
+    def _post_when_not_busy(self, url, headers, payload, deadline, cancel_event=None):
+        """
+        POST payload and, while the extractor answers 503 because its queue
+        is full, send it again after Retry-After until deadline.
+        Returns (response, None) or (None, failure result).
+        """
+        while True:
+            response, error = self._send("POST", url, headers, payload=payload, cancel_event=cancel_event)
+            if error == "cancelled":
+                return None, {"success": False, "reason": "cancelled"}
+            if response is None:
+                return None, {"success": False, "reason": "remote_extractor_request_failed", "error": error}
+            if response.status_code != 503:
+                return response, None
+
+            # The extractor queue is full: come back when it says so
+            retry_after = max(1, safe_int(response.headers.get("Retry-After"), JOB_BUSY_RETRY_SECONDS))
+            if time.time() + retry_after >= deadline:
+                return response, None
+            self.log_fn("Remote extractor busy, retrying in {0}s".format(retry_after))
+            if cancel_event is not None:
+                if cancel_event.wait(retry_after):
+                    return None, {"success": False, "reason": "cancelled"}
+            else:
+                time.sleep(retry_after)
+
+    def _wait_for_job(self, job, headers, deadline, cancel_event=None):
+        """
+        Long-poll a server-side job until it finishes or deadline passes;
+        the job is cancelled on the server when the client gives up.
+        Returns (extract response data, None) or (None, failure result).
+        """
+        job_id = job.get("job_id")
+        job_url = "{0}/jobs/{1}".format(self.base_url, job_id)
+        response = None
+        while job.get("status") not in JOB_FINAL_STATES:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                self._cancel_job(job_url, headers)
+                return None, {
+                    "success": False,
+                    "reason": "remote_extractor_timeout",
+                    "message": "Remote extractor job timed out after {0}s".format(self.timeout)
+                }
+
+            wait = min(JOB_LONG_POLL_SECONDS, max(1, int(remaining)))
+            response, error = self._send(
+                "GET",
+                job_url,
+                headers,
+                params={"wait": wait},
+                cancel_event=cancel_event,
+                timeout=wait + JOB_POLL_SLACK_SECONDS
             )
-        except Exception as exc:
-            return {"success": False, "reason": "remote_extractor_request_failed", "error": str(exc)}
-
-        try:
-            data = response.json()
-        except Exception:
-            return {
+            if error == "cancelled":
+                self._cancel_job(job_url, headers)
+                return None, {"success": False, "reason": "cancelled"}
+            if response is None:
+                return None, {"success": False, "reason": "remote_extractor_request_failed", "error": error}
+
+            job, failure = self._parse_response(response)
+            if failure is not None:
+                return None, failure
+
+            if job.get("status") not in JOB_FINAL_STATES:
+                progress = job.get("progress")
+                self.log_fn(
+                    "Remote extractor job {0}: {1}{2}".format(
+                        job_id,
+                        job.get("stage"),
+                        " {0:.0f}%".format(progress) if progress is not None else ""
+                    )
+                )
+
+        result = job.get("result") or {}
+        self.log_fn(
+            "Remote extractor job {0} {1} after {2}s".format(job_id, job.get("status"), job.get("elapsed"))
+        )
+        if response is not None:
+            self._log_server_timing(response, "job")
+        if job.get("status") != "completed":
+            return None, {
                 "success": False,
-                "reason": "remote_extractor_invalid_json",
-                "status_code": response.status_code
+                "reason": "remote_extractor_job_{0}".format(job.get("status")),
+                "message": result.get("message")
             }
+        return result, None
+
+    def _extract_with_job(self, payload, headers, video_path, source_lang_name, cancel_event=None):
+        """
+        Submit the extraction as a server-side job and long-poll it until it
+        finishes, so no single request stays open for the whole tool run.
+        Falls back to the blocking /extract call on servers without /jobs.
+        Returns (extract response data, None) or (None, failure result).
+        """
+        url = "{0}/jobs".format(self.base_url)
+        self.log_fn(
+            "Remote extractor job → url: {0} | media: {1} | language: {2}".format(
+                url,
+                video_path,
+                source_lang_name
+            )
+        )
+
+        deadline = time.time() + self.timeout
+        response, failure = self._post_when_not_busy(url, headers, payload, deadline, cancel_event)
+        if failure is not None:
+            return None, failure
+
+        if response.status_code in (404, 405):
+            self.log_fn("Remote extractor has no job API, using /extract instead.")
+            return self._extract_blocking(payload, headers, video_path, source_lang_name, cancel_event)
+
+        job, failure = self._parse_response(response)
+        if failure is not None:
+            return None, failure
+        return self._wait_for_job(job, headers, deadline, cancel_event)
+
+    def extract_embedded_subtitle(
+        self,
+        video_path,
+        source_lang_name,
+        output_dir,
+        source_lang_iso=None,
+        cancel_event=None,
+        claim_fn=None
+    ):
+        """
+        Ask the remote extractor for the source subtitle and write it to
+        output_dir. When racing local extraction, cancel_event abandons the
+        request and claim_fn() must return True before the file is written.
+        """
+        if not self.is_configured():
+            return {"success": False, "reason": "remote_extractor_not_configured"}
+
+        if not video_path or not output_dir:
+            return {"success": False, "reason": "remote_extractor_missing_path"}
+
+        payload = {
+            "video_path": video_path,
+            "source_lang": source_lang_name,
+            "timeout": self.timeout,
+            "prefer_non_sdh": True,
+            "allow_ffmpeg_fallback": True,
+            "force_reextract": False,
+            # Fetched from /subtitles instead; older servers ignore this
+            "include_content": False
+        }
+        headers = self._headers()
+
+        data, failure = self._extract_with_job(payload, headers, video_path, source_lang_name, cancel_event)
+        if failure is not None:
+            return failure
+
+        return self._write_extracted_subtitle(
+            data,
+            video_path,
+            source_lang_name,
+            output_dir,
+            source_lang_iso,
+            cancel_event,
+            claim_fn
+        )
 
+    def _download_subtitle(self, subtitle_id, local_etag=None, cancel_event=None):
+        """
+        Fetch a cached subtitle from /subtitles as raw (gzip-compressed) SRT,
+        revalidating the local copy with local_etag as If-None-Match.
+        Returns (bytes, or None when the local copy is current, None) or
+        (None, failure result).
+        """
+        headers = self._headers()
+        if local_etag:
+            headers["If-None-Match"] = local_etag
+
+        url = "{0}/subtitles/{1}".format(self.base_url, subtitle_id)
+        response, error = self._send("GET", url, headers, cancel_event=cancel_event)
+        if error == "cancelled":
+            return None, {"success": False, "reason": "cancelled"}
+        if response is None:
+            return None, {"success": False, "reason": "remote_extractor_request_failed", "error": error}
+        self._log_server_timing(response, "download")
+        if response.status_code == 304:
+            return None, None
         if response.status_code != 200:
-            return {
+            return None, {
                 "success": False,
                 "reason": "remote_extractor_http_error",
                 "status_code": response.status_code,
-                "message": data.get("detail") or data.get("message") or "unknown_http_error"
+                "message": "Subtitle download failed"
             }
-
+        return response.content, None
+
+    def _write_extracted_subtitle(
+        self,
+        data,
+        video_path,
+        source_lang_name,
+        output_dir,
+        source_lang_iso,
+        cancel_event,
+        claim_fn
+    ):
         subtitle_text = data.get("extracted_srt_content", "")
-        if not subtitle_text:
+        subtitle_id = data.get("subtitle_id")
+        if not subtitle_text and not subtitle_id:
             return {
                 "success": False,
                 "reason": "remote_extractor_empty_content",
@@ -187,19 +460,38 @@ class RemoteExtractorClient(object):
                 "cache_hit": data.get("cache_hit", False)
             }
 
-        if not xbmcvfs.exists(output_dir):
-            xbmcvfs.mkdirs(output_dir)
-
         video_stem = os.path.splitext(os.path.basename(video_path))[0]
         lang_suffix = source_lang_iso or source_lang_name or "src"
         output_name = "{0}.{1}.srt".format(_safe_filename(video_stem), lang_suffix)
         output_path = (output_dir.rstrip("/\\") + "/" + output_name).replace("\\", "/")
 
-        subtitle_file = xbmcvfs.File(output_path, "w")
-        try:
-            subtitle_file.write(subtitle_text)
-        finally:
-            subtitle_file.close()
+        if subtitle_text:
+            subtitle_data = subtitle_text
+        else:
+            # subtitle_data stays None when the copy from a previous playback is current
+            local_etag = _local_etag(output_path)
+            subtitle_data = None
+            if not local_etag or local_etag != data.get("etag"):
+                subtitle_data, failure = self._download_subtitle(subtitle_id, local_etag, cancel_event)
+                if failure is not None:
+                    return failure
+            if subtitle_data is not None and not subtitle_data:
+                return {"success": False, "reason": "remote_extractor_empty_content", "method": data.get("method")}
+
+        if claim_fn is not None and not claim_fn():
+            return {"success": False, "reason": "cancelled"}
+
+        if subtitle_data is None:
+            self.log_fn("Remote extractor subtitle unchanged, keeping {0}".format(output_path))
+        else:
+            if not xbmcvfs.exists(output_dir):
+                xbmcvfs.mkdirs(output_dir)
+
+            subtitle_file = xbmcvfs.File(output_path, "w")
+            try:
+                subtitle_file.write(subtitle_data if subtitle_text else bytearray(subtitle_data))
+            finally:
+                subtitle_file.close()
 
         if not xbmcvfs.exists(output_path):
             return {"success": False, "reason": "remote_extractor_write_failed"}
@@ -210,5 +502,108 @@ class RemoteExtractorClient(object):
             "output_path": output_path,
             "method": data.get("method"),
             "cache_hit": data.get("cache_hit", False),
+            "not_modified": subtitle_data is None,
             "selected_track": data.get("selected_track"),
         }
+
+    def resolve_embedded_subtitle(
+        self,
+        video_path,
+        source_lang_name,
+        target_lang_name,
+        output_dir,
+        source_lang_iso=None,
+        cancel_event=None,
+        claim_fn=None
+    ):
+        """
+        Ask the remote extractor in one request whether the target language
+        is already embedded and, if not, to start extracting the source
+        subtitle as a job; the job is long-polled and the subtitle written to
+        output_dir like extract_embedded_subtitle() does.
+        Returns reason "remote_extractor_target_exists" when the target was
+        found and "remote_extractor_no_resolve" on servers without /resolve.
+        """
+        if not self.is_configured():
+            return {"success": False, "reason": "remote_extractor_not_configured"}
+
+        if not video_path or not output_dir or not target_lang_name:
+            return {"success": False, "reason": "remote_extractor_missing_path"}
+
+        payload = {
+            "video_path": video_path,
+            "source_lang": source_lang_name,
+            "target_lang": target_lang_name,
+            "timeout": self.timeout,
+            "prefer_non_sdh": True,
+            "allow_ffmpeg_fallback": True,
+            "force_reextract": False,
+            # Fetched from /subtitles instead; older servers ignore this
+            "include_content": False,
+            # Extract through a job that is long-polled like /jobs
+            "as_job": True
+        }
+        headers = self._headers()
+
+        url = "{0}/resolve".format(self.base_url)
+        self.log_fn(
+            "Remote extractor resolve → url: {0} | media: {1} | source: {2} | target: {3}".format(
+                url,
+                video_path,
+                source_lang_name,
+                target_lang_name
+            )
+        )
+
+        deadline = time.time() + self.timeout
+        response, failure = self._post_when_not_busy(url, headers, payload, deadline, cancel_event)
+        if failure is not None:
+            return failure
+        if response.status_code in (404, 405):
+            return {"success": False, "reason": "remote_extractor_no_resolve"}
+        self._log_server_timing(response, "resolve")
+
+        data, failure = self._parse_response(response)
+        if failure is not None:
+            return failure
+
+        if data.get("target_found"):
+            return {
+                "success": True,
+                "found": True,
+                "reason": "remote_extractor_target_exists",
+                "selected_track": data.get("target_track"),
+                "all_tracks": data.get("all_tracks", []),
+            }
+
+        if data.get("job_id"):
+            self.log_fn("Remote extractor resolve started job {0}".format(data["job_id"]))
+            extraction, failure = self._wait_for_job(
+                {"job_id": data["job_id"], "status": "queued"},
+                headers,
+                deadline,
+                cancel_event
+            )
+            if failure is not None:
+                failure["all_tracks"] = data.get("all_tracks", [])
+                return failure
+        else:
+            # Servers without resolve jobs extract inline
+            extraction = data.get("extraction") or {}
+            if not data.get("ok") or not extraction.get("ok"):
+                return {
+                    "success": False,
+                    "reason": "remote_extractor_resolve_failed",
+                    "message": data.get("message"),
+                    "all_tracks": data.get("all_tracks", []),
+                }
+
+        return self._write_extracted_subtitle(
+            extraction,
+            video_path,
+            source_lang_name,
+            output_dir,
+            source_lang_iso,
+            cancel_event,
+            claim_fn
+        )
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import re
+
+
+MUSIC_NOTE_CHARS = u"\u266a\u266b\u266c\u2669"
+MUSIC_NOTE_TABLE = {ord(ch): None for ch in MUSIC_NOTE_CHARS}
+MUSIC_NOTE_TUPLE = tuple(MUSIC_NOTE_CHARS)
+MAX_CUE_FRAGMENT_LENGTH = 80
+LINE_SEPARATOR = ' [BR] '
+
+WORD_RE = re.compile(r"[A-Za-z0-9']+")
+SPEAKER_LABEL_RE = re.compile(r"^\s*[A-Z][A-Z0-9 .'\-]{1,24}:\s+(.+)$")
+BRACKET_PAIRS = {"[": "]", "(": ")"}
+
+
+def _looks_like_spoken_dialogue_fragment(fragment):
+    # Brackets at the ends and whitespace runs never change the outcome of
+    # these checks, so the fragment does not need to be normalized first.
+    words = WORD_RE.findall(fragment)
+    if not words:
+        return False
+
+    if '"' in fragment or '?' in fragment or '!' in fragment:
+        return True
+
+    if "..." in fragment or "\u2026" in fragment:
+        return False
+
+    if "," in fragment or ";" in fragment:
+        return True
+
+    if "." in fragment and len(words) <= 2:
+        return True
+
+    return False
+
+
+def _leading_cue_end(text):
+    """
+    Return the index just past a bracketed cue that starts text, or -1.
+    The cue may not contain its own bracket type and holds 1-80 characters.
+    """
+    if not text:
+        return -1
+    opener = text[0]
+    closer = BRACKET_PAIRS.get(opener)
+    if closer is None:
+        return -1
+
+    limit = min(len(text), MAX_CUE_FRAGMENT_LENGTH + 2)
+    for position in range(1, limit):
+        ch = text[position]
+        if ch == closer:
+            return position + 1 if position > 1 else -1
+        if ch == opener:
+            return -1
+    return -1
+
+
+def _trailing_cue_start(text):
+    """
+    Return the index where a bracketed cue that ends text starts, or -1.
+    """
+    if not text:
+        return -1
+    closer = text[-1]
+    if closer == "]":
+        opener = "["
+    elif closer == ")":
+        opener = "("
+    else:
+        return -1
+
+    last = len(text) - 1
+    lowest = max(0, last - MAX_CUE_FRAGMENT_LENGTH - 1)
+    for position in range(last - 1, lowest - 1, -1):
+        ch = text[position]
+        if ch == opener:
+            return position if position < last - 1 else -1
+        if ch == closer:
+            return -1
+    return -1
+
+
+def _clean_sdh_hi_line(line):
+    stripped = line.strip()
+    if not stripped:
+        return ""
+
+    no_music = stripped.translate(MUSIC_NOTE_TABLE).strip()
+    if stripped != no_music:
+        if not no_music:
+            return ""
+        if stripped.startswith(MUSIC_NOTE_TUPLE) or stripped.endswith(MUSIC_NOTE_TUPLE):
+            return ""
+
+    working = stripped
+    while True:
+        end = _leading_cue_end(working)
+        if end < 0:
+            break
+        if _looks_like_spoken_dialogue_fragment(working[:end]):
+            break
+        working = working[end:].lstrip()
+
+    while True:
+        start = _trailing_cue_start(working)
+        if start < 0:
+            break
+        if _looks_like_spoken_dialogue_fragment(working[start:]):
+            break
+        working = working[:start].rstrip()
+
+    speaker_match = SPEAKER_LABEL_RE.match(working)
+    if speaker_match:
+        working = speaker_match.group(1).strip()
+
+    return working.strip()
+
+
+def clean_sdh_hi_text(text, line_cache=None):
+    """
+    Conservatively remove high-confidence SDH/HI cues while preserving dialogue.
+    Returns None when the entry is cue-only and should be skipped.
+    """
+    cleaned_lines = []
+
+    for line in text.split(LINE_SEPARATOR):
+        if line_cache is None:
+            cleaned = _clean_sdh_hi_line(line)
+        else:
+            cleaned = line_cache.get(line)
+            if cleaned is None:
+                cleaned = _clean_sdh_hi_line(line)
+                line_cache[line] = cleaned
+        if cleaned:
+            cleaned_lines.append(cleaned)
+
+    if not cleaned_lines:
+        return None
+
+    return LINE_SEPARATOR.join(cleaned_lines)
+
+
+def clean_sdh_hi_texts(texts):
+    """
+    Clean every cue of a subtitle in one pass.
+    Repeated lines such as "[MUSIC PLAYING]" are only analysed once.
+    """
+    line_cache = {}
+    return [clean_sdh_hi_text(text, line_cache) for text in texts]
@@ -9,9 +9,13 @@ import math
 import sys
 import re
 import json
+import hashlib
 
 import embedded_subtitles
+import extraction_race
 import remote_extractor
+import srt_cues
+import translation_memory
 import translator
 import file_manager
 import ui
@@ -33,6 +37,35 @@ KODI_TEMP_SUB_FOLDER = xbmcvfs.translatePath(
     "special://temp/"
 )
 
+# Local staging for partial and temp output when the subtitle folder is on a network share.
+# Kept out of special://temp/ so auto mode never picks staged files up as sources.
+TRANSLATARR_STAGING_FOLDER = xbmcvfs.translatePath(
+    "special://profile/addon_data/service.translatarr/staging/"
+)
+
+# Recently translated cue texts, reused when a re-synced release of the same subtitle arrives
+TRANSLATION_MEMORY_FOLDER = xbmcvfs.translatePath(
+    "special://profile/addon_data/service.translatarr/translation_memory/"
+)
+
+# Embedded subtitle track lists per media file, keyed by path, size and mtime
+EMBEDDED_PROBE_CACHE_FOLDER = xbmcvfs.translatePath(
+    "special://profile/addon_data/service.translatarr/probe_cache/"
+)
+
+# Embedded subtitle tracks already extracted from a media file, one SRT per track
+EXTRACTED_TRACK_CACHE_FOLDER = xbmcvfs.translatePath(
+    "special://profile/addon_data/service.translatarr/extracted_tracks/"
+)
+
+# Moving average of how long local and remote embedded extraction take
+EXTRACTION_LATENCY_FILE = xbmcvfs.translatePath(
+    "special://profile/addon_data/service.translatarr/extraction_latency.json"
+)
+
+# Seconds a streamed source waits to fill a chunk before translating what has arrived
+STREAM_BATCH_WAIT_SECONDS = 10
+
 if not xbmcvfs.exists(TRANSLATARR_SUB_FOLDER):
     xbmcvfs.mkdir(TRANSLATARR_SUB_FOLDER)
 
@@ -185,42 +218,58 @@ def _platform_name():
     return "Other"
 
 
-def _tool_exists(tool_name, folder_path=None):
-    if folder_path:
-        candidate_names = [tool_name]
-        if os.name == "nt" and not tool_name.lower().endswith(".exe"):
-            candidate_names.insert(0, tool_name + ".exe")
-        for candidate_name in candidate_names:
-            candidate_path = os.path.join(folder_path, candidate_name)
-            if os.path.exists(candidate_path):
-                return True
-
-    path_value = os.environ.get("PATH", "")
-    for search_dir in path_value.split(os.pathsep):
-        if not search_dir:
-            continue
-        candidate_path = os.path.join(search_dir, tool_name)
-        if os.path.exists(candidate_path):
-            return True
-        if os.name == "nt":
-            candidate_exe = candidate_path + ".exe"
-            if os.path.exists(candidate_exe):
-                return True
+def get_staged_subtitle_path(save_path):
+    """
+    Local staging path for a subtitle whose folder is on a network share.
+    Each destination gets its own folder, keyed by a hash of the full path,
+    so the file name Kodi shows and matches languages on stays the same.
+    """
+    digest = hashlib.sha1(save_path.encode("utf-8")).hexdigest()[:16]
+    staging_folder = vfs_join(TRANSLATARR_STAGING_FOLDER, digest) + "/"
+    if not xbmcvfs.exists(staging_folder):
+        xbmcvfs.mkdirs(staging_folder)
+    return vfs_join(staging_folder, os.path.basename(save_path))
+
+def publish_staged_subtitle(staged_path, save_path, monitor):
+    """
+    Copy a finished, locally staged subtitle to its network destination.
+    """
+    started = time.time()
+    if xbmcvfs.copy(staged_path, save_path):
+        log(f"Copied staged subtitle to {save_path} in {time.time() - started:.2f}s", "debug", monitor)
+        return True
+    log(f"Failed to copy staged subtitle to network folder: {save_path}", "error", monitor)
     return False
 
-
-def _local_embedded_tools_available(media_path, mkvtoolnix_folder=None, ffmpeg_folder=None):
-    extension = os.path.splitext(media_path or "")[1].lower()
-    if extension == ".mkv":
-        return _tool_exists("mkvinfo", mkvtoolnix_folder) and _tool_exists("mkvextract", mkvtoolnix_folder)
-    if extension == ".mp4":
-        return _tool_exists("ffmpeg", ffmpeg_folder) and _tool_exists("ffprobe", ffmpeg_folder)
-    return False
+def discard_staged_subtitle(staged_path):
+    for path in (staged_path + ".tmp", staged_path):
+        if xbmcvfs.exists(path):
+            xbmcvfs.delete(path)
+    xbmcvfs.rmdir(os.path.dirname(staged_path))
+
+def _local_embedded_tools_available(media_path):
+    # Text subtitle tracks in MKV and MP4 are read by the built-in demuxers;
+    # MKVToolNix/ffmpeg are only a fallback for other codecs. What local
+    # extraction does need is a file path the OS can open.
+    return embedded_subtitles.is_locally_extractable(media_path)
     
 # ----------------------------------------------------------
 # Subtitle Processing with TEMP FILES
 # ----------------------------------------------------------
-def process_subtitles(original_path, monitor, force_retranslate=False, save_path=None, show_source_immediately=True):
+def process_subtitles(
+    original_path,
+    monitor,
+    force_retranslate=False,
+    save_path=None,
+    show_source_immediately=True,
+    cue_stream=None
+):
+    """
+    Translate original_path into save_path.
+    With cue_stream (an embedded_subtitles.EmbeddedSubtitleStream that will
+    write original_path when it finishes), cues are translated as they are
+    extracted instead of after the whole source file exists.
+    """
     log(f"process_subtitles called with: {original_path}, force_retranslate={force_retranslate}", "debug", monitor)
 
     try:
@@ -248,7 +297,6 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
 
         target_display_name = os.path.basename(save_path)
 
-        temp_path = save_path + ".tmp"
         initial_source_mtime = 0
         initial_source_size = 0
 
@@ -258,6 +306,15 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
             monitor.load_subtitle_if_new(save_path)
             return True
 
+        # Keep partial and temp writes off the network; only the final file is copied there
+        staged_save_path = None
+        if is_vfs_network_path(save_path):
+            staged_save_path = get_staged_subtitle_path(save_path)
+            log(f"Network subtitle folder detected. Staging output locally: {staged_save_path}", "debug", monitor)
+
+        output_path = staged_save_path or save_path
+        temp_path = output_path + ".tmp"
+
         initial_chunk = max(10, min(int(monitor.chunk_size or 100), 150))
         model_name = translator.get_model_string()
 
@@ -266,70 +323,108 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
             # Use a slightly cleaner title for the UI
             progress = ui.TranslationProgress(model_name=model_name, title=video_name[:30] + "...")
             
-            # Read source - xbmcvfs is essential for special:// and plugin://
-            # Wait briefly for subtitle to finish writing
-            try:
-                stat1 = xbmcvfs.Stat(original_path).st_size()
-                time.sleep(0.25)
-                stat2 = xbmcvfs.Stat(original_path).st_size()
+            def playback_interrupted():
+                return (
+                    xbmc.Player().getPlayingFile() != session_playing_file
+                    or progress.is_canceled()
+                    or not xbmc.Player().isPlayingVideo()
+                )
 
-                if stat1 != stat2:
-                    log("Subtitle still being written. Skipping this poll.", "debug", monitor)
+            if cue_stream is not None:
+                timestamps = srt_cues.CueTimings()
+                texts = []
+                while not cue_stream.finished and not cue_stream.wait_for_cues(1.0):
+                    if playback_interrupted():
+                        log("Playback stopped or user canceled while waiting for streamed cues.", "debug", monitor)
+                        return False
+                for cue in cue_stream.take_cues():
+                    timestamps.append(cue.index, cue.start_ms, cue.end_ms)
+                    texts.append(cue.text)
+                if not timestamps:
+                    log(
+                        "Embedded subtitle stream produced no cues: {0}".format(cue_stream.error_reason or "unknown"),
+                        "error",
+                        monitor
+                    )
                     return False
-            except Exception:
-                pass
-
-            try:
-                initial_stat = xbmcvfs.Stat(original_path)
-                initial_source_mtime = initial_stat.st_mtime()
-                initial_source_size = initial_stat.st_size()
-            except Exception:
-                pass
+            else:
+                # Read source - xbmcvfs is essential for special:// and plugin://
+                # Wait briefly for subtitle to finish writing
+                try:
+                    stat1 = xbmcvfs.Stat(original_path).st_size()
+                    time.sleep(0.25)
+                    stat2 = xbmcvfs.Stat(original_path).st_size()
 
-            with xbmcvfs.File(original_path, 'r') as f:
-                content = f.read()
+                    if stat1 != stat2:
+                        log("Subtitle still being written. Skipping this poll.", "debug", monitor)
+                        return False
+                except Exception:
+                    pass
 
-            if not content:
-                log("Source SRT is empty.", "debug", monitor)
-                return False
+                try:
+                    initial_stat = xbmcvfs.Stat(original_path)
+                    initial_source_mtime = initial_stat.st_mtime()
+                    initial_source_size = initial_stat.st_size()
+                except Exception:
+                    pass
 
-            timestamps, texts = file_manager.parse_srt(content)
-            if not timestamps:
-                log("Invalid SRT format.", "error", monitor)
-                return False
+                timestamps, texts = file_manager.read_srt(original_path)
+                if not timestamps:
+                    log("Source SRT is empty or has an invalid format.", "error", monitor)
+                    return False
 
-            cleaned_texts = []
-            work_items = []
-            for idx, text in enumerate(texts):
-                if monitor.remove_sdh_hi_cues:
-                    cleaned = file_manager.clean_sdh_hi_text(text)
-                    cleaned_texts.append(cleaned)
-                    if cleaned is not None:
-                        work_items.append((idx, cleaned))
-                else:
-                    cleaned_texts.append(text)
-                    work_items.append((idx, text))
+            if monitor.remove_sdh_hi_cues:
+                cleaned_texts = file_manager.clean_sdh_hi_texts(texts)
+            else:
+                cleaned_texts = list(texts)
+            work_items = [
+                (idx, cleaned)
+                for idx, cleaned in enumerate(cleaned_texts)
+                if cleaned is not None
+            ]
 
             display_source_texts = list(cleaned_texts) if monitor.dual_language_display else None
 
             total_lines = len(texts)
             total_translatable = len(work_items)
             removed_line_count = total_lines - total_translatable if monitor.remove_sdh_hi_cues else 0
-            if total_translatable == 0:
+            if total_translatable == 0 and cue_stream is None:
                 log("No translatable dialogue remained after SDH/HI cue removal.", "debug", monitor)
                 return False
-             
+
+            all_translated = [None] * total_lines
+            for idx, cleaned in enumerate(cleaned_texts):
+                if cleaned is None:
+                    all_translated[idx] = ""
+
+            # Reuse translations from a differently timed release of the same subtitle
+            memory_key = translation_memory.build_memory_key(
+                monitor.source_lang_iso,
+                monitor.target_lang_iso,
+                model_name,
+                ADDON.getSetting('translation_style')
+            )
+            # A streamed source is incomplete, so it cannot be aligned with remembered releases yet
+            reused_translations = {}
+            if cue_stream is None:
+                reused_translations = translation_memory.find_reusable_translations(
+                    TRANSLATION_MEMORY_FOLDER,
+                    memory_key,
+                    cleaned_texts,
+                    log_fn=lambda message, level="debug": log(message, level, monitor)
+                )
+            if reused_translations:
+                for line_index, translated_line in reused_translations.items():
+                    all_translated[line_index] = translated_line
+                work_items = [item for item in work_items if item[0] not in reused_translations]
+                total_translatable = len(work_items)
+
             total_chunks_est = math.ceil(total_translatable / initial_chunk)
             log(
-                f"Total lines: {total_lines}, translatable lines: {total_translatable}, removed by SDH/HI cleanup: {removed_line_count}, estimated chunks: {total_chunks_est}",
+                f"Total lines: {total_lines}, translatable lines: {total_translatable}, reused from memory: {len(reused_translations)}, removed by SDH/HI cleanup: {removed_line_count}, estimated chunks: {total_chunks_est}",
                 "debug",
                 monitor
             )
-     
-            all_translated = [None] * total_lines
-            for idx, cleaned in enumerate(cleaned_texts):
-                if cleaned is None:
-                    all_translated[idx] = ""
             cum_in = 0
             cum_out = 0
             idx = 0
@@ -338,6 +433,13 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
             min_chunk = 5
     
             monitor.live_reload_index = 0
+            live_prefix_count = 0
+            srt_writer = file_manager.IncrementalSrtWriter(
+                temp_path,
+                timestamps,
+                source_texts=display_source_texts,
+                dual_language=monitor.dual_language_display
+            )
     
             # Immediately display new subtitle mid-playback if it's a fresh source
             if show_source_immediately and xbmcvfs.exists(original_path):
@@ -347,7 +449,74 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
                 except Exception as e:
                     log(f"Failed to instantly display source subtitle: {e}", "error", monitor)
     
-            while idx < total_translatable:
+            def absorb_streamed_cues():
+                nonlocal total_lines, total_translatable, total_chunks_est
+                new_cues = cue_stream.take_cues()
+                if not new_cues:
+                    return
+
+                new_texts = [cue.text for cue in new_cues]
+                if monitor.remove_sdh_hi_cues:
+                    new_cleaned = file_manager.clean_sdh_hi_texts(new_texts)
+                else:
+                    new_cleaned = list(new_texts)
+
+                for cue, cleaned in zip(new_cues, new_cleaned):
+                    line_index = len(texts)
+                    timestamps.append(cue.index, cue.start_ms, cue.end_ms)
+                    texts.append(cue.text)
+                    cleaned_texts.append(cleaned)
+                    if display_source_texts is not None:
+                        display_source_texts.append(cleaned)
+                    if cleaned is None:
+                        all_translated.append("")
+                    else:
+                        all_translated.append(None)
+                        work_items.append((line_index, cleaned))
+
+                total_lines = len(texts)
+                total_translatable = len(work_items)
+                total_chunks_est = math.ceil(total_translatable / initial_chunk)
+
+            def wait_for_streamed_cues():
+                # Translate once a full chunk is buffered, or whatever arrived after a short wait
+                wait_started = time.time()
+                while not cue_stream.finished:
+                    absorb_streamed_cues()
+                    pending_count = total_translatable - idx
+                    if pending_count >= initial_chunk:
+                        break
+                    if pending_count and time.time() - wait_started >= STREAM_BATCH_WAIT_SECONDS:
+                        break
+                    if playback_interrupted():
+                        return False
+                    cue_stream.wait_for_cues(1.0)
+                absorb_streamed_cues()
+                return True
+
+            def has_pending_work():
+                if cue_stream is None:
+                    return idx < total_translatable
+                # Read finished first: cues pushed before it was set are absorbed below
+                stream_finished = cue_stream.finished
+                absorb_streamed_cues()
+                return idx < total_translatable or not stream_finished
+
+            while has_pending_work():
+                if cue_stream is not None:
+                    if not wait_for_streamed_cues():
+                        log("Playback stopped or user canceled while waiting for streamed cues.", "debug", monitor)
+                        return False
+                    if cue_stream.finished and cue_stream.error_reason:
+                        log(
+                            "Embedded subtitle stream failed during translation: {0}".format(cue_stream.error_reason),
+                            "error",
+                            monitor
+                        )
+                        return False
+                    if idx >= total_translatable:
+                        continue
+
                 if xbmc.Player().getPlayingFile() != session_playing_file:
                     log("Playback target changed during translation. Aborting current job.", "debug", monitor)
                     return False
@@ -394,6 +563,8 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
                         completed_chunks += 1
                         success = True
                         percent = int((idx / total_translatable) * 100)
+                        if cue_stream is not None and not cue_stream.finished:
+                            percent = min(percent, 99)
                         log(f"Chunk translated. Progress: {percent}%", "debug", monitor)
                         progress.update(
                             percent,
@@ -406,26 +577,20 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
                         )
      
                         # Live translation progressive reload
-                        percent_done = int((idx / total_translatable) * 100)
+                        percent_done = percent
                         if (monitor.live_reload_index < len(monitor.live_reload_points) and
                             percent_done >= monitor.live_reload_points[monitor.live_reload_index]):
+                            while (monitor.live_reload_index < len(monitor.live_reload_points) and
+                                   percent_done >= monitor.live_reload_points[monitor.live_reload_index]):
+                                monitor.live_reload_index += 1
                             try:
-                                prefix_count = 0
-                                while prefix_count < total_lines and all_translated[prefix_count] is not None:
-                                    prefix_count += 1
-                                log(f"Live mode: writing partial SRT at {percent_done}%", "debug", monitor)
-                                if prefix_count:
-                                    file_manager.write_srt(
-                                        temp_path,
-                                        timestamps[:prefix_count],
-                                        all_translated[:prefix_count],
-                                        source_texts=display_source_texts[:prefix_count] if display_source_texts else None,
-                                        dual_language=monitor.dual_language_display
-                                    )
+                                while live_prefix_count < total_lines and all_translated[live_prefix_count] is not None:
+                                    live_prefix_count += 1
+                                log(f"Live mode: appending partial SRT at {percent_done}% ({live_prefix_count} cues)", "debug", monitor)
+                                if live_prefix_count and srt_writer.write_through(all_translated, live_prefix_count):
                                     monitor.load_subtitle_if_new(temp_path)
                             except Exception as e:
                                 log(f"Live write failed: {e}", "error", monitor)
-                            monitor.live_reload_index += 1
     
                     else:
                         retries += 1
@@ -438,24 +603,40 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
                     log("Aborting translation: all retries failed.", "error", monitor)
                     return False
      
+            if cue_stream is not None and (cue_stream.error_reason or not total_translatable):
+                log(
+                    "Embedded subtitle stream ended without translatable dialogue: {0}".format(
+                        cue_stream.error_reason or "all cues removed by SDH/HI cleanup"
+                    ),
+                    "debug",
+                    monitor
+                )
+                return False
+
             if any(line is None for line in all_translated):
                 log("Translated subtitle assembly incomplete after chunk processing.", "error", monitor)
                 return False
 
             log("Writing translated SRT TEMP file.", "debug", monitor)
-            file_manager.write_srt(
-                temp_path,
-                timestamps,
-                all_translated,
-                source_texts=display_source_texts,
-                dual_language=monitor.dual_language_display
-            )
+            srt_writer.write_through(all_translated, total_lines)
     
-            if xbmcvfs.exists(save_path):
-                xbmcvfs.delete(save_path)
+            if xbmcvfs.exists(output_path):
+                xbmcvfs.delete(output_path)
             
             # Rename is safer than delete+write for file locks
-            if xbmcvfs.rename(temp_path, save_path):
+            if xbmcvfs.rename(temp_path, output_path):
+                # Remembered before publishing so a retry after a failed copy reuses the translation
+                translation_memory.remember_translations(
+                    TRANSLATION_MEMORY_FOLDER,
+                    memory_key,
+                    os.path.basename(original_path),
+                    cleaned_texts,
+                    all_translated,
+                    log_fn=lambda message, level="debug": log(message, level, monitor)
+                )
+                if staged_save_path and not publish_staged_subtitle(staged_save_path, save_path, monitor):
+                    ui.notify("Failed to copy the translated subtitle to the network folder.", title="Translatarr Error")
+                    return False
                 log(f"Successfully saved: {save_path}", "debug", monitor)
                 monitor.load_subtitle_if_new(save_path)
                 total_time = time.time() - start_time
@@ -490,6 +671,10 @@ def process_subtitles(original_path, monitor, force_retranslate=False, save_path
                 return False 
             
         finally:
+            if cue_stream is not None and not cue_stream.finished:
+                cue_stream.cancel()
+            if staged_save_path:
+                discard_staged_subtitle(staged_save_path)
             if progress:
                 progress.close()
             
@@ -715,6 +900,8 @@ class TranslatarrMonitor(xbmc.Monitor):
         self.dual_language_display = safe_bool('dual_language_display', False)
         self.enable_embedded_subtitle_extraction = safe_bool('enable_embedded_subtitle_extraction', False)
         self.force_embedded_source_extraction = safe_bool('force_embedded_source_extraction', False)
+        self.stream_embedded_extraction = safe_bool('stream_embedded_extraction', True)
+        self.race_embedded_extraction = safe_bool('race_embedded_extraction', False)
         self.remote_extractor_enabled = safe_bool('remote_extractor_enabled', False)
     
         # ------------------------------------------------------------
@@ -742,6 +929,18 @@ class TranslatarrMonitor(xbmc.Monitor):
             log_fn=lambda message, level="debug": log(message, level, self)
         )
         self.platform_name = _platform_name()
+        embedded_subtitles.EXTRACTION_SCHEDULER.configure(
+            max_jobs=safe_int('max_extraction_jobs', 1),
+            background_nice=safe_int('background_extraction_nice', 10),
+            background_idle_io=safe_bool('background_extraction_idle_io', True),
+            log_fn=lambda message, level="debug": log(message, level, self)
+        )
+        self.tool_registry = embedded_subtitles.ToolRegistry(
+            mkvinfo_path=self.mkvtoolnix_folder or self.mkvinfo_path or None,
+            mkvextract_path=self.mkvtoolnix_folder or self.mkvextract_path or None,
+            ffmpeg_path=self.ffmpeg_folder or self.ffmpeg_path or None,
+            log_fn=lambda message, level="debug": log(message, level, self)
+        )
         self.provider = addon.getSetting('provider')
         
         # ------------------------------------------------------------
@@ -780,7 +979,8 @@ class TranslatarrMonitor(xbmc.Monitor):
         # Live translation runtime state handling
         # Prevent stale values when feature is disabled
         # ------------------------------------------------------------
-        self.live_reload_points = [5, 15, 35, 60, 85]
+        # Partial reloads only append new cues, so they can be frequent
+        self.live_reload_points = list(range(5, 100, 5))
         self.live_reload_index = 0
         if self.service_enabled:
             log("Translation service is enabled.", "debug", self)
@@ -843,6 +1043,8 @@ class TranslatarrMonitor(xbmc.Monitor):
             settings_snapshot += f", subtitle_folder={self.sub_folder}"
             settings_snapshot += f", embedded_extract={self.enable_embedded_subtitle_extraction}"
             settings_snapshot += f", force_embedded_extract={self.force_embedded_source_extraction}"
+            settings_snapshot += f", stream_embedded_extract={self.stream_embedded_extraction}"
+            settings_snapshot += f", race_embedded_extract={self.race_embedded_extraction}"
             settings_snapshot += f", mkvtoolnix_folder={self.mkvtoolnix_folder or 'PATH'}"
             settings_snapshot += f", ffmpeg_folder={self.ffmpeg_folder or 'PATH'}"
             settings_snapshot += f", remote_extractor={self.remote_extractor_enabled}"
@@ -853,6 +1055,8 @@ class TranslatarrMonitor(xbmc.Monitor):
             settings_snapshot += f", remote_extractor_timeout={self.remote_extractor_timeout}"
 
         log(settings_snapshot, "debug", self, force=True)
+        if self.enable_embedded_subtitle_extraction:
+            log(f"Embedded extraction tools: {self.tool_registry.describe()}", "debug", self)
 
         if previous_service_enabled and not self.service_enabled:
             self.reset_playback_state()
@@ -875,7 +1079,7 @@ class TranslatarrMonitor(xbmc.Monitor):
         self.logged_stale_manual_source_paths = set()
         self.logged_auto_temp_skip_paths = set()
 
-    def handle_embedded_subtitle_fallback(self, media_path, output_dir, mode_label):
+    def handle_embedded_subtitle_fallback(self, media_path, output_dir, mode_label, save_path=None):
         if not self.enable_embedded_subtitle_extraction and not self.remote_extractor_enabled:
             return "disabled"
 
@@ -909,11 +1113,7 @@ class TranslatarrMonitor(xbmc.Monitor):
                 self.last_embedded_unavailable_notify_key = attempt_key
             return "unavailable"
 
-        local_tools_available = _local_embedded_tools_available(
-            resolved_media_path,
-            self.mkvtoolnix_folder or None,
-            self.ffmpeg_folder or None
-        )
+        local_tools_available = _local_embedded_tools_available(resolved_media_path)
         local_extraction_enabled = self.enable_embedded_subtitle_extraction
         local_extraction_ready = local_extraction_enabled and local_tools_available
         remote_configured = self.remote_extractor_client.is_configured()
@@ -921,12 +1121,78 @@ class TranslatarrMonitor(xbmc.Monitor):
         tool_kwargs = {
             "media_path": resolved_media_path,
             "output_dir": resolved_output_dir,
-            "mkvinfo_path": self.mkvtoolnix_folder or self.mkvinfo_path or None,
-            "mkvextract_path": self.mkvtoolnix_folder or self.mkvextract_path or None,
-            "ffmpeg_path": self.ffmpeg_folder or self.ffmpeg_path or None,
+            "tools": self.tool_registry,
+            "probe_cache_dir": EMBEDDED_PROBE_CACHE_FOLDER,
             "log_fn": lambda message, level="debug": log(message, level, self),
         }
 
+        def record_attempt(route, started, result):
+            if result.get("reason") == "cancelled":
+                return
+            extraction_race.record_route_latency(
+                EXTRACTION_LATENCY_FILE,
+                route,
+                time.time() - started,
+                bool(result.get("success")),
+                log_fn=tool_kwargs["log_fn"]
+            )
+
+        def extract_local(cancel_event=None, claim_fn=None):
+            # Shared with any identical extraction already queued by the other mode.
+            # A race's claim_fn only answers for that race, so its job is never shared.
+            job_key = ("extract", resolved_media_path, resolved_output_dir, self.source_lang_iso, claim_fn)
+            job_kwargs = dict(
+                tool_kwargs,
+                source_lang_iso=self.source_lang_iso,
+                source_lang_name=self.source_lang_name,
+                source_variants=get_iso_variants(self.source_lang_name),
+                track_cache_dir=EXTRACTED_TRACK_CACHE_FOLDER,
+                prefetch_languages=[(self.target_lang_name, get_iso_variants(self.target_lang_name))],
+                claim_fn=claim_fn
+            )
+            started = time.time()
+            result = embedded_subtitles.EXTRACTION_SCHEDULER.run(
+                job_key,
+                embedded_subtitles.PRIORITY_PLAYBACK,
+                lambda job_cancel_event: embedded_subtitles.try_extract_embedded_subtitle(
+                    cancel_event=job_cancel_event,
+                    **job_kwargs
+                ),
+                cancel_event=cancel_event
+            )
+            record_attempt("local", started, result)
+            return result
+
+        def schedule_target_track_prefetch():
+            prefetch_languages = [(self.target_lang_name, get_iso_variants(self.target_lang_name))]
+            tools = self.tool_registry
+            embedded_subtitles.EXTRACTION_SCHEDULER.submit(
+                ("prefetch", resolved_media_path, self.target_lang_iso),
+                embedded_subtitles.PRIORITY_PREFETCH,
+                lambda cancel_event: embedded_subtitles.prefetch_embedded_tracks(
+                    resolved_media_path,
+                    prefetch_languages,
+                    EXTRACTED_TRACK_CACHE_FOLDER,
+                    probe_cache_dir=EMBEDDED_PROBE_CACHE_FOLDER,
+                    tools=tools,
+                    log_fn=tool_kwargs["log_fn"],
+                    cancel_event=cancel_event
+                )
+            )
+
+        def extract_remote(cancel_event=None, claim_fn=None):
+            started = time.time()
+            result = self.remote_extractor_client.extract_embedded_subtitle(
+                resolved_media_path,
+                self.source_lang_name,
+                resolved_output_dir,
+                source_lang_iso=self.source_lang_iso,
+                cancel_event=cancel_event,
+                claim_fn=claim_fn
+            )
+            record_attempt("remote", started, result)
+            return result
+
         def notify_extraction_result(scope_label, success, reason=None):
             if not self.use_notifications:
                 return
@@ -952,9 +1218,8 @@ class TranslatarrMonitor(xbmc.Monitor):
                 media_path=resolved_media_path,
                 language_name=self.target_lang_name,
                 language_variants=get_iso_variants(self.target_lang_name),
-                mkvinfo_path=self.mkvtoolnix_folder or self.mkvinfo_path or None,
-                mkvextract_path=self.mkvtoolnix_folder or self.mkvextract_path or None,
-                ffmpeg_path=self.ffmpeg_folder or self.ffmpeg_path or None,
+                tools=self.tool_registry,
+                probe_cache_dir=EMBEDDED_PROBE_CACHE_FOLDER,
                 log_fn=tool_kwargs["log_fn"]
             )
             if target_result.get("found"):
@@ -1008,41 +1273,74 @@ class TranslatarrMonitor(xbmc.Monitor):
                 return None
 
             if remote_probe.get("found"):
-                selected_track = remote_probe.get("selected_track") or {}
-                log(
-                    "Embedded target-language subtitle already exists via remote probe (track {0}). Skipping source extraction and translation.".format(
-                        selected_track.get("track_number")
-                        or selected_track.get("mkvextract_id")
-                        or selected_track.get("track_id")
-                        or "?"
-                    ),
-                    "info",
-                    self
-                )
-                if self.use_notifications and self.last_embedded_target_skip_notify_key != attempt_key:
-                    ui.notify(
-                        "Embedded {0} subtitle already found. Skipping translation.".format(
-                            self.target_lang_name
-                        ),
-                        title="Translatarr",
-                        duration=5000
-                    )
-                    self.last_embedded_target_skip_notify_key = attempt_key
-                return "target_exists_skip"
+                return skip_for_remote_target(remote_probe.get("selected_track"))
 
             return None
 
-        def try_remote_source_extraction():
-            if not remote_configured:
+        def skip_for_remote_target(selected_track):
+            selected_track = selected_track or {}
+            log(
+                "Embedded target-language subtitle already exists via remote probe (track {0}). Skipping source extraction and translation.".format(
+                    selected_track.get("track_number")
+                    or selected_track.get("mkvextract_id")
+                    or selected_track.get("track_id")
+                    or "?"
+                ),
+                "info",
+                self
+            )
+            if self.use_notifications and self.last_embedded_target_skip_notify_key != attempt_key:
+                ui.notify(
+                    "Embedded {0} subtitle already found. Skipping translation.".format(
+                        self.target_lang_name
+                    ),
+                    title="Translatarr",
+                    duration=5000
+                )
+                self.last_embedded_target_skip_notify_key = attempt_key
+            return "target_exists_skip"
+
+        def try_remote_resolve():
+            """
+            Remote-only extraction: one /resolve request checks for the target
+            language and extracts the source track from a single probe.
+            Returns None to fall back to separate probe and extract requests.
+            """
+            if self.force_embedded_source_extraction or local_extraction_ready or not remote_configured:
                 return None
-            if self.use_notifications:
-                ui.notify("Embedded extraction started (Remote)", title="Translatarr", duration=5000)
-            remote_result = self.remote_extractor_client.extract_embedded_subtitle(
+
+            started = time.time()
+            remote_result = self.remote_extractor_client.resolve_embedded_subtitle(
                 resolved_media_path,
                 self.source_lang_name,
+                self.target_lang_name,
                 resolved_output_dir,
                 source_lang_iso=self.source_lang_iso
             )
+            if remote_result.get("reason") in ("remote_extractor_no_resolve", "remote_extractor_http_error"):
+                log(
+                    "Remote resolve unavailable ({0}), using separate probe and extract requests.".format(
+                        remote_result.get("message") or remote_result.get("reason")
+                    ),
+                    "debug",
+                    self
+                )
+                return None
+
+            if remote_result.get("found"):
+                return skip_for_remote_target(remote_result.get("selected_track"))
+
+            record_attempt("remote", started, remote_result)
+            status, _ = try_remote_source_extraction(remote_result)
+            return status
+
+        def try_remote_source_extraction(remote_result=None):
+            if not remote_configured:
+                return None
+            if remote_result is None:
+                if self.use_notifications:
+                    ui.notify("Embedded extraction started (Remote)", title="Translatarr", duration=5000)
+                remote_result = extract_remote()
             if remote_result.get("success"):
                 log(
                     "Remote embedded subtitle extraction succeeded via {0}{1}.".format(
@@ -1075,18 +1373,73 @@ class TranslatarrMonitor(xbmc.Monitor):
             )
             return "no_action", False
 
-        def try_local_source_extraction():
-            if not local_extraction_ready:
-                return "no_action", False
-            if self.use_notifications:
-                ui.notify("Embedded extraction started (Local)", title="Translatarr", duration=5000)
+        def try_local_source_streaming():
+            if not self.stream_embedded_extraction:
+                return None
 
-            result = embedded_subtitles.try_extract_embedded_subtitle(
+            stream_result = embedded_subtitles.open_embedded_subtitle_stream(
                 source_lang_iso=self.source_lang_iso,
                 source_lang_name=self.source_lang_name,
                 source_variants=get_iso_variants(self.source_lang_name),
+                track_cache_dir=EXTRACTED_TRACK_CACHE_FOLDER,
                 **tool_kwargs
             )
+            if not stream_result.get("success"):
+                if stream_result.get("reason") not in ("stream_not_needed", "already_exists"):
+                    log(
+                        "Streaming embedded extraction skipped: {0}".format(stream_result.get("reason", "unknown")),
+                        "debug",
+                        self
+                    )
+                return None
+
+            cue_stream = stream_result["stream"]
+            log(
+                "Translating embedded source subtitle track {0} while it is extracted via {1}.".format(
+                    stream_result.get("track_id", "?"),
+                    stream_result.get("method", "unknown")
+                ),
+                "info",
+                self
+            )
+            self.is_busy = True
+            try:
+                translated = process_subtitles(
+                    stream_result["output_path"],
+                    self,
+                    force_retranslate=True,
+                    save_path=save_path,
+                    show_source_immediately=False,
+                    cue_stream=cue_stream
+                )
+            finally:
+                self.is_busy = False
+
+            if cue_stream.finished and cue_stream.error_reason is None:
+                schedule_target_track_prefetch()
+
+            if not translated and cue_stream.error_reason not in (None, "stream_cancelled"):
+                log(
+                    "Streaming embedded extraction failed ({0}). Falling back to regular extraction.".format(
+                        cue_stream.error_reason
+                    ),
+                    "debug",
+                    self
+                )
+                return None
+            return "source_streamed"
+
+        def try_local_source_extraction():
+            if not local_extraction_ready:
+                return "no_action", False
+            if self.use_notifications:
+                ui.notify("Embedded extraction started (Local)", title="Translatarr", duration=5000)
+
+            streamed_status = try_local_source_streaming()
+            if streamed_status:
+                return streamed_status, True
+
+            result = extract_local()
 
             if result.get("success"):
                 log(
@@ -1108,41 +1461,98 @@ class TranslatarrMonitor(xbmc.Monitor):
             notify_extraction_result("Local", False, result.get("reason"))
             return "no_action", False
 
+        def race_source_extraction():
+            if self.use_notifications:
+                ui.notify("Embedded extraction started (Local + Remote)", title="Translatarr", duration=5000)
+
+            streamed_status = try_local_source_streaming()
+            if streamed_status:
+                return streamed_status
+
+            race = extraction_race.ExtractionRace(log_fn=tool_kwargs["log_fn"])
+            outcome = race.run([("local", extract_local), ("remote", extract_remote)])
+            if outcome["winner"]:
+                log(
+                    "Embedded extraction race won by {0} extraction in {1:.1f}s (track {2}).".format(
+                        outcome["winner"],
+                        outcome["elapsed"],
+                        outcome["result"].get("track_id") or outcome["result"].get("selected_track") or "?"
+                    ),
+                    "info",
+                    self
+                )
+                return "source_extracted"
+
+            reasons = ", ".join(
+                "{0}: {1}".format(
+                    route,
+                    result.get("error") or result.get("message") or result.get("reason", "unknown")
+                )
+                for route, _, result in outcome["finished"]
+            )
+            log("Embedded extraction race failed on every route ({0}).".format(reasons), "debug", self)
+            notify_extraction_result("Local + Remote", False, reasons)
+            return "no_action"
+
+        resolve_status = try_remote_resolve()
+        if resolve_status:
+            return resolve_status
+
         target_skip_status = check_local_target_skip()
         if not target_skip_status and not local_extraction_ready:
             target_skip_status = check_remote_target_skip()
         if target_skip_status:
             return target_skip_status
 
-        if local_extraction_ready:
+        if local_extraction_ready and remote_configured and self.race_embedded_extraction:
             log(
-                "Embedded extraction decision → using local extraction first (platform={0}, remote_configured={1})".format(
-                    self.platform_name,
-                    remote_configured
+                "Embedded extraction decision → racing local and remote extraction (platform={0}).".format(
+                    self.platform_name
                 ),
                 "debug",
                 self
             )
-            status, success = try_local_source_extraction()
-            if success:
-                return status
-            if remote_configured:
-                log("Falling back to remote embedded extraction after local extraction failure.", "debug", self)
-                status, success = try_remote_source_extraction()
-                if success:
-                    return status
-            return "no_action"
+            return race_source_extraction()
 
+        available_routes = []
+        if local_extraction_ready:
+            available_routes.append("local")
         if remote_configured:
-            log(
-                "Embedded extraction decision → using remote extractor (local_enabled={0}, local_tools_available={1}).".format(
-                    local_extraction_enabled,
-                    local_tools_available
-                ),
-                "debug",
-                self
-            )
-            status, success = try_remote_source_extraction()
+            available_routes.append("remote")
+        if not available_routes:
+            return "no_action"
+
+        latency_profile = extraction_race.load_latency_profile(EXTRACTION_LATENCY_FILE)
+        route_order = extraction_race.order_routes(available_routes, latency_profile)
+        log(
+            "Embedded extraction decision → order: {0} (platform={1}, local_enabled={2}, "
+            "local_tools_available={3}, remote_configured={4}, average seconds: {5})".format(
+                ", ".join(route_order),
+                self.platform_name,
+                local_extraction_enabled,
+                local_tools_available,
+                remote_configured,
+                ", ".join(
+                    "{0}={1}".format(route, (latency_profile.get(route) or {}).get("ewma_seconds", "n/a"))
+                    for route in available_routes
+                )
+            ),
+            "debug",
+            self
+        )
+
+        attempts = {"local": try_local_source_extraction, "remote": try_remote_source_extraction}
+        for index, route in enumerate(route_order):
+            if index:
+                log(
+                    "Falling back to {0} embedded extraction after {1} extraction failure.".format(
+                        route,
+                        route_order[index - 1]
+                    ),
+                    "debug",
+                    self
+                )
+            status, success = attempts[route]()
             if success:
                 return status
         return "no_action"
@@ -1356,12 +1766,16 @@ class TranslatarrMonitor(xbmc.Monitor):
             embedded_status = self.handle_embedded_subtitle_fallback(
                 extraction_media_path,
                 TRANSLATARR_SUB_FOLDER,
-                "auto"
+                "auto",
+                save_path=vfs_join(
+                    TRANSLATARR_SUB_FOLDER,
+                    f"{safe_filename(video_name)}.{self.target_lang_iso}.srt"
+                )
             )
             if embedded_status == "source_extracted":
                 self.check_auto_mode_unified()
                 return
-            if embedded_status == "target_exists_skip":
+            if embedded_status in ("target_exists_skip", "source_streamed"):
                 return
 
         # 1. Load newest translated target if one already exists
@@ -1514,7 +1928,7 @@ class TranslatarrMonitor(xbmc.Monitor):
             if embedded_status == "source_extracted":
                 self.check_manual_mode()
                 return
-            if embedded_status == "target_exists_skip":
+            if embedded_status in ("target_exists_skip", "source_streamed"):
                 return
 
         # 3. Sorting by mtime (using xbmcvfs)
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+import codecs
+import re
+from array import array
+
+
+TIMING_RE = re.compile(
+    r'^\s*(\d{1,3}):(\d{2}):(\d{2})[,.](\d{1,3})\s*-->\s*(\d{1,3}):(\d{2}):(\d{2})[,.](\d{1,3})'
+)
+BOM = u"\ufeff"
+READ_CHUNK_SIZE = 64 * 1024
+MAX_STORED_VALUE = 0xFFFFFFFF
+
+
+def _to_ms(hours, minutes, seconds, millis):
+    # "1,5" means 500 ms, matching how players read short fractions
+    if len(millis) != 3:
+        millis = (millis + "00")[:3]
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis)
+
+
+def format_timestamp(ms):
+    hours, remainder = divmod(int(ms), 3600000)
+    minutes, remainder = divmod(remainder, 60000)
+    seconds, millis = divmod(remainder, 1000)
+    return "%02d:%02d:%02d,%03d" % (hours, minutes, seconds, millis)
+
+
+def format_timing(start_ms, end_ms):
+    return format_timestamp(start_ms) + " --> " + format_timestamp(end_ms)
+
+
+class Cue(object):
+    __slots__ = ("index", "start_ms", "end_ms", "text")
+
+    def __init__(self, index, start_ms, end_ms, text):
+        self.index = index
+        self.start_ms = start_ms
+        self.end_ms = end_ms
+        self.text = text
+
+
+class CueTimings(object):
+    """
+    Compact, array-backed list of cue timings.
+    Items read back as (index, "start --> end") string tuples, the form
+    the SRT writers render.
+    """
+    __slots__ = ("indexes", "starts", "ends")
+
+    def __init__(self):
+        self.indexes = array("L")
+        self.starts = array("L")
+        self.ends = array("L")
+
+    def append(self, index, start_ms, end_ms):
+        self.indexes.append(min(index, MAX_STORED_VALUE))
+        self.starts.append(min(start_ms, MAX_STORED_VALUE))
+        self.ends.append(min(end_ms, MAX_STORED_VALUE))
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __bool__(self):
+        return len(self.starts) > 0
+
+    def _item(self, position):
+        return (
+            str(self.indexes[position]),
+            format_timing(self.starts[position], self.ends[position])
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            sliced = CueTimings()
+            sliced.indexes = self.indexes[key]
+            sliced.starts = self.starts[key]
+            sliced.ends = self.ends[key]
+            return sliced
+        return self._item(key)
+
+    def __iter__(self):
+        for position in range(len(self.starts)):
+            yield self._item(position)
+
+
+def iter_lines(chunks):
+    """
+    Turn an iterable of decoded text chunks into lines without line endings.
+    Handles \\r\\n split across chunk boundaries and a leading BOM.
+    """
+    pending = ""
+    first = True
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if first:
+            chunk = chunk.lstrip(BOM)
+            first = False
+        pending += chunk
+        if pending.endswith("\r"):
+            # Wait for the next chunk to know whether this is \r\n
+            held_back = "\r"
+            pending = pending[:-1]
+        else:
+            held_back = ""
+
+        pending = pending.replace("\r\n", "\n").replace("\r", "\n")
+        lines = pending.split("\n")
+        pending = lines.pop() + held_back
+        for line in lines:
+            yield line
+
+    if pending:
+        pending = pending.replace("\r\n", "\n").replace("\r", "\n")
+        for line in pending.split("\n"):
+            yield line
+
+
+def iter_decoded_chunks(byte_chunks, encoding="utf-8"):
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for byte_chunk in byte_chunks:
+        if byte_chunk:
+            yield decoder.decode(bytes(byte_chunk))
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+def iter_cues(lines):
+    """
+    Incrementally parse SRT lines into Cue objects.
+    Tolerates missing index lines, missing blank separators between
+    blocks, blank lines between the timing line and the text, and stray
+    garbage lines outside of cue blocks.
+    Multi-line cue text is joined with [BR].
+    """
+    timing_match_fn = TIMING_RE.match
+    to_ms = _to_ms
+    pending_index = None
+    current = None
+    text_lines = []
+    next_auto_index = 1
+
+    for line in lines:
+        # Only timing lines contain "-->", so most lines skip the regex
+        timing_match = timing_match_fn(line) if "-->" in line else None
+        if timing_match:
+            index = None
+            if current is not None:
+                # A bare number right before a timing line is the next block's
+                # index even when the blank separator line is missing.
+                if text_lines and text_lines[-1].strip().isdecimal():
+                    index = int(text_lines.pop())
+                current.text = " [BR] ".join(text_lines)
+                yield current
+            elif pending_index is not None:
+                index = pending_index
+
+            hours, minutes, seconds, millis, end_hours, end_minutes, end_seconds, end_millis = timing_match.groups()
+            if index is None:
+                index = next_auto_index
+            next_auto_index = index + 1
+            current = Cue(
+                index,
+                to_ms(hours, minutes, seconds, millis),
+                to_ms(end_hours, end_minutes, end_seconds, end_millis),
+                ""
+            )
+            text_lines = []
+            pending_index = None
+            continue
+
+        if current is not None:
+            if line and not line.isspace():
+                text_lines.append(line)
+                continue
+            if not text_lines:
+                # Blank lines between the timing line and the first text
+                # line belong to the cue, as with the old regex parser
+                continue
+            current.text = " [BR] ".join(text_lines)
+            yield current
+            current = None
+            text_lines = []
+            continue
+
+        stripped = line.strip()
+        if stripped.isdecimal():
+            pending_index = int(stripped)
+        elif stripped:
+            pending_index = None
+
+    if current is not None:
+        current.text = " [BR] ".join(text_lines)
+        yield current
+
+
+def collect_cues(cues):
+    """
+    Store parsed cues as compact timings plus a parallel list of texts.
+    Returns (None, None) when no cue was found.
+    """
+    timings = CueTimings()
+    texts = []
+    append_index = timings.indexes.append
+    append_start = timings.starts.append
+    append_end = timings.ends.append
+    append_text = texts.append
+    for cue in cues:
+        if cue.index > MAX_STORED_VALUE or cue.start_ms > MAX_STORED_VALUE or cue.end_ms > MAX_STORED_VALUE:
+            timings.append(cue.index, cue.start_ms, cue.end_ms)
+        else:
+            append_index(cue.index)
+            append_start(cue.start_ms)
+            append_end(cue.end_ms)
+        append_text(cue.text)
+
+    if not texts:
+        return None, None
+    return timings, texts
+
+
+def parse_text(content):
+    return collect_cues(iter_cues(iter_lines([content])))
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+import difflib
+import hashlib
+import json
+import os
+import re
+import time
+
+
+MAX_MEMORY_ENTRIES = 12
+MAX_CANDIDATES_TO_ALIGN = 3
+MIN_CANDIDATE_OVERLAP = 0.3
+MEMORY_FILE_SUFFIX = ".json"
+
+
+def _log(log_fn, message, level="debug"):
+    if log_fn:
+        log_fn(message, level)
+
+
+def _normalize_cue_text(text):
+    if text is None:
+        return None
+    normalized = re.sub(r'\s*\[BR\]\s*', ' ', text, flags=re.IGNORECASE)
+    normalized = re.sub(r'\s+', ' ', normalized)
+    return normalized.strip().lower()
+
+
+def _cue_hash(normalized_text):
+    return hashlib.sha1(normalized_text.encode("utf-8")).hexdigest()[:16]
+
+
+def build_memory_key(source_lang_iso, target_lang_iso, model_name, translation_style):
+    """
+    Translations are only reused when they were produced for the same
+    language pair, model, and style as the current job.
+    """
+    raw_key = "|".join([
+        source_lang_iso or "",
+        target_lang_iso or "",
+        model_name or "",
+        translation_style or "",
+    ])
+    return hashlib.sha1(raw_key.encode("utf-8")).hexdigest()
+
+
+def _list_memory_files(memory_dir):
+    try:
+        names = os.listdir(memory_dir)
+    except Exception:
+        return []
+
+    files = []
+    for name in names:
+        if not name.endswith(MEMORY_FILE_SUFFIX):
+            continue
+        path = os.path.join(memory_dir, name)
+        try:
+            files.append((os.path.getmtime(path), path))
+        except Exception:
+            continue
+
+    files.sort(reverse=True)
+    return [path for _, path in files]
+
+
+def _load_entry(path):
+    try:
+        with open(path, "r", encoding="utf-8") as handle:
+            entry = json.load(handle)
+    except Exception:
+        return None
+
+    if not isinstance(entry, dict):
+        return None
+    hashes = entry.get("hashes")
+    translations = entry.get("translations")
+    if not isinstance(hashes, list) or not isinstance(translations, list):
+        return None
+    if len(hashes) != len(translations):
+        return None
+    return entry
+
+
+def _rank_candidates(entries, new_hashes):
+    new_hash_set = set(new_hashes)
+    if not new_hash_set:
+        return []
+
+    ranked = []
+    for entry in entries:
+        old_hashes = entry.get("hashes") or []
+        overlap = len(new_hash_set.intersection(old_hashes)) / float(len(new_hash_set))
+        if overlap >= MIN_CANDIDATE_OVERLAP:
+            ranked.append((overlap, entry))
+
+    ranked.sort(key=lambda item: item[0], reverse=True)
+    return ranked[:MAX_CANDIDATES_TO_ALIGN]
+
+
+def _align_entry(entry, new_hashes):
+    """
+    Map positions in the new cue sequence to translations from a stored
+    sequence, using the longest common subsequence of cue text hashes.
+    """
+    old_hashes = entry.get("hashes") or []
+    translations = entry.get("translations") or []
+    matcher = difflib.SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+
+    aligned = {}
+    for old_start, new_start, size in matcher.get_matching_blocks():
+        for offset in range(size):
+            translated = translations[old_start + offset]
+            if translated:
+                aligned[new_start + offset] = translated
+    return aligned
+
+
+def find_reusable_translations(memory_dir, memory_key, source_texts, log_fn=None):
+    """
+    Look up recently translated sources with the same memory key and return
+    {cue_index: translated_text} for cues whose text is unchanged.
+    Cues set to None in source_texts (removed SDH/HI cues) are ignored.
+    """
+    if not memory_dir or not source_texts:
+        return {}
+
+    translatable_positions = []
+    new_hashes = []
+    for idx, text in enumerate(source_texts):
+        normalized = _normalize_cue_text(text)
+        if not normalized:
+            continue
+        translatable_positions.append(idx)
+        new_hashes.append(_cue_hash(normalized))
+
+    if not new_hashes:
+        return {}
+
+    entries = []
+    for path in _list_memory_files(memory_dir):
+        entry = _load_entry(path)
+        if entry and entry.get("key") == memory_key:
+            entries.append(entry)
+
+    best_aligned = {}
+    best_source_name = None
+    for overlap, entry in _rank_candidates(entries, new_hashes):
+        aligned = _align_entry(entry, new_hashes)
+        if len(aligned) > len(best_aligned):
+            best_aligned = aligned
+            best_source_name = entry.get("source_name")
+        if len(best_aligned) == len(new_hashes):
+            break
+
+    if not best_aligned:
+        return {}
+
+    _log(
+        log_fn,
+        "Translation memory: reusing {0}/{1} cues from {2}".format(
+            len(best_aligned),
+            len(new_hashes),
+            best_source_name or "previous translation"
+        )
+    )
+
+    return {
+        translatable_positions[position]: translated
+        for position, translated in best_aligned.items()
+    }
+
+
+def _prune_memory(memory_dir):
+    for stale_path in _list_memory_files(memory_dir)[MAX_MEMORY_ENTRIES:]:
+        try:
+            os.remove(stale_path)
+        except Exception:
+            pass
+
+
+def remember_translations(memory_dir, memory_key, source_name, source_texts, translated_texts, log_fn=None):
+    """
+    Store the translated cue texts of a finished job so that a later,
+    differently timed release of the same subtitle can reuse them.
+    """
+    if not memory_dir:
+        return False
+
+    hashes = []
+    translations = []
+    for text, translated in zip(source_texts, translated_texts):
+        normalized = _normalize_cue_text(text)
+        if not normalized:
+            continue
+        hashes.append(_cue_hash(normalized))
+        translations.append(translated or "")
+
+    if not hashes:
+        return False
+
+    entry_id = hashlib.sha1((memory_key + "|" + "".join(hashes)).encode("utf-8")).hexdigest()
+    entry = {
+        "key": memory_key,
+        "source_name": source_name,
+        "created": int(time.time()),
+        "hashes": hashes,
+        "translations": translations,
+    }
+
+    try:
+        os.makedirs(memory_dir, exist_ok=True)
+        entry_path = os.path.join(memory_dir, entry_id + MEMORY_FILE_SUFFIX)
+        temp_path = entry_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as handle:
+            json.dump(entry, handle, ensure_ascii=False)
+        os.replace(temp_path, entry_path)
+    except Exception as exc:
+        _log(log_fn, "Translation memory: failed to store entry: {0}".format(exc), "error")
+        return False
+
+    _prune_memory(memory_dir)
+    return True
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+for folder in ("service.translatarr", "translatarr-remote-extractor"):
+    sys.path.insert(0, str(ROOT / folder))
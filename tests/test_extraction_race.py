@@ -0,0 +1,69 @@
+import threading
+import time
+
+import extraction_race
+
+
+def test_failed_write_after_claim_lets_other_route_win():
+    local_claimed = threading.Event()
+
+    def local(cancel_event, claim_fn):
+        assert claim_fn()
+        local_claimed.set()
+        return {"success": False, "reason": "write_failed"}
+
+    def remote(cancel_event, claim_fn):
+        local_claimed.wait(5)
+        if not claim_fn():
+            return {"success": False, "reason": "cancelled"}
+        return {"success": True}
+
+    race = extraction_race.ExtractionRace()
+    outcome = race.run([("local", local), ("remote", remote)])
+
+    assert outcome["winner"] == "remote"
+    assert [route for route, _, _ in outcome["finished"]] == ["local", "remote"]
+
+
+def test_loser_waiting_on_claim_is_cancelled_by_winner():
+    local_claimed = threading.Event()
+
+    def local(cancel_event, claim_fn):
+        assert claim_fn()
+        local_claimed.set()
+        time.sleep(0.2)
+        return {"success": True}
+
+    def remote(cancel_event, claim_fn):
+        local_claimed.wait(5)
+        if not claim_fn():
+            return {"success": False, "reason": "cancelled"}
+        return {"success": True}
+
+    race = extraction_race.ExtractionRace()
+    outcome = race.run([("local", local), ("remote", remote)])
+
+    assert outcome["winner"] == "local"
+    assert race.cancel_event.is_set()
+    assert not race.claim("remote")
+
+
+def test_concurrent_latency_records_are_not_lost(tmp_path):
+    profile_path = str(tmp_path / "latency.json")
+    workers = [
+        threading.Thread(
+            target=extraction_race.record_route_latency,
+            args=(profile_path, route, 1.0, True)
+        )
+        for route in ("local", "remote")
+        for _ in range(10)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    routes = extraction_race.load_latency_profile(profile_path)
+    assert routes["local"]["samples"] == 10
+    assert routes["remote"]["samples"] == 10
+    assert [path.name for path in tmp_path.iterdir()] == ["latency.json"]
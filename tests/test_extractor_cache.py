@@ -0,0 +1,74 @@
+import contextlib
+import os
+
+import pytest
+
+pytest.importorskip("fastapi")
+import app  # noqa: E402
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(app, "CACHE_INDEX_PATH", str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(app, "CACHE_INDEX_READY", False)
+    monkeypatch.setattr(app, "CACHE_MAX_ENTRIES", 100)
+    monkeypatch.setattr(app, "CACHE_MAX_BYTES", 1024 * 1024)
+    app.ensure_cache_index()
+    return tmp_path
+
+
+def add_entry(cache_dir, name, size, last_access):
+    path = cache_dir / name
+    path.write_bytes(b"x" * size)
+    app.add_cache_entry(str(path), "/media/" + name)
+    with contextlib.closing(app.connect_cache_index()) as db, db:
+        db.execute("UPDATE entries SET last_access = ? WHERE name = ?", (last_access, name))
+
+
+def cached_names(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith(".srt"))
+
+
+def test_evicts_least_recently_used_over_entry_budget(cache_dir, monkeypatch):
+    for position, name in enumerate(("a.srt", "b.srt", "c.srt")):
+        add_entry(cache_dir, name, 10, last_access=position)
+    monkeypatch.setattr(app, "CACHE_MAX_ENTRIES", 2)
+
+    app.evict_cache_entries()
+
+    assert cached_names(cache_dir) == ["b.srt", "c.srt"]
+    stats = app.cache_stats()
+    assert (stats["entries"], stats["bytes"], stats["evictions"]) == (2, 20, 1)
+
+
+def test_evicts_until_under_byte_budget(cache_dir, monkeypatch):
+    add_entry(cache_dir, "old.srt", 600, last_access=1)
+    add_entry(cache_dir, "mid.srt", 300, last_access=2)
+    add_entry(cache_dir, "new.srt", 300, last_access=3)
+    monkeypatch.setattr(app, "CACHE_MAX_BYTES", 700)
+
+    app.evict_cache_entries()
+
+    assert cached_names(cache_dir) == ["mid.srt", "new.srt"]
+
+
+def test_within_budget_keeps_everything(cache_dir):
+    add_entry(cache_dir, "a.srt", 10, last_access=1)
+
+    app.evict_cache_entries()
+
+    assert cached_names(cache_dir) == ["a.srt"]
+    assert app.cache_stats()["evictions"] == 0
+
+
+def test_entry_missing_on_disk_is_still_dropped_from_index(cache_dir, monkeypatch):
+    add_entry(cache_dir, "gone.srt", 10, last_access=1)
+    add_entry(cache_dir, "kept.srt", 10, last_access=2)
+    os.remove(cache_dir / "gone.srt")
+    monkeypatch.setattr(app, "CACHE_MAX_ENTRIES", 1)
+
+    app.evict_cache_entries()
+
+    assert cached_names(cache_dir) == ["kept.srt"]
+    assert app.cache_stats()["entries"] == 1
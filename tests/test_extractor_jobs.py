@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+import app  # noqa: E402
+
+
+def extract_request():
+    return app.ExtractRequest(video_path="/media/a.mkv", source_lang="English", timeout=30)
+
+
+def test_job_cancelled_before_it_starts_is_finished(monkeypatch):
+    monkeypatch.setattr(app, "JOBS", {})
+
+    async def never_called(report):
+        raise AssertionError("cancelled job ran")
+
+    async def scenario():
+        job = app.start_extract_job(extract_request(), never_called)
+        job["task"].cancel()
+        await asyncio.wait([job["task"]])
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job["status"] == "cancelled"
+    assert job["finished_at"] is not None
+    assert app.job_response(job).status == "cancelled"
+
+
+def test_job_runs_extract_and_stores_result(monkeypatch):
+    monkeypatch.setattr(app, "JOBS", {})
+
+    async def extract(report):
+        report("extracting", 50.0)
+        return app.ExtractResponse(ok=True, message="done")
+
+    async def scenario():
+        job = app.start_extract_job(extract_request(), extract)
+        await job["task"]
+        return job
+
+    job = asyncio.run(scenario())
+
+    assert job["status"] == "completed"
+    assert job["result"].message == "done"
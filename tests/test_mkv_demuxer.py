@@ -0,0 +1,228 @@
+import threading
+import zlib
+
+import mkv_demuxer as mkv
+
+
+VIDEO_TRACK = 1
+SUBTITLE_TRACK = 2
+ZLIB_TRACK = 3
+PGS_TRACK = 4
+
+
+def encode_id(element_id):
+    return element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+
+
+def encode_size(size):
+    length = 1
+    while size >= (1 << (7 * length)) - 1:
+        length += 1
+    return (size | (1 << (7 * length))).to_bytes(length, "big")
+
+
+def element(element_id, payload):
+    return encode_id(element_id) + encode_size(len(payload)) + payload
+
+
+def uint_element(element_id, value):
+    return element(element_id, value.to_bytes(max(1, (value.bit_length() + 7) // 8), "big"))
+
+
+def string_element(element_id, value):
+    return element(element_id, value.encode("utf-8"))
+
+
+def track_entry(track_number, track_type, codec_id, language, extra=b""):
+    return element(
+        mkv.TRACK_ENTRY_ID,
+        uint_element(mkv.TRACK_NUMBER_ID, track_number)
+        + uint_element(mkv.TRACK_TYPE_ID, track_type)
+        + string_element(mkv.CODEC_ID_ID, codec_id)
+        + string_element(mkv.LANGUAGE_ID, language)
+        + extra
+    )
+
+
+def block(track_number, relative_timecode, payload):
+    return encode_size(track_number) + relative_timecode.to_bytes(2, "big", signed=True) + b"\x80" + payload
+
+
+def write_mkv(path, with_cues=False, indexed_blocks=None, writing_app="mkvmerge v81.0 ('Milliontown') 64-bit"):
+    """
+    Write a tiny Matroska file: a video track, a plain and a zlib
+    compressed S_TEXT/UTF8 track and a PGS track, with one cluster at
+    10 s holding subtitle BlockGroups and a SimpleBlock without duration.
+    With with_cues, a Cues element before the cluster indexes the first
+    indexed_blocks (default all) blocks of the plain subtitle track.
+    """
+    zlib_encoding = element(
+        mkv.CONTENT_ENCODINGS_ID,
+        element(
+            mkv.CONTENT_ENCODING_ID,
+            uint_element(mkv.CONTENT_ENCODING_SCOPE_ID, 1)
+            + uint_element(mkv.CONTENT_ENCODING_TYPE_ID, 0)
+            + element(mkv.CONTENT_COMPRESSION_ID, uint_element(mkv.CONTENT_COMP_ALGO_ID, mkv.COMPRESSION_ZLIB))
+        )
+    )
+    tracks = element(
+        mkv.TRACKS_ID,
+        track_entry(VIDEO_TRACK, 1, "V_MPEG4/ISO/AVC", "und")
+        + track_entry(
+            SUBTITLE_TRACK, mkv.TRACK_TYPE_SUBTITLE, "S_TEXT/UTF8", "eng",
+            string_element(mkv.NAME_ID, "SDH") + uint_element(mkv.FLAG_HEARING_IMPAIRED_ID, 1)
+        )
+        + track_entry(ZLIB_TRACK, mkv.TRACK_TYPE_SUBTITLE, "S_TEXT/UTF8", "ger", zlib_encoding)
+        + track_entry(PGS_TRACK, mkv.TRACK_TYPE_SUBTITLE, "S_HDMV/PGS", "fre")
+    )
+    info = element(
+        mkv.INFO_ID,
+        uint_element(mkv.TIMECODE_SCALE_ID, mkv.DEFAULT_TIMECODE_SCALE)
+        + string_element(mkv.WRITING_APP_ID, writing_app)
+    )
+
+    children = [uint_element(mkv.CLUSTER_TIMECODE_ID, 10000)]
+    children.append(element(mkv.SIMPLE_BLOCK_ID, block(VIDEO_TRACK, 0, b"\x00" * 64)))
+    subtitle_offsets = []
+    for relative_ms, duration_ms, text in ((500, 1500, "Hello\r\nthere"), (3000, 1000, "Bye")):
+        subtitle_offsets.append(sum(len(child) for child in children))
+        children.append(element(
+            mkv.BLOCK_GROUP_ID,
+            element(mkv.BLOCK_ID, block(SUBTITLE_TRACK, relative_ms, text.encode("utf-8")))
+            + uint_element(mkv.BLOCK_DURATION_ID, duration_ms)
+        ))
+        children.append(element(
+            mkv.BLOCK_GROUP_ID,
+            element(mkv.BLOCK_ID, block(ZLIB_TRACK, relative_ms, zlib.compress(("Z " + text).encode("utf-8"))))
+            + uint_element(mkv.BLOCK_DURATION_ID, duration_ms)
+        ))
+    subtitle_offsets.append(sum(len(child) for child in children))
+    children.append(element(mkv.SIMPLE_BLOCK_ID, block(SUBTITLE_TRACK, 4500, b"No duration")))
+    cluster = element(mkv.CLUSTER_ID, b"".join(children))
+
+    def cues_element(cluster_position):
+        points = b""
+        for offset in subtitle_offsets[:indexed_blocks]:
+            points += element(
+                mkv.CUE_POINT_ID,
+                uint_element(mkv.CUE_TIME_ID, 10000)
+                + element(
+                    mkv.CUE_TRACK_POSITIONS_ID,
+                    uint_element(mkv.CUE_TRACK_ID, SUBTITLE_TRACK)
+                    + uint_element(mkv.CUE_CLUSTER_POSITION_ID, cluster_position)
+                    + uint_element(mkv.CUE_RELATIVE_POSITION_ID, offset)
+                )
+            )
+        return element(mkv.CUES_ID, points)
+
+    segment = info + tracks
+    if with_cues:
+        # The cluster position depends on the Cues size, so grow it until both agree
+        cues = cues_element(len(segment))
+        while True:
+            resized = cues_element(len(segment) + len(cues))
+            if len(resized) == len(cues):
+                break
+            cues = resized
+        segment += resized
+    segment += cluster
+
+    with open(path, "wb") as handle:
+        handle.write(element(mkv.EBML_HEADER_ID, string_element(0x4282, "matroska")))
+        handle.write(element(mkv.SEGMENT_ID, segment))
+
+
+def test_probe_lists_subtitle_tracks_with_mkvmerge_ids(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path))
+
+    result = mkv.probe_subtitle_tracks(str(path))
+
+    assert result["success"]
+    assert [(track["track_id"], track["codec_id"], track["language"]) for track in result["tracks"]] == [
+        ("1", "S_TEXT/UTF8", "eng"),
+        ("2", "S_TEXT/UTF8", "ger"),
+        ("3", "S_HDMV/PGS", "fre"),
+    ]
+    assert result["tracks"][0]["name"] == "SDH"
+    assert result["tracks"][0]["is_hearing_impaired"]
+
+
+def test_extract_srt_tracks_walks_clusters(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path))
+    outputs = {"1": str(tmp_path / "eng.srt"), "2": str(tmp_path / "ger.srt"), "3": str(tmp_path / "fre.srt")}
+
+    result = mkv.extract_srt_tracks(str(path), outputs)
+
+    assert result["success"] and result["method"] == "clusters"
+    assert result["tracks"]["1"] == {"success": True, "output_path": outputs["1"], "cue_count": 3}
+    assert result["tracks"]["3"] == {"success": False, "reason": "mkv_codec_unsupported"}
+    assert (tmp_path / "eng.srt").read_text("utf-8") == (
+        "1\n00:00:10,500 --> 00:00:12,000\nHello\nthere\n\n"
+        "2\n00:00:13,000 --> 00:00:14,000\nBye\n\n"
+        "3\n00:00:14,500 --> 00:00:16,500\nNo duration\n\n"
+    )
+    assert (tmp_path / "ger.srt").read_text("utf-8") == (
+        "1\n00:00:10,500 --> 00:00:12,000\nZ Hello\nthere\n\n"
+        "2\n00:00:13,000 --> 00:00:14,000\nZ Bye\n\n"
+    )
+
+
+def test_extract_uses_cues_index_when_present(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path), with_cues=True)
+    output = str(tmp_path / "eng.srt")
+
+    result = mkv.extract_srt_tracks(str(path), {"1": output})
+
+    assert result["method"] == "cues"
+    assert result["tracks"]["1"]["cue_count"] == 3
+    assert "00:00:13,000 --> 00:00:14,000\nBye\n" in (tmp_path / "eng.srt").read_text("utf-8")
+
+
+def test_partial_cues_from_unknown_muxer_are_not_trusted(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path), with_cues=True, indexed_blocks=1, writing_app="SomeMuxer 1.0")
+    output = str(tmp_path / "eng.srt")
+
+    result = mkv.extract_srt_tracks(str(path), {"1": output})
+
+    assert result["method"] == "clusters"
+    assert result["tracks"]["1"]["cue_count"] == 3
+    assert list(mkv.iter_srt_cues(str(path), "1"))[-1] == (14500, 16500, "No duration")
+
+
+def test_iter_srt_cues_streams_track(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path))
+
+    assert list(mkv.iter_srt_cues(str(path), "1")) == [
+        (10500, 12000, "Hello\nthere"),
+        (13000, 14000, "Bye"),
+        (14500, 16500, "No duration"),
+    ]
+
+
+def test_rejects_non_matroska_and_unknown_track(tmp_path):
+    path = tmp_path / "movie.mkv"
+    path.write_bytes(b"not a matroska file at all")
+    assert mkv.probe_subtitle_tracks(str(path)) == {
+        "success": False, "reason": "mkv_parse_failed", "error": "not_matroska",
+    }
+
+    write_mkv(str(path))
+    result = mkv.extract_srt_tracks(str(path), {"0": str(tmp_path / "video.srt")})
+    assert result["tracks"]["0"] == {"success": False, "reason": "mkv_track_not_found"}
+
+
+def test_extract_stops_when_cancelled(tmp_path):
+    path = tmp_path / "movie.mkv"
+    write_mkv(str(path))
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    result = mkv.extract_srt_tracks(str(path), {"1": str(tmp_path / "eng.srt")}, cancel_event)
+
+    assert result == {"success": False, "reason": "cancelled"}
+    assert not (tmp_path / "eng.srt").exists()
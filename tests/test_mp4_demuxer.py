@@ -0,0 +1,154 @@
+import struct
+import threading
+
+import mp4_demuxer as mp4
+
+
+def box(box_type, payload):
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def full_box(box_type, payload, version=0, flags=0):
+    return box(box_type, struct.pack(">I", (version << 24) | flags) + payload)
+
+
+def pack_language(code):
+    value = 0
+    for char in code:
+        value = (value << 5) | (ord(char) - 0x60)
+    return value
+
+
+def tx3g(text, encoding="utf-8"):
+    payload = text.encode(encoding)
+    return struct.pack(">H", len(payload)) + payload
+
+
+def trak(handler_type, sample_format, language, timescale, samples, chunk_offset, use_co64=False, extra=b""):
+    """
+    Build a trak whose samples ((duration, payload) pairs) are stored back
+    to back in a single chunk at chunk_offset.
+    """
+    sample_entry = box(sample_format, b"\x00" * 6 + struct.pack(">H", 1))
+    offsets_box = (
+        full_box(b"co64", struct.pack(">IQ", 1, chunk_offset))
+        if use_co64
+        else full_box(b"stco", struct.pack(">II", 1, chunk_offset))
+    )
+    stbl = box(b"stbl", b"".join((
+        full_box(b"stsd", struct.pack(">I", 1) + sample_entry),
+        full_box(b"stts", struct.pack(">I", len(samples)) + b"".join(
+            struct.pack(">II", 1, duration) for duration, _ in samples
+        )),
+        full_box(b"stsc", struct.pack(">IIII", 1, 1, len(samples), 1)),
+        full_box(b"stsz", struct.pack(">II", 0, len(samples)) + b"".join(
+            struct.pack(">I", len(payload)) for _, payload in samples
+        )),
+        offsets_box,
+    )))
+    mdhd = full_box(b"mdhd", struct.pack(">IIIIHH", 0, 0, timescale, 0, pack_language(language), 0))
+    hdlr = full_box(b"hdlr", struct.pack(">I4s12x", 0, handler_type) + b"Subtitles\x00")
+    return box(b"trak", box(b"mdia", mdhd + hdlr + extra + box(b"minf", stbl)))
+
+
+def write_mp4(path):
+    """
+    Write a tiny MP4 with moov after mdat: a video track, an English and a
+    Dutch tx3g track (the Dutch one with a co64 table, a 600 Hz timescale
+    and a UTF-16 sample) and a WebVTT track.
+    """
+    english = [
+        (1000, b"\x00\x00"),
+        (1500, tx3g("Hello\r\nthere")),
+        (500, b"\x00\x00"),
+        (1000, tx3g("Bye")),
+    ]
+    dutch = [(600, tx3g("Hallo")), (300, tx3g("\ufeffDag", "utf-16-be"))]
+    video = [(40, b"\x00" * 32)]
+    webvtt = [(1000, b"\x00\x00\x00\x08vttc")]
+
+    ftyp = box(b"ftyp", b"isom" + struct.pack(">I", 512) + b"isommp42")
+    chunks = []
+    offset = len(ftyp) + 8
+    for samples in (video, english, dutch, webvtt):
+        chunks.append(offset)
+        offset += sum(len(payload) for _, payload in samples)
+    mdat = box(b"mdat", b"".join(
+        payload for samples in (video, english, dutch, webvtt) for _, payload in samples
+    ))
+    moov = box(b"moov", b"".join((
+        trak(b"vide", b"avc1", "und", 1000, video, chunks[0]),
+        trak(b"sbtl", b"tx3g", "eng", 1000, english, chunks[1]),
+        trak(b"sbtl", b"tx3g", "dut", 600, dutch, chunks[2], use_co64=True,
+             extra=full_box(b"elng", b"nl-BE\x00")),
+        trak(b"text", b"wvtt", "eng", 1000, webvtt, chunks[3]),
+    )))
+    with open(path, "wb") as handle:
+        handle.write(ftyp + mdat + moov)
+
+
+def test_probe_lists_text_tracks_with_ffmpeg_indexes(tmp_path):
+    path = tmp_path / "movie.mp4"
+    write_mp4(str(path))
+
+    result = mp4.probe_subtitle_tracks(str(path))
+
+    assert result["success"]
+    assert result["tracks"] == [
+        {"track_id": "1", "codec_name": "mov_text", "language": "eng", "name": "Subtitles"},
+        {"track_id": "2", "codec_name": "mov_text", "language": "nl-BE", "name": "Subtitles"},
+        {"track_id": "3", "codec_name": "wvtt", "language": "eng", "name": "Subtitles"},
+    ]
+
+
+def test_extract_srt_tracks_skips_empty_samples(tmp_path):
+    path = tmp_path / "movie.mp4"
+    write_mp4(str(path))
+    outputs = {"1": str(tmp_path / "eng.srt"), "2": str(tmp_path / "dut.srt")}
+
+    result = mp4.extract_srt_tracks(str(path), outputs)
+
+    assert result["success"]
+    assert result["tracks"]["1"] == {"success": True, "output_path": outputs["1"], "cue_count": 2}
+    assert (tmp_path / "eng.srt").read_text("utf-8") == (
+        "1\n00:00:01,000 --> 00:00:02,500\nHello\nthere\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nBye\n\n"
+    )
+    assert (tmp_path / "dut.srt").read_text("utf-8") == (
+        "1\n00:00:00,000 --> 00:00:01,000\nHallo\n\n"
+        "2\n00:00:01,000 --> 00:00:01,500\nDag\n\n"
+    )
+
+
+def test_extract_reports_unsupported_tracks(tmp_path):
+    path = tmp_path / "movie.mp4"
+    write_mp4(str(path))
+
+    result = mp4.extract_srt_tracks(str(path), {"0": str(tmp_path / "a.srt"), "3": str(tmp_path / "b.srt")})
+
+    assert result["tracks"] == {
+        "0": {"success": False, "reason": "mp4_track_not_found"},
+        "3": {"success": False, "reason": "mp4_codec_unsupported"},
+    }
+    assert not (tmp_path / "b.srt").exists()
+
+
+def test_rejects_file_without_moov(tmp_path):
+    path = tmp_path / "movie.mp4"
+    path.write_bytes(box(b"ftyp", b"isom") + box(b"mdat", b"\x00" * 16))
+
+    assert mp4.probe_subtitle_tracks(str(path)) == {
+        "success": False, "reason": "mp4_parse_failed", "error": "moov_not_found",
+    }
+
+
+def test_extract_stops_when_cancelled(tmp_path):
+    path = tmp_path / "movie.mp4"
+    write_mp4(str(path))
+    cancel_event = threading.Event()
+    cancel_event.set()
+
+    result = mp4.extract_srt_tracks(str(path), {"1": str(tmp_path / "eng.srt")}, cancel_event)
+
+    assert result == {"success": False, "reason": "cancelled"}
+    assert not (tmp_path / "eng.srt").exists()
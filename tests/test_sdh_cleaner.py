@@ -0,0 +1,53 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+import sdh_cleaner
+
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def load_legacy_cleaner():
+    spec = importlib.util.spec_from_file_location(
+        "sdh_cleaner_benchmark", str(BENCHMARKS / "sdh_cleaner_benchmark.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+legacy = load_legacy_cleaner()
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("[MUSIC PLAYING]", None),
+        ("♪ la la ♪", None),
+        ("JOHN: Where are you going?", "Where are you going?"),
+        ("[Hello, how are you?]", "[Hello, how are you?]"),
+        ("(sighs) Fine. [BR] [door closes]", "Fine."),
+        ("   ", None),
+    ],
+)
+def test_known_cues(text, expected):
+    assert sdh_cleaner.clean_sdh_hi_text(text) == expected
+
+
+def test_golden_corpus_matches_per_cue_and_batch():
+    corpus = json.loads((BENCHMARKS / "fixtures" / "sdh_golden_corpus.json").read_text("utf-8"))
+    inputs = [item[0] for item in corpus]
+    expected = [item[1] for item in corpus]
+    assert [sdh_cleaner.clean_sdh_hi_text(text) for text in inputs] == expected
+    assert sdh_cleaner.clean_sdh_hi_texts(inputs) == expected
+
+
+def test_matches_legacy_cleaner_on_synthetic_lines():
+    texts = legacy.build_synthetic_texts(2000, seed=7)
+    texts.append("- [gasps] [BR] - What?")
+    assert sdh_cleaner.clean_sdh_hi_texts(texts) == [
+        legacy.legacy_clean_sdh_hi_text(text) for text in texts
+    ]
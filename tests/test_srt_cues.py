@@ -0,0 +1,55 @@
+import srt_cues
+
+
+def parse(content):
+    return list(srt_cues.iter_cues(srt_cues.iter_lines([content])))
+
+
+def test_parses_blocks_with_multiline_text():
+    cues = parse(
+        "1\n00:00:01,000 --> 00:00:02,500\nHello\nthere\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nBye\n"
+    )
+    assert [(cue.index, cue.start_ms, cue.end_ms, cue.text) for cue in cues] == [
+        (1, 1000, 2500, "Hello [BR] there"),
+        (2, 3000, 4000, "Bye"),
+    ]
+
+
+def test_blank_line_after_timing_keeps_cue_text():
+    cues = parse(
+        "1\n00:00:01,000 --> 00:00:02,000\n\nFirst\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n\n\nSecond\nline\n"
+    )
+    assert [(cue.index, cue.text) for cue in cues] == [(1, "First"), (2, "Second [BR] line")]
+
+
+def test_missing_index_and_separator_lines():
+    cues = parse(
+        "00:00:01,000 --> 00:00:02,000\nNo index\n"
+        "7\n00:00:03,000 --> 00:00:04,000\nNo blank line before me\n"
+        "00:00:05,000 --> 00:00:06,000\nAuto numbered\n"
+    )
+    assert [(cue.index, cue.text) for cue in cues] == [
+        (1, "No index"),
+        (7, "No blank line before me"),
+        (8, "Auto numbered"),
+    ]
+
+
+def test_crlf_split_across_chunks_and_bom():
+    chunks = ["\ufeff1\r", "\n00:00:01,000 --> 00:00:02,000\r\nText\r", "\n\r\n"]
+    cues = list(srt_cues.iter_cues(srt_cues.iter_lines(chunks)))
+    assert [(cue.index, cue.start_ms, cue.text) for cue in cues] == [(1, 1000, "Text")]
+
+
+def test_short_fractions_and_dot_separator():
+    (cue,) = parse("1\n0:00:01.5 --> 0:00:02.25\nText\n")
+    assert (cue.start_ms, cue.end_ms) == (1500, 2250)
+
+
+def test_parse_text_returns_tuple_timings():
+    timings, texts = srt_cues.parse_text("3\n00:01:00,000 --> 00:01:01,000\nHi\n")
+    assert list(timings) == [("3", "00:01:00,000 --> 00:01:01,000")]
+    assert texts == ["Hi"]
+    assert srt_cues.parse_text("no cues here") == (None, None)
@@ -1,20 +1,157 @@
+import asyncio
+import contextlib
+import contextvars
+import ctypes
+import ctypes.util
+import datetime
+import fcntl
+import hashlib
 import json
+import logging
 import os
 import re
 import shutil
+import signal
+import sqlite3
+import struct
 import subprocess
-from typing import Any, Dict, List, Optional
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
 
 from fastapi import FastAPI, Header, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-app = FastAPI(title="Translatarr Remote Extractor")
+
+@contextlib.asynccontextmanager
+async def lifespan(_app: FastAPI):
+    # Build the cache index before serving, so requests never do it on the event loop
+    await asyncio.to_thread(ensure_runtime_dirs)
+    warmer = asyncio.create_task(run_library_warmer()) if WARM_LANGUAGES else None
+    try:
+        yield
+    finally:
+        if warmer is not None:
+            warmer.cancel()
+
+
+app = FastAPI(title="Translatarr Remote Extractor", lifespan=lifespan)
+LOGGER = logging.getLogger("uvicorn.error")
+# Subtitles compress to a fraction of their size; tiny answers are not worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
 API_TOKEN = os.environ.get("EXTRACTOR_API_TOKEN", "").strip()
 CACHE_DIR = os.environ.get("EXTRACTOR_CACHE_DIR", "/cache").strip()
 WORK_DIR = os.environ.get("EXTRACTOR_WORK_DIR", "/work").strip()
 
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+# Finished jobs are kept this long so a client that lost a poll can still
+# fetch the result.
+JOB_TTL_SECONDS = env_int("EXTRACTOR_JOB_TTL", 900)
+JOB_MAX_WAIT_SECONDS = 30.0
+JOB_POLL_INTERVAL_SECONDS = 0.2
+JOB_FINAL_STATES = ("completed", "failed", "cancelled")
+LOCK_POLL_SECONDS = 0.25
+READ_PACE_POLL_SECONDS = 0.5
+
+# mkvinfo/ffprobe and mkvextract/ffmpeg runs are limited separately so a
+# burst of extractions cannot starve the quick probes, or the other way round.
+MAX_PROBES = env_int("EXTRACTOR_MAX_PROBES", 4)
+MAX_EXTRACTIONS = env_int("EXTRACTOR_MAX_EXTRACTIONS", 2)
+MAX_QUEUED = env_int("EXTRACTOR_MAX_QUEUED", 16)
+RETRY_AFTER_SECONDS = env_int("EXTRACTOR_RETRY_AFTER", 10)
+
+CACHE_MAX_BYTES = env_int("EXTRACTOR_CACHE_MAX_MB", 512) * 1024 * 1024
+CACHE_MAX_ENTRIES = env_int("EXTRACTOR_CACHE_MAX_ENTRIES", 5000)
+CACHE_INDEX_PATH = os.path.join(CACHE_DIR, "index.sqlite3")
+# Files are identified by size plus a hash of these blocks from the start,
+# middle and end, so a replaced file gets new cache entries while the same
+# file reached through two path maps shares them.
+IDENTITY_BLOCK_SIZE = 64 * 1024
+IDENTITY_MEMO_LIMIT = 4096
+# Bump when the stored track lists change shape so old probes are ignored
+PROBE_CACHE_VERSION = 1
+PROBE_MEMO_LIMIT = 2048
+PROBE_CACHE_MAX_ENTRIES = env_int("EXTRACTOR_PROBE_CACHE_MAX_ENTRIES", 20000)
+ETAG_MEMO_LIMIT = 4096
+SUBTITLE_ID_RE = re.compile(r"^[0-9a-f]{40}\.srt$")
+MAX_BATCH_ITEMS = 500
+# Upper bounds in seconds of the /metrics latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.025, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+MKVEXTRACT_PROGRESS_RE = re.compile(r"^#GUI#progress\s+(\d+)%")
+FFMPEG_OUT_TIME_RE = re.compile(r"^out_time_(?:us|ms)=(\d+)$")
+FFMPEG_PROGRESS_KEY_RE = re.compile(r"^[a-z_0-9]+=\S*$")
+
+JOBS: Dict[str, Dict[str, Any]] = {}
+# (path, size, mtime_ns) -> identity, so unchanged files are hashed once
+IDENTITY_MEMO: Dict[Any, str] = {}
+# Track lists by probe key, most recently used last; backed by the probes table
+PROBE_MEMO: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+PROBE_STATS = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+# (cache path, size, mtime_ns) -> ETag of a cached subtitle
+ETAG_MEMO: Dict[Any, str] = {}
+CACHE_INDEX_READY = False
+# In-flight track extractions of this process, keyed by (resolved path, track)
+FLIGHTS: Dict[Any, Dict[str, Any]] = {}
+# Counters and histograms of this process for /metrics. Histograms map a
+# label to [count per bucket..., total count, sum of seconds].
+METRICS: Dict[str, Any] = {
+    "tool_seconds": {},
+    "stage_seconds": {},
+    "failures": {},
+    "extracted_bytes": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+}
+# Stage durations of the current request or job for its Server-Timing header
+REQUEST_TIMINGS: contextvars.ContextVar = contextvars.ContextVar("request_timings", default=None)
+
+# Optional library warmer: pre-probes and pre-extracts new or changed videos
+# under the warm roots for these languages while the extractor is idle.
+WARM_LANGUAGES = [
+    language.strip()
+    for language in os.environ.get("EXTRACTOR_WARM_LANGUAGES", "").split(",")
+    if language.strip()
+]
+WARM_ROOTS_RAW = os.environ.get("EXTRACTOR_WARM_ROOTS", "").strip()
+WARM_SCAN_INTERVAL_SECONDS = env_int("EXTRACTOR_WARM_INTERVAL", 900)
+WARM_MAX_MB_PER_SECOND = env_int("EXTRACTOR_WARM_MAX_MBPS", 20)
+WARM_HOURS = os.environ.get("EXTRACTOR_WARM_HOURS", "").strip()
+WARM_TIMEOUT_SECONDS = env_int("EXTRACTOR_WARM_TIMEOUT", 600)
+# Files modified more recently than this may still be copying in
+WARM_SETTLE_SECONDS = 120
+WARM_IDLE_POLL_SECONDS = 5
+WARM_EXTENSIONS = (".mkv", ".mp4")
+WARMER_STATUS: Dict[str, Any] = {
+    "active": False,
+    "roots": [],
+    "inotify": False,
+    "last_scan": None,
+    "files_warmed": 0,
+    "pending": 0,
+}
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")
+
 # Keep these language tables aligned with service.translatarr/languages.py.
 LANG_NAME_TO_ISO = {
     "Arabic": "ar",
@@ -116,6 +253,8 @@ class ExtractRequest(BaseModel):
     prefer_non_sdh: bool = True
     allow_ffmpeg_fallback: bool = True
     force_reextract: bool = False
+    include_content: bool = True
+    diagnostics: bool = False
 
 
 class ExtractResponse(BaseModel):
@@ -125,23 +264,83 @@ class ExtractResponse(BaseModel):
     cache_hit: bool = False
     extracted_srt_path: Optional[str] = None
     extracted_srt_content: Optional[str] = None
+    subtitle_id: Optional[str] = None
+    etag: Optional[str] = None
     selected_track: Optional[Dict[str, Any]] = None
     all_tracks: List[Dict[str, Any]] = []
     resolved_video_path: Optional[str] = None
     diagnostic_preview: Optional[str] = None
 
 
+class ResolveRequest(BaseModel):
+    video_path: str
+    source_lang: str
+    target_lang: str
+    timeout: int
+    prefer_non_sdh: bool = True
+    allow_ffmpeg_fallback: bool = True
+    force_reextract: bool = False
+    include_content: bool = True
+    diagnostics: bool = False
+    # Start the extraction as a /jobs job and return its job_id
+    as_job: bool = False
+
+
+class ResolveResponse(BaseModel):
+    ok: bool
+    message: str
+    target_found: bool = False
+    target_track: Optional[Dict[str, Any]] = None
+    probe_cache_hit: bool = False
+    all_tracks: List[Dict[str, Any]] = []
+    resolved_video_path: Optional[str] = None
+    extraction: Optional[ExtractResponse] = None
+    job_id: Optional[str] = None
+    diagnostic_preview: Optional[str] = None
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    stage: str
+    progress: Optional[float] = None
+    version: int = 0
+    elapsed: float = 0.0
+    result: Optional[ExtractResponse] = None
+
+
 class ProbeRequest(BaseModel):
     video_path: str
     language: str
     timeout: int
     prefer_non_sdh: bool = True
+    diagnostics: bool = False
+
+
+class ProbeBatchRequest(BaseModel):
+    video_paths: List[str]
+    language: str
+    timeout: int
+    prefer_non_sdh: bool = True
+    diagnostics: bool = False
+
+
+class ExtractBatchRequest(BaseModel):
+    video_paths: List[str]
+    source_lang: str
+    timeout: int
+    prefer_non_sdh: bool = True
+    allow_ffmpeg_fallback: bool = True
+    force_reextract: bool = False
+    include_content: bool = False
+    diagnostics: bool = False
 
 
 class ProbeResponse(BaseModel):
     ok: bool
     found: bool = False
     message: str
+    cache_hit: bool = False
     selected_track: Optional[Dict[str, Any]] = None
     all_tracks: List[Dict[str, Any]] = []
     resolved_video_path: Optional[str] = None
@@ -189,15 +388,348 @@ def command_exists(name: str) -> bool:
     return shutil.which(name) is not None
 
 
-def run_cmd(cmd: List[str], timeout: int) -> subprocess.CompletedProcess:
-    return subprocess.run(
-        cmd,
+def observe_seconds(histogram: str, label: str, seconds: float) -> None:
+    """
+    Add one duration to a /metrics histogram ("tool_seconds" or
+    "stage_seconds") and to the Server-Timing of the current request.
+    """
+    buckets = METRICS[histogram].setdefault(label, [0] * (len(LATENCY_BUCKETS) + 2))
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            buckets[index] += 1
+    buckets[-2] += 1
+    buckets[-1] += seconds
+
+    timings = REQUEST_TIMINGS.get()
+    if timings is not None:
+        timings[label] = timings.get(label, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def timed_stage(stage: str):
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        observe_seconds("stage_seconds", stage, time.monotonic() - started)
+
+
+def count_failure(reason: str) -> None:
+    METRICS["failures"][reason] = METRICS["failures"].get(reason, 0) + 1
+
+
+def format_server_timing(timings: Dict[str, float]) -> str:
+    return ", ".join(
+        "{0};dur={1:.1f}".format(name, seconds * 1000.0)
+        for name, seconds in timings.items()
+    )
+
+
+class ServerTimingMiddleware(object):
+    """
+    Collect the stage and tool durations of every request and send them as
+    a Server-Timing header, e.g. "identity;dur=3.2, mkvinfo;dur=240.5,
+    total;dur=251.0". Responses that set their own header keep it.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: Dict[str, float] = {}
+        started = time.monotonic()
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers") or [])
+                if not any(name.lower() == b"server-timing" for name, _ in headers):
+                    timings["total"] = time.monotonic() - started
+                    headers.append((b"server-timing", format_server_timing(timings).encode("latin-1")))
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        token = REQUEST_TIMINGS.set(timings)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUEST_TIMINGS.reset(token)
+
+
+app.add_middleware(ServerTimingMiddleware)
+
+
+def render_metrics() -> str:
+    """
+    Return the metrics of this process in the Prometheus text format.
+    """
+    lines: List[str] = []
+
+    def family(name: str, kind: str, help_text: str, samples: List[Any]) -> None:
+        lines.append("# HELP translatarr_extractor_{0} {1}".format(name, help_text))
+        lines.append("# TYPE translatarr_extractor_{0} {1}".format(name, kind))
+        for suffix, labels, value in samples:
+            label_text = ",".join(
+                '{0}="{1}"'.format(key, str(label).replace("\\", "\\\\").replace('"', '\\"'))
+                for key, label in labels
+            )
+            lines.append("translatarr_extractor_{0}{1}{2} {3}".format(
+                name,
+                suffix,
+                "{" + label_text + "}" if label_text else "",
+                value
+            ))
+
+    def histogram_samples(histogram: str, label_name: str) -> List[Any]:
+        samples = []
+        for label, buckets in sorted(METRICS[histogram].items()):
+            for bound, count in zip(LATENCY_BUCKETS, buckets):
+                samples.append(("_bucket", [(label_name, label), ("le", bound)], count))
+            samples.append(("_bucket", [(label_name, label), ("le", "+Inf")], buckets[-2]))
+            samples.append(("_count", [(label_name, label)], buckets[-2]))
+            samples.append(("_sum", [(label_name, label)], round(buckets[-1], 6)))
+        return samples
+
+    family(
+        "tool_duration_seconds", "histogram",
+        "Run time of mkvinfo, ffprobe, mkvextract and ffmpeg commands.",
+        histogram_samples("tool_seconds", "tool")
+    )
+    family(
+        "stage_duration_seconds", "histogram",
+        "Time spent in request stages other than tool runs.",
+        histogram_samples("stage_seconds", "stage")
+    )
+    family(
+        "extracted_bytes_total", "counter",
+        "Bytes of subtitle files written by extraction tools.",
+        [("", [], METRICS["extracted_bytes"])]
+    )
+    family(
+        "cache_hits_total", "counter",
+        "Extractions answered from the subtitle cache.",
+        [("", [], METRICS["cache_hits"])]
+    )
+    family(
+        "cache_misses_total", "counter",
+        "Extractions that had to run an extraction tool.",
+        [("", [], METRICS["cache_misses"])]
+    )
+    family(
+        "probe_cache_hits_total", "counter",
+        "Probes answered from the probe cache.",
+        [
+            ("", [("layer", "memory")], PROBE_STATS["memory_hits"]),
+            ("", [("layer", "disk")], PROBE_STATS["disk_hits"]),
+        ]
+    )
+    family(
+        "probe_cache_misses_total", "counter",
+        "Probes that had to run mkvinfo or ffprobe.",
+        [("", [], PROBE_STATS["misses"])]
+    )
+    family(
+        "failures_total", "counter",
+        "Failed requests and tool runs by reason.",
+        [("", [("reason", reason)], count) for reason, count in sorted(METRICS["failures"].items())]
+    )
+    limiters = (PROBE_LIMITER, EXTRACT_LIMITER)
+    family(
+        "slots_running", "gauge",
+        "Tool commands running.",
+        [("", [("kind", limiter.name)], limiter.running) for limiter in limiters]
+    )
+    family(
+        "slots_queued", "gauge",
+        "Tool commands waiting for a free slot.",
+        [("", [("kind", limiter.name)], limiter.queued) for limiter in limiters]
+    )
+    family(
+        "slots_limit", "gauge",
+        "Tool commands allowed to run at once.",
+        [("", [("kind", limiter.name)], limiter.limit) for limiter in limiters]
+    )
+    job_counts = {status: 0 for status in ("queued", "running") + JOB_FINAL_STATES}
+    for job in JOBS.values():
+        job_counts[job["status"]] = job_counts.get(job["status"], 0) + 1
+    family(
+        "jobs", "gauge",
+        "Extraction jobs kept in memory by status.",
+        [("", [("status", status)], count) for status, count in job_counts.items()]
+    )
+    family(
+        "extractions_in_flight", "gauge",
+        "Track extractions currently running, shared by all requests for the same track.",
+        [("", [], len(FLIGHTS))]
+    )
+    return "\n".join(lines) + "\n"
+
+
+class WorkLimiter(object):
+    """
+    Let at most `limit` commands run at once and at most `max_queued` wait
+    for a turn. Callers that would exceed the queue are turned away with a
+    503 and Retry-After, unless they ask to wait regardless.
+    """
+
+    def __init__(self, name: str, limit: int, max_queued: int) -> None:
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queued = max(0, max_queued)
+        self.running = 0
+        self.queued = 0
+        self._semaphore = asyncio.Semaphore(self.limit)
+
+    def is_full(self) -> bool:
+        return self.running >= self.limit and self.queued >= self.max_queued
+
+    def busy_error(self) -> HTTPException:
+        count_failure("busy")
+        return HTTPException(
+            status_code=503,
+            detail="Extractor busy: {0} {1} runs active and {2} queued".format(self.running, self.name, self.queued),
+            headers={"Retry-After": str(RETRY_AFTER_SECONDS)}
+        )
+
+    def stats(self) -> Dict[str, int]:
+        return {"limit": self.limit, "running": self.running, "queued": self.queued, "max_queued": self.max_queued}
+
+    @contextlib.asynccontextmanager
+    async def slot(self, wait_when_full: bool = False):
+        if self.is_full() and not wait_when_full:
+            raise self.busy_error()
+        self.queued += 1
+        started = time.monotonic()
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.queued -= 1
+            observe_seconds("stage_seconds", "{0}_queue".format(self.name), time.monotonic() - started)
+        self.running += 1
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._semaphore.release()
+
+
+PROBE_LIMITER = WorkLimiter("probe", MAX_PROBES, MAX_QUEUED)
+EXTRACT_LIMITER = WorkLimiter("extract", MAX_EXTRACTIONS, MAX_QUEUED)
+# Set by the library warmer: tools run from this context get the lowest CPU
+# and disk priority and have their reads paced, and extractions never share
+# a flight with client requests.
+BACKGROUND_WORK: contextvars.ContextVar = contextvars.ContextVar("background_work", default=False)
+
+
+def read_proc_bytes(io_path: str) -> Optional[int]:
+    try:
+        with open(io_path, "r") as io_file:
+            for line in io_file:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        return None
+    return None
+
+
+async def pace_reads(process: asyncio.subprocess.Process, bytes_per_second: int) -> None:
+    """
+    Keep the average read rate of process under bytes_per_second by
+    stopping it (SIGSTOP/SIGCONT) whenever it gets ahead. /proc/<pid>/io
+    counts every read(), so this also holds on NFS/SMB mounts where ionice
+    has no effect. Does nothing where /proc is not available.
+    """
+    io_path = "/proc/{0}/io".format(process.pid)
+    started = time.monotonic()
+    while process.returncode is None:
+        await asyncio.sleep(READ_PACE_POLL_SECONDS)
+        read_bytes = read_proc_bytes(io_path)
+        if read_bytes is None:
+            return
+        ahead = read_bytes / bytes_per_second - (time.monotonic() - started)
+        if ahead <= 0:
+            continue
+        try:
+            process.send_signal(signal.SIGSTOP)
+        except ProcessLookupError:
+            return
+        try:
+            await asyncio.sleep(ahead)
+        finally:
+            if process.returncode is None:
+                with contextlib.suppress(ProcessLookupError):
+                    process.send_signal(signal.SIGCONT)
+
+
+async def run_cmd(
+    cmd: List[str],
+    timeout: int,
+    on_line: Optional[Callable[[str], bool]] = None
+) -> subprocess.CompletedProcess:
+    """
+    Run cmd without blocking the event loop. With on_line, stderr is folded
+    into stdout and every output line is handed to on_line as it arrives;
+    lines it returns True for are progress noise and are left out of the
+    returned stdout. The process is killed when timeout passes (raising
+    TimeoutExpired) or when the awaiting task is cancelled.
+    """
+    tool = os.path.basename(cmd[0])
+    background = BACKGROUND_WORK.get()
+    started = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        *((low_priority_prefix() if background else []) + cmd),
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True,
-        timeout=timeout,
-        check=False
+        stderr=subprocess.STDOUT if on_line else subprocess.PIPE
     )
+    pacer = None
+    if background and WARM_MAX_MB_PER_SECOND > 0:
+        pacer = asyncio.create_task(pace_reads(process, WARM_MAX_MB_PER_SECOND * 1024 * 1024))
+
+    async def collect() -> subprocess.CompletedProcess:
+        if on_line is None:
+            stdout, stderr = await process.communicate()
+            return subprocess.CompletedProcess(
+                cmd,
+                process.returncode,
+                stdout.decode("utf-8", errors="replace"),
+                stderr.decode("utf-8", errors="replace")
+            )
+
+        output = []
+        while True:
+            raw_line = await process.stdout.readline()
+            if not raw_line:
+                break
+            line = raw_line.decode("utf-8", errors="replace").strip()
+            if line and not on_line(line):
+                output.append(line)
+        await process.wait()
+        return subprocess.CompletedProcess(cmd, process.returncode, "\n".join(output), "")
+
+    try:
+        result = await asyncio.wait_for(collect(), timeout)
+    except asyncio.TimeoutError:
+        count_failure("timeout")
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    finally:
+        if pacer is not None:
+            pacer.cancel()
+        if process.returncode is None:
+            process.kill()
+            await process.wait()
+        observe_seconds("tool_seconds", tool, time.monotonic() - started)
+
+    if result.returncode != 0:
+        count_failure("tool_error")
+    return result
+
+
+async def run_probe_cmd(cmd: List[str], timeout: int, wait_when_full: bool = False) -> subprocess.CompletedProcess:
+    async with PROBE_LIMITER.slot(wait_when_full):
+        return await run_cmd(cmd, timeout)
 
 
 def parse_mkvinfo_output(text: str) -> List[Dict[str, Any]]:
@@ -396,6 +928,14 @@ def parse_ffprobe_streams(streams: List[Dict[str, Any]]) -> List[Dict[str, Any]]
     return parsed
 
 
+def parse_ffprobe_duration_us(probe_data: Dict[str, Any]) -> Optional[int]:
+    try:
+        duration = float((probe_data.get("format") or {}).get("duration") or 0)
+    except (TypeError, ValueError):
+        return None
+    return int(duration * 1000000) if duration > 0 else None
+
+
 def require_auth(authorization: Optional[str]) -> None:
     if not API_TOKEN:
         return
@@ -433,166 +973,433 @@ def apply_path_maps(video_path: str) -> str:
 def ensure_runtime_dirs() -> None:
     os.makedirs(CACHE_DIR, exist_ok=True)
     os.makedirs(WORK_DIR, exist_ok=True)
+    ensure_cache_index()
 
 
-def get_cache_path(video_path: str, source_lang: str, track_id: int) -> str:
-    import hashlib
+def hash_file_blocks(video_path: str, size: int) -> Optional[str]:
+    digest = hashlib.sha1(str(size).encode("ascii"))
+    try:
+        with open(video_path, "rb") as video_file:
+            for offset in sorted({0, size // 2, max(0, size - IDENTITY_BLOCK_SIZE)}):
+                video_file.seek(offset)
+                digest.update(video_file.read(IDENTITY_BLOCK_SIZE))
+    except OSError:
+        return None
+    return "{0}:{1}".format(size, digest.hexdigest())
+
+
+async def get_file_identity(video_path: str) -> str:
+    """
+    Return the content identity of video_path, or the path itself when the
+    file cannot be read (the tools will report that error).
+    """
+    with timed_stage("identity"):
+        try:
+            stat = await asyncio.to_thread(os.stat, video_path)
+        except OSError:
+            return video_path
+
+        memo_key = (video_path, stat.st_size, stat.st_mtime_ns)
+        identity = IDENTITY_MEMO.get(memo_key)
+        if identity is None:
+            identity = await asyncio.to_thread(hash_file_blocks, video_path, stat.st_size)
+    if identity is None:
+        return video_path
+    if memo_key not in IDENTITY_MEMO:
+        if len(IDENTITY_MEMO) >= IDENTITY_MEMO_LIMIT:
+            IDENTITY_MEMO.pop(next(iter(IDENTITY_MEMO)))
+        IDENTITY_MEMO[memo_key] = identity
+    return identity
+
+
+def get_cache_path(file_identity: str, source_lang: str, track_id: int) -> str:
     cache_key = hashlib.sha1(
-        "{0}|{1}|{2}".format(video_path, normalize_lang(source_lang), track_id).encode("utf-8")
+        "{0}|{1}|{2}".format(file_identity, normalize_lang(source_lang), track_id).encode("utf-8")
     ).hexdigest()
     return os.path.join(CACHE_DIR, cache_key + ".srt")
 
 
-def probe_embedded_tracks(video_path: str, language: str, timeout: int, prefer_non_sdh: bool = True) -> ProbeResponse:
-    resolved_video_path = apply_path_maps((video_path or "").strip())
-    extension = os.path.splitext(resolved_video_path)[1].lower()
+def subtitle_etag(cache_path: str) -> Optional[str]:
+    """
+    Return the ETag of a cached subtitle, the quoted SHA-256 of its bytes,
+    so a client can revalidate a copy it wrote without having kept the tag.
+    None when the file is gone.
+    """
+    try:
+        stat = os.stat(cache_path)
+    except OSError:
+        return None
 
-    if extension not in (".mkv", ".mp4"):
-        return ProbeResponse(
-            ok=False,
-            found=False,
-            message="Only MKV and MP4 probing are implemented currently.",
-            resolved_video_path=resolved_video_path
+    memo_key = (cache_path, stat.st_size, stat.st_mtime_ns)
+    etag = ETAG_MEMO.get(memo_key)
+    if etag is None:
+        try:
+            with open(cache_path, "rb") as cached_file:
+                etag = '"{0}"'.format(hashlib.sha256(cached_file.read()).hexdigest())
+        except OSError:
+            return None
+        if len(ETAG_MEMO) >= ETAG_MEMO_LIMIT:
+            ETAG_MEMO.pop(next(iter(ETAG_MEMO)), None)
+        ETAG_MEMO[memo_key] = etag
+    return etag
+
+
+def connect_cache_index() -> sqlite3.Connection:
+    # SQLite locking keeps the index consistent across uvicorn workers
+    return sqlite3.connect(CACHE_INDEX_PATH, timeout=30)
+
+
+def ensure_cache_index() -> None:
+    """
+    Create the cache index once per process and fold in subtitle files it
+    does not know yet (older cache layouts, other workers' crashes), so the
+    size budget covers everything in CACHE_DIR.
+    """
+    global CACHE_INDEX_READY
+    if CACHE_INDEX_READY:
+        return
+
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "name TEXT PRIMARY KEY, size INTEGER NOT NULL, created REAL NOT NULL, "
+            "last_access REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0, video_path TEXT)"
+        )
+        db.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS probes ("
+            "key TEXT PRIMARY KEY, tracks TEXT NOT NULL, duration_us INTEGER, created REAL NOT NULL)"
         )
+        known = {row[0] for row in db.execute("SELECT name FROM entries")}
+        on_disk = set()
+        for entry in os.scandir(CACHE_DIR):
+            if not entry.is_file() or not entry.name.endswith(".srt"):
+                continue
+            on_disk.add(entry.name)
+            if entry.name not in known:
+                stat = entry.stat()
+                db.execute(
+                    "INSERT OR IGNORE INTO entries (name, size, created, last_access) VALUES (?, ?, ?, ?)",
+                    (entry.name, stat.st_size, stat.st_mtime, stat.st_mtime)
+                )
+        db.executemany("DELETE FROM entries WHERE name = ?", [(name,) for name in known - on_disk])
+
+    CACHE_INDEX_READY = True
+    evict_cache_entries()
+
+
+def bump_cache_counter(db: sqlite3.Connection, name: str, amount: int = 1) -> None:
+    db.execute(
+        "INSERT INTO counters (name, value) VALUES (?, ?) "
+        "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+        (name, amount)
+    )
 
-    if extension == ".mkv":
-        if not command_exists("mkvinfo"):
-            return ProbeResponse(
-                ok=False,
-                found=False,
-                message="mkvinfo not found on extractor host",
-                resolved_video_path=resolved_video_path
-            )
 
-        try:
-            info_result = run_cmd(["mkvinfo", resolved_video_path], timeout=timeout)
-        except subprocess.TimeoutExpired:
-            return ProbeResponse(
-                ok=False,
-                found=False,
-                message="mkvinfo timed out after {0}s".format(timeout),
-                resolved_video_path=resolved_video_path
-            )
+def record_cache_hit(cache_path: str) -> None:
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "UPDATE entries SET last_access = ?, hits = hits + 1 WHERE name = ?",
+            (time.time(), os.path.basename(cache_path))
+        )
+        bump_cache_counter(db, "hits")
 
-        if info_result.returncode != 0:
-            return ProbeResponse(
-                ok=False,
-                found=False,
-                message="mkvinfo failed: {0}".format(info_result.stderr.strip() or info_result.stdout.strip() or "unknown_error"),
-                resolved_video_path=resolved_video_path,
-                diagnostic_preview=(info_result.stderr or info_result.stdout or "")[:4000]
-            )
 
-        tracks = parse_mkvinfo_output(info_result.stdout)
-        selected = choose_best_track(tracks, language, prefer_non_sdh, allow_unlabeled_fallback=False)
-        if not tracks:
-            return ProbeResponse(
-                ok=True,
-                found=False,
-                message="No subtitle tracks found in MKV",
-                all_tracks=[],
-                resolved_video_path=resolved_video_path,
-                diagnostic_preview=(info_result.stdout or "")[:4000]
-            )
+def record_cache_miss() -> None:
+    with contextlib.closing(connect_cache_index()) as db, db:
+        bump_cache_counter(db, "misses")
 
-        if not selected:
-            return ProbeResponse(
-                ok=True,
-                found=False,
-                message="No suitable subtitle track found for language '{0}'".format(language),
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
 
-        return ProbeResponse(
-            ok=True,
-            found=True,
-            message="Embedded subtitle track found",
-            selected_track=selected,
-            all_tracks=tracks,
-            resolved_video_path=resolved_video_path
+def add_cache_entry(cache_path: str, video_path: str) -> None:
+    now = time.time()
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "INSERT OR REPLACE INTO entries (name, size, created, last_access, hits, video_path) "
+            "VALUES (?, ?, ?, ?, 0, ?)",
+            (os.path.basename(cache_path), os.path.getsize(cache_path), now, now, video_path)
         )
+    evict_cache_entries()
+
+
+def evict_cache_entries() -> None:
+    """
+    Delete least recently used entries until the cache fits both the
+    EXTRACTOR_CACHE_MAX_MB and EXTRACTOR_CACHE_MAX_ENTRIES budgets.
+    """
+    with contextlib.closing(connect_cache_index()) as db, db:
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= CACHE_MAX_ENTRIES and total <= CACHE_MAX_BYTES:
+            return
+
+        evicted = []
+        for name, size in db.execute("SELECT name, size FROM entries ORDER BY last_access ASC"):
+            if count <= CACHE_MAX_ENTRIES and total <= CACHE_MAX_BYTES:
+                break
+            evicted.append(name)
+            count -= 1
+            total -= size
+
+        for name in evicted:
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except FileNotFoundError:
+                pass
+        db.executemany("DELETE FROM entries WHERE name = ?", [(name,) for name in evicted])
+        bump_cache_counter(db, "evictions", len(evicted))
+
+
+def cache_stats() -> Dict[str, Any]:
+    with contextlib.closing(connect_cache_index()) as db:
+        count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        counters = dict(db.execute("SELECT name, value FROM counters"))
+
+        probe_entries = db.execute("SELECT COUNT(*) FROM probes").fetchone()[0]
+
+    hits = counters.get("hits", 0)
+    misses = counters.get("misses", 0)
+    probe_lookups = sum(PROBE_STATS.values())
+    return {
+        "entries": count,
+        "bytes": total,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "max_bytes": CACHE_MAX_BYTES,
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else None,
+        "evictions": counters.get("evictions", 0),
+        "probes": {
+            "entries": probe_entries,
+            "memory_entries": len(PROBE_MEMO),
+            "memory_hits": PROBE_STATS["memory_hits"],
+            "disk_hits": PROBE_STATS["disk_hits"],
+            "misses": PROBE_STATS["misses"],
+            "hit_ratio": round(
+                (PROBE_STATS["memory_hits"] + PROBE_STATS["disk_hits"]) / probe_lookups, 4
+            ) if probe_lookups else None,
+        },
+    }
 
-    if not command_exists("ffprobe"):
-        return ProbeResponse(
-            ok=False,
-            found=False,
-            message="ffprobe not found on extractor host",
-            resolved_video_path=resolved_video_path
+
+def remember_probe(key: str, entry: Dict[str, Any]) -> None:
+    PROBE_MEMO[key] = entry
+    PROBE_MEMO.move_to_end(key)
+    while len(PROBE_MEMO) > PROBE_MEMO_LIMIT:
+        PROBE_MEMO.popitem(last=False)
+
+
+def read_probe_row(key: str) -> Optional[Any]:
+    with contextlib.closing(connect_cache_index()) as db:
+        return db.execute("SELECT tracks, duration_us FROM probes WHERE key = ?", (key,)).fetchone()
+
+
+async def lookup_probe_cache(key: str) -> Optional[Dict[str, Any]]:
+    entry = PROBE_MEMO.get(key)
+    if entry is not None:
+        PROBE_MEMO.move_to_end(key)
+        PROBE_STATS["memory_hits"] += 1
+        return entry
+
+    row = await asyncio.to_thread(read_probe_row, key)
+    if row is None:
+        PROBE_STATS["misses"] += 1
+        return None
+
+    entry = {"tracks": json.loads(row[0]), "duration_us": row[1]}
+    remember_probe(key, entry)
+    PROBE_STATS["disk_hits"] += 1
+    return entry
+
+
+def write_probe_row(key: str, tracks: List[Dict[str, Any]], duration_us: Optional[int]) -> None:
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "INSERT OR REPLACE INTO probes (key, tracks, duration_us, created) VALUES (?, ?, ?, ?)",
+            (key, json.dumps(tracks), duration_us, time.time())
+        )
+        db.execute(
+            "DELETE FROM probes WHERE key IN (SELECT key FROM probes ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (PROBE_CACHE_MAX_ENTRIES,)
         )
 
+
+async def store_probe_cache(key: str, tracks: List[Dict[str, Any]], duration_us: Optional[int]) -> None:
+    remember_probe(key, {"tracks": tracks, "duration_us": duration_us})
+    await asyncio.to_thread(write_probe_row, key, tracks, duration_us)
+
+
+def container_labels(extension: str):
+    return ("MKV", "track") if extension == ".mkv" else ("MP4", "stream")
+
+
+async def run_track_probe(resolved_video_path: str, extension: str, timeout: int, wait_when_full: bool) -> Dict[str, Any]:
+    tool = "mkvinfo" if extension == ".mkv" else "ffprobe"
+    if not command_exists(tool):
+        count_failure("tool_missing")
+        return {"ok": False, "message": "{0} not found on extractor host".format(tool)}
+
+    if extension == ".mkv":
+        cmd = ["mkvinfo", resolved_video_path]
+    else:
+        cmd = [
+            "ffprobe",
+            "-v", "error",
+            "-print_format", "json",
+            "-show_format",
+            "-show_streams",
+            resolved_video_path,
+        ]
+
     try:
-        probe_result = run_cmd(
-            [
-                "ffprobe",
-                "-v", "error",
-                "-print_format", "json",
-                "-show_streams",
-                resolved_video_path,
-            ],
-            timeout=timeout
-        )
+        result = await run_probe_cmd(cmd, timeout, wait_when_full)
     except subprocess.TimeoutExpired:
-        return ProbeResponse(
-            ok=False,
-            found=False,
-            message="ffprobe timed out after {0}s".format(timeout),
-            resolved_video_path=resolved_video_path
-        )
+        return {"ok": False, "message": "{0} timed out after {1}s".format(tool, timeout)}
+
+    if result.returncode != 0:
+        return {
+            "ok": False,
+            "message": "{0} failed: {1}".format(tool, result.stderr.strip() or result.stdout.strip() or "unknown_error"),
+            "diagnostic_preview": (result.stderr or result.stdout or "")[:4000],
+        }
+
+    if extension == ".mkv":
+        return {
+            "ok": True,
+            "tracks": parse_mkvinfo_output(result.stdout),
+            "duration_us": None,
+            "diagnostic_preview": (result.stdout or "")[:4000],
+        }
+
+    try:
+        probe_data = json.loads(result.stdout or "{}")
+    except Exception:
+        count_failure("invalid_probe_output")
+        return {
+            "ok": False,
+            "message": "ffprobe returned invalid JSON",
+            "diagnostic_preview": (result.stdout or "")[:4000],
+        }
+
+    return {
+        "ok": True,
+        "tracks": parse_ffprobe_streams(probe_data.get("streams") or []),
+        "duration_us": parse_ffprobe_duration_us(probe_data),
+        "diagnostic_preview": json.dumps(probe_data.get("streams") or [], ensure_ascii=False)[:4000],
+    }
+
+
+async def probe_tracks(resolved_video_path: str, extension: str, timeout: int, wait_when_full: bool = False) -> Dict[str, Any]:
+    """
+    Return the subtitle tracks of an MKV or MP4 as
+    {"ok", "tracks", "duration_us", "identity", "cache_hit", "message",
+    "diagnostic_preview"}. Successful probes are cached by file identity in
+    memory and in the cache index, so a file is only probed again after it
+    changes.
+    """
+    ensure_runtime_dirs()
+    identity = await get_file_identity(resolved_video_path)
+    key = "{0}|{1}|{2}".format(PROBE_CACHE_VERSION, extension, identity)
+    cached = await lookup_probe_cache(key)
+    if cached is not None:
+        return {
+            "ok": True,
+            "tracks": [dict(track) for track in cached["tracks"]],
+            "duration_us": cached["duration_us"],
+            "identity": identity,
+            "cache_hit": True,
+            "message": "",
+            "diagnostic_preview": None,
+        }
+
+    result = await run_track_probe(resolved_video_path, extension, timeout, wait_when_full)
+    # An unreadable file has no real identity yet, so it is not cached
+    if result["ok"] and identity != resolved_video_path:
+        await store_probe_cache(key, result["tracks"], result["duration_us"])
+    result.update(identity=identity, cache_hit=False)
+    result.setdefault("diagnostic_preview", None)
+    return result
+
+
+async def probe_embedded_tracks(
+    video_path: str,
+    language: str,
+    timeout: int,
+    prefer_non_sdh: bool = True,
+    wait_when_full: bool = False
+) -> ProbeResponse:
+    resolved_video_path = apply_path_maps((video_path or "").strip())
+    extension = os.path.splitext(resolved_video_path)[1].lower()
 
-    if probe_result.returncode != 0:
+    if extension not in (".mkv", ".mp4"):
+        count_failure("unsupported_container")
         return ProbeResponse(
             ok=False,
             found=False,
-            message="ffprobe failed: {0}".format(probe_result.stderr.strip() or probe_result.stdout.strip() or "unknown_error"),
-            resolved_video_path=resolved_video_path,
-            diagnostic_preview=(probe_result.stderr or probe_result.stdout or "")[:4000]
+            message="Only MKV and MP4 probing are implemented currently.",
+            resolved_video_path=resolved_video_path
         )
 
-    try:
-        probe_data = json.loads(probe_result.stdout or "{}")
-    except Exception:
+    probe = await probe_tracks(resolved_video_path, extension, timeout, wait_when_full)
+    if not probe["ok"]:
         return ProbeResponse(
             ok=False,
             found=False,
-            message="ffprobe returned invalid JSON",
+            message=probe["message"],
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=(probe_result.stdout or "")[:4000]
+            diagnostic_preview=probe["diagnostic_preview"]
         )
 
-    tracks = parse_ffprobe_streams(probe_data.get("streams") or [])
+    container, noun = container_labels(extension)
+    tracks = probe["tracks"]
     selected = choose_best_track(tracks, language, prefer_non_sdh, allow_unlabeled_fallback=False)
-
     if not tracks:
         return ProbeResponse(
             ok=True,
             found=False,
-            message="No subtitle streams found in MP4",
+            message="No subtitle {0}s found in {1}".format(noun, container),
             all_tracks=[],
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=json.dumps(probe_data.get("streams") or [], ensure_ascii=False)[:4000]
+            cache_hit=probe["cache_hit"],
+            diagnostic_preview=probe["diagnostic_preview"]
         )
 
     if not selected:
         return ProbeResponse(
             ok=True,
             found=False,
-            message="No suitable subtitle stream found for language '{0}'".format(language),
+            message="No suitable subtitle {0} found for language '{1}'".format(noun, language),
             all_tracks=tracks,
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=json.dumps(probe_data.get("streams") or [], ensure_ascii=False)[:4000]
+            cache_hit=probe["cache_hit"]
         )
 
     return ProbeResponse(
         ok=True,
         found=True,
-        message="Embedded subtitle stream found",
+        message="Embedded subtitle {0} found".format(noun),
         selected_track=selected,
         all_tracks=tracks,
-        resolved_video_path=resolved_video_path
+        resolved_video_path=resolved_video_path,
+        cache_hit=probe["cache_hit"]
     )
 
 
+def trim_response(response: Any, diagnostics: bool, include_content: bool = True) -> Any:
+    """
+    Drop the track list and tool output from a probe, extract or resolve
+    response unless diagnostics were requested, and the subtitle text when
+    the client downloads it from /subtitles instead.
+    """
+    if not diagnostics:
+        response.all_tracks = []
+        response.diagnostic_preview = None
+    if not include_content and getattr(response, "extracted_srt_content", None) is not None:
+        response.extracted_srt_content = None
+    extraction = getattr(response, "extraction", None)
+    if extraction is not None:
+        trim_response(extraction, diagnostics, include_content)
+    return response
+
+
 @app.get("/health")
 def health():
     ensure_runtime_dirs()
@@ -604,328 +1411,1132 @@ def health():
         "work_dir": WORK_DIR,
         "path_maps": len(PATH_MAPS),
         "auth_enabled": bool(API_TOKEN),
+        "probe_slots": PROBE_LIMITER.stats(),
+        "extract_slots": EXTRACT_LIMITER.stats(),
+        "warmer": dict(WARMER_STATUS, enabled=bool(WARM_LANGUAGES)),
     }
 
 
-@app.post("/probe", response_model=ProbeResponse)
-def probe_subtitle(req: ProbeRequest, authorization: Optional[str] = Header(default=None)):
+@app.get("/metrics")
+def get_metrics(authorization: Optional[str] = Header(default=None)):
     require_auth(authorization)
-    ensure_runtime_dirs()
+    return Response(content=render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
-    video_path = (req.video_path or "").strip()
-    language = (req.language or "").strip()
-    timeout = req.timeout
 
-    if not video_path:
-        raise HTTPException(status_code=400, detail="video_path is required")
-    if not language:
-        raise HTTPException(status_code=400, detail="language is required")
-    if timeout <= 0:
-        raise HTTPException(status_code=400, detail="timeout must be greater than 0")
-
-    return probe_embedded_tracks(video_path, language, timeout, req.prefer_non_sdh)
+@app.get("/cache/stats")
+def get_cache_stats(authorization: Optional[str] = Header(default=None)):
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    return cache_stats()
 
 
-@app.post("/extract", response_model=ExtractResponse)
-def extract_subtitle(req: ExtractRequest, authorization: Optional[str] = Header(default=None)):
+@app.post("/probe", response_model=ProbeResponse)
+async def probe_subtitle(req: ProbeRequest, authorization: Optional[str] = Header(default=None)):
     require_auth(authorization)
     ensure_runtime_dirs()
 
     video_path = (req.video_path or "").strip()
-    source_lang = (req.source_lang or "").strip()
+    language = (req.language or "").strip()
     timeout = req.timeout
 
     if not video_path:
         raise HTTPException(status_code=400, detail="video_path is required")
-    if not source_lang:
-        raise HTTPException(status_code=400, detail="source_lang is required")
+    if not language:
+        raise HTTPException(status_code=400, detail="language is required")
     if timeout <= 0:
         raise HTTPException(status_code=400, detail="timeout must be greater than 0")
 
-    resolved_video_path = apply_path_maps(video_path)
-    extension = os.path.splitext(resolved_video_path)[1].lower()
-    if extension not in (".mkv", ".mp4"):
-        return ExtractResponse(
-            ok=False,
-            message="Only MKV and MP4 extraction are implemented currently.",
-            resolved_video_path=resolved_video_path
-        )
+    response = await probe_embedded_tracks(video_path, language, timeout, req.prefer_non_sdh)
+    return trim_response(response, req.diagnostics)
 
-    if extension == ".mkv":
-        if not command_exists("mkvinfo"):
-            return ExtractResponse(
-                ok=False,
-                message="mkvinfo not found on extractor host",
-                resolved_video_path=resolved_video_path
-            )
 
-        if not command_exists("mkvextract"):
-            return ExtractResponse(
-                ok=False,
-                message="mkvextract not found on extractor host",
-                resolved_video_path=resolved_video_path
-            )
+def read_cached_subtitle(cache_path: str) -> Optional[str]:
+    try:
+        with open(cache_path, "r", encoding="utf-8", errors="ignore") as cached_file:
+            return cached_file.read()
+    except FileNotFoundError:
+        return None
 
-        try:
-            info_result = run_cmd(["mkvinfo", resolved_video_path], timeout=timeout)
-        except subprocess.TimeoutExpired:
-            return ExtractResponse(
-                ok=False,
-                message="mkvinfo timed out after {0}s".format(timeout),
-                resolved_video_path=resolved_video_path
-            )
 
-        if info_result.returncode != 0:
-            return ExtractResponse(
-                ok=False,
-                message="mkvinfo failed: {0}".format(info_result.stderr.strip() or info_result.stdout.strip() or "unknown_error"),
-                resolved_video_path=resolved_video_path
-            )
+async def cached_outcome(cache_path: str) -> Optional[Dict[str, Any]]:
+    with timed_stage("cache_read"):
+        cached_content = await asyncio.to_thread(read_cached_subtitle, cache_path)
+    if not cached_content:
+        return None
+    METRICS["cache_hits"] += 1
+    await asyncio.to_thread(record_cache_hit, cache_path)
+    return {
+        "ok": True,
+        "message": "Using cached extracted subtitle",
+        "method": "cache",
+        "cache_hit": True,
+        "path": cache_path,
+        "content": cached_content,
+    }
 
-        tracks = parse_mkvinfo_output(info_result.stdout)
-        selected = choose_best_track(tracks, source_lang, req.prefer_non_sdh, allow_unlabeled_fallback=True)
 
-        if not tracks:
-            return ExtractResponse(
-                ok=False,
-                message="No subtitle tracks found in MKV",
-                all_tracks=[],
-                resolved_video_path=resolved_video_path,
-                diagnostic_preview=(info_result.stdout or "")[:4000]
-            )
+async def acquire_cache_lock(cache_path: str, timeout: int) -> Optional[int]:
+    """
+    Take the cross-process lock for one cache entry, so uvicorn workers never
+    extract the same track at once. Returns the lock fd, or None after
+    timeout seconds.
+    """
+    lock_dir = os.path.join(CACHE_DIR, ".locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_fd = os.open(os.path.join(lock_dir, os.path.basename(cache_path) + ".lock"), os.O_CREAT | os.O_RDWR, 0o644)
+    deadline = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return lock_fd
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    os.close(lock_fd)
+                    return None
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+    except asyncio.CancelledError:
+        os.close(lock_fd)
+        raise
+
+
+def release_cache_lock(lock_fd: int) -> None:
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+    finally:
+        os.close(lock_fd)
 
-        if not selected:
-            return ExtractResponse(
-                ok=False,
-                message="No suitable subtitle track found for language '{0}'".format(source_lang),
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
 
-        cache_path = get_cache_path(resolved_video_path, source_lang, selected["mkvextract_id"])
-        if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0 and not req.force_reextract:
-            with open(cache_path, "r", encoding="utf-8", errors="ignore") as cached_file:
-                cached_content = cached_file.read()
-            return ExtractResponse(
-                ok=True,
-                message="Using cached extracted subtitle",
-                method="cache",
-                cache_hit=True,
-                extracted_srt_path=cache_path,
-                extracted_srt_content=cached_content,
-                selected_track=selected,
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
+def publish_to_cache(work_path: str, cache_path: str) -> None:
+    # WORK_DIR and CACHE_DIR may be different volumes: copy next to the
+    # cache entry first so the final rename is atomic for readers.
+    temp_path = "{0}.{1}.tmp".format(cache_path, uuid.uuid4().hex)
+    try:
+        shutil.copy2(work_path, temp_path)
+        os.replace(temp_path, cache_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def store_extracted_track(work_path: str, cache_path: str, video_path: str) -> str:
+    """
+    Publish a finished work file as cache_path, index it (evicting old
+    entries when over budget) and return its text. Blocking; run it in a
+    thread.
+    """
+    with open(work_path, "r", encoding="utf-8", errors="ignore") as subtitle_file:
+        subtitle_text = subtitle_file.read()
+    publish_to_cache(work_path, cache_path)
+    add_cache_entry(cache_path, video_path)
+    return subtitle_text
+
+
+async def extract_track_to_cache(
+    video_path: str,
+    tool: str,
+    command_for: Callable[[str], List[str]],
+    parse_progress: Callable[[str], Any],
+    cache_path: str,
+    work_name: str,
+    timeout: int,
+    force_reextract: bool,
+    report: Callable[[str, Optional[float]], None],
+    wait_when_full: bool = False
+) -> Dict[str, Any]:
+    """
+    Extract one track with tool into cache_path under the entry's file lock.
+    The tool writes to a work file unique to this run. parse_progress(line)
+    returns (is_progress_line, percent or None).
+    Returns {"ok", "message", "method", "cache_hit", "path", "content"}.
+    """
+    with timed_stage("lock_wait"):
+        lock_fd = await acquire_cache_lock(cache_path, timeout)
+    if lock_fd is None:
+        count_failure("lock_timeout")
+        return {"ok": False, "message": "Timed out after {0}s waiting for another extraction of this track".format(timeout)}
+
+    work_path = os.path.join(WORK_DIR, "{0}.{1}.srt".format(work_name, uuid.uuid4().hex[:12]))
+    try:
+        # Another worker may have filled the entry while we waited for the lock
+        cached = None if force_reextract else await cached_outcome(cache_path)
+        if cached is not None:
+            return cached
+        METRICS["cache_misses"] += 1
+        await asyncio.to_thread(record_cache_miss)
 
-        temp_output = os.path.join(
-            WORK_DIR,
-            "{0}.track{1}.srt".format(
-                safe_name(os.path.splitext(os.path.basename(resolved_video_path))[0]),
-                selected["mkvextract_id"]
-            )
-        )
+        report("queued", None)
 
-        if os.path.exists(temp_output):
-            os.remove(temp_output)
+        def on_line(line: str) -> bool:
+            is_progress, percent = parse_progress(line)
+            if percent is not None:
+                report("extracting", percent)
+            return is_progress
 
         try:
-            extract_result = run_cmd(
-                ["mkvextract", "tracks", resolved_video_path, "{0}:{1}".format(selected["mkvextract_id"], temp_output)],
-                timeout=timeout
-            )
+            async with EXTRACT_LIMITER.slot(wait_when_full):
+                report("extracting", 0.0)
+                extract_result = await run_cmd(command_for(work_path), timeout, on_line)
         except subprocess.TimeoutExpired:
-            return ExtractResponse(
-                ok=False,
-                message="mkvextract timed out after {0}s".format(timeout),
-                selected_track=selected,
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
+            return {"ok": False, "message": "{0} timed out after {1}s".format(tool, timeout)}
 
         if extract_result.returncode != 0:
-            return ExtractResponse(
-                ok=False,
-                message="mkvextract failed: {0}".format(extract_result.stderr.strip() or extract_result.stdout.strip() or "unknown_error"),
-                selected_track=selected,
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
-
-        if not os.path.exists(temp_output) or os.path.getsize(temp_output) == 0:
-            return ExtractResponse(
-                ok=False,
-                message="mkvextract produced no subtitle file",
-                selected_track=selected,
-                all_tracks=tracks,
-                resolved_video_path=resolved_video_path
-            )
+            return {
+                "ok": False,
+                "message": "{0} failed: {1}".format(
+                    tool,
+                    extract_result.stderr.strip() or extract_result.stdout.strip() or "unknown_error"
+                ),
+            }
 
-        shutil.copy2(temp_output, cache_path)
-        with open(cache_path, "r", encoding="utf-8", errors="ignore") as subtitle_file:
-            subtitle_text = subtitle_file.read()
+        if not os.path.exists(work_path) or os.path.getsize(work_path) == 0:
+            count_failure("empty_output")
+            return {"ok": False, "message": "{0} produced no subtitle file".format(tool)}
+
+        report("caching", 100.0)
+        with timed_stage("cache_write"):
+            METRICS["extracted_bytes"] += os.path.getsize(work_path)
+            subtitle_text = await asyncio.to_thread(store_extracted_track, work_path, cache_path, video_path)
+
+        return {
+            "ok": True,
+            "message": "{0} success".format(tool),
+            "method": tool,
+            "cache_hit": False,
+            "path": cache_path,
+            "content": subtitle_text,
+        }
+    finally:
+        if os.path.exists(work_path):
+            os.remove(work_path)
+        release_cache_lock(lock_fd)
+
+
+async def run_flight(flight: Dict[str, Any], work: Callable[..., Any]) -> Dict[str, Any]:
+    def report(stage: str, percent: Optional[float] = None) -> None:
+        for reporter in list(flight["reporters"]):
+            reporter(stage, percent)
 
+    try:
+        return await work(report)
+    except asyncio.CancelledError:
+        if flight["preempted"]:
+            return {"ok": False, "message": "Stopped for a client request of the same track"}
+        raise
+    except HTTPException:
+        raise
+    except Exception as exc:
+        count_failure("crashed")
+        return {"ok": False, "message": "Extraction crashed: {0}".format(exc)}
+
+
+async def extract_track_once(
+    cache_path: str,
+    force_reextract: bool,
+    work: Callable[..., Any],
+    report: Callable[[str, Optional[float]], None],
+    wait_when_full: bool = False
+) -> Dict[str, Any]:
+    """
+    Await work(report) once per cache entry and force_reextract in this
+    process. Requests for a track that is already being extracted wait for
+    that run and share its result, and every caller's report sees its
+    progress. The run is only cancelled when every waiting caller has been
+    cancelled.
+    The run is started with the first caller's wait_when_full. When it is
+    turned away as busy, callers that may wait start a run of their own
+    instead of failing with it.
+    Background (warmer) runs are kept apart: a client request stops a
+    background run of the same track and extracts it at full speed instead
+    of joining it.
+    """
+    background = BACKGROUND_WORK.get()
+    key = (cache_path, force_reextract, background)
+    if not background:
+        for forced in (False, True):
+            warming = FLIGHTS.get((cache_path, forced, True))
+            if warming is not None and not warming["preempted"]:
+                warming["preempted"] = True
+                warming["task"].cancel()
+
+    while True:
+        flight = FLIGHTS.get(key)
+        if flight is None:
+            flight = {"reporters": [], "task": None, "preempted": False, "wait_when_full": wait_when_full}
+            flight["task"] = asyncio.create_task(run_flight(flight, work))
+            FLIGHTS[key] = flight
+
+            def forget(task: asyncio.Task, flight: Dict[str, Any] = flight) -> None:
+                if FLIGHTS.get(key) is flight:
+                    del FLIGHTS[key]
+
+            flight["task"].add_done_callback(forget)
+
+        flight["reporters"].append(report)
+        try:
+            return await asyncio.shield(flight["task"])
+        except asyncio.CancelledError:
+            flight["reporters"].remove(report)
+            if not flight["reporters"]:
+                flight["task"].cancel()
+                # New requests must not join a run that is being stopped
+                if FLIGHTS.get(key) is flight:
+                    del FLIGHTS[key]
+            raise
+        except HTTPException as exc:
+            if exc.status_code != 503 or not wait_when_full or flight["wait_when_full"]:
+                raise
+            flight["reporters"].remove(report)
+            if FLIGHTS.get(key) is flight:
+                del FLIGHTS[key]
+
+
+async def track_extract_response(
+    outcome: Dict[str, Any],
+    selected: Dict[str, Any],
+    tracks: List[Dict[str, Any]],
+    resolved_video_path: str
+) -> ExtractResponse:
+    if not outcome.get("ok"):
         return ExtractResponse(
-            ok=True,
-            message="mkvextract success",
-            method="mkvextract",
-            cache_hit=False,
-            extracted_srt_path=cache_path,
-            extracted_srt_content=subtitle_text,
+            ok=False,
+            message=outcome.get("message") or "unknown_error",
             selected_track=selected,
             all_tracks=tracks,
             resolved_video_path=resolved_video_path
         )
 
-    if not command_exists("ffprobe"):
-        return ExtractResponse(
-            ok=False,
-            message="ffprobe not found on extractor host",
-            resolved_video_path=resolved_video_path
-        )
+    return ExtractResponse(
+        ok=True,
+        message=outcome["message"],
+        method=outcome["method"],
+        cache_hit=outcome["cache_hit"],
+        extracted_srt_path=outcome["path"],
+        extracted_srt_content=outcome["content"],
+        subtitle_id=os.path.basename(outcome["path"]),
+        etag=await asyncio.to_thread(subtitle_etag, outcome["path"]),
+        selected_track=selected,
+        all_tracks=tracks,
+        resolved_video_path=resolved_video_path
+    )
 
-    if not command_exists("ffmpeg"):
-        return ExtractResponse(
-            ok=False,
-            message="ffmpeg not found on extractor host",
-            resolved_video_path=resolved_video_path
-        )
 
-    try:
-        probe_result = run_cmd(
-            [
-                "ffprobe",
-                "-v", "error",
-                "-print_format", "json",
-                "-show_streams",
-                resolved_video_path,
-            ],
-            timeout=timeout
-        )
-    except subprocess.TimeoutExpired:
+def validate_extract_request(req: ExtractRequest) -> None:
+    if not (req.video_path or "").strip():
+        raise HTTPException(status_code=400, detail="video_path is required")
+    if not (req.source_lang or "").strip():
+        raise HTTPException(status_code=400, detail="source_lang is required")
+    if req.timeout <= 0:
+        raise HTTPException(status_code=400, detail="timeout must be greater than 0")
+
+
+async def extract_embedded_track(
+    req: ExtractRequest,
+    report: Optional[Callable[[str, Optional[float]], None]] = None,
+    wait_when_full: bool = False
+) -> ExtractResponse:
+    """
+    Probe the video, pick the source track and extract it into the cache.
+    report(stage, percent) is called as the job moves through "probing",
+    "queued", "extracting" and "caching"; percent is None when it is not
+    known. Raises the 503 HTTPException when the probe or extract queue is
+    full, unless wait_when_full is set.
+    """
+    report = report or (lambda stage, percent=None: None)
+    resolved_video_path = apply_path_maps((req.video_path or "").strip())
+    extension = os.path.splitext(resolved_video_path)[1].lower()
+    if extension not in (".mkv", ".mp4"):
+        count_failure("unsupported_container")
         return ExtractResponse(
             ok=False,
-            message="ffprobe timed out after {0}s".format(timeout),
+            message="Only MKV and MP4 extraction are implemented currently.",
             resolved_video_path=resolved_video_path
         )
 
-    if probe_result.returncode != 0:
+    report("probing", None)
+    probe = await probe_tracks(resolved_video_path, extension, req.timeout, wait_when_full)
+    if not probe["ok"]:
         return ExtractResponse(
             ok=False,
-            message="ffprobe failed: {0}".format(probe_result.stderr.strip() or probe_result.stdout.strip() or "unknown_error"),
+            message=probe["message"],
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=(probe_result.stderr or probe_result.stdout or "")[:4000]
+            diagnostic_preview=probe["diagnostic_preview"]
         )
 
-    try:
-        probe_data = json.loads(probe_result.stdout or "{}")
-    except Exception:
+    return await extract_probed_track(req, resolved_video_path, extension, probe, report, wait_when_full)
+
+
+async def extract_probed_track(
+    req: ExtractRequest,
+    resolved_video_path: str,
+    extension: str,
+    probe: Dict[str, Any],
+    report: Callable[[str, Optional[float]], None],
+    wait_when_full: bool = False
+) -> ExtractResponse:
+    """
+    Pick the source track from a probe_tracks() result and extract it into
+    the cache.
+    """
+    source_lang = (req.source_lang or "").strip()
+    timeout = req.timeout
+    tool = "mkvextract" if extension == ".mkv" else "ffmpeg"
+    if not command_exists(tool):
+        count_failure("tool_missing")
         return ExtractResponse(
             ok=False,
-            message="ffprobe returned invalid JSON",
-            resolved_video_path=resolved_video_path,
-            diagnostic_preview=(probe_result.stdout or "")[:4000]
+            message="{0} not found on extractor host".format(tool),
+            resolved_video_path=resolved_video_path
         )
 
-    tracks = parse_ffprobe_streams(probe_data.get("streams") or [])
+    container, noun = container_labels(extension)
+    tracks = probe["tracks"]
     selected = choose_best_track(tracks, source_lang, req.prefer_non_sdh, allow_unlabeled_fallback=True)
-
     if not tracks:
+        count_failure("no_subtitle_tracks")
         return ExtractResponse(
             ok=False,
-            message="No subtitle streams found in MP4",
+            message="No subtitle {0}s found in {1}".format(noun, container),
             all_tracks=[],
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=json.dumps(probe_data.get("streams") or [], ensure_ascii=False)[:4000]
+            diagnostic_preview=probe["diagnostic_preview"]
         )
 
     if not selected:
+        count_failure("no_matching_track")
         return ExtractResponse(
             ok=False,
-            message="No suitable subtitle stream found for language '{0}'".format(source_lang),
+            message="No suitable subtitle {0} found for language '{1}'".format(noun, source_lang),
             all_tracks=tracks,
+            resolved_video_path=resolved_video_path
+        )
+
+    video_stem = safe_name(os.path.splitext(os.path.basename(resolved_video_path))[0])
+    if extension == ".mkv":
+        track_id = selected["mkvextract_id"]
+        work_name = "{0}.track{1}".format(video_stem, track_id)
+
+        def command_for(output_path: str) -> List[str]:
+            return [
+                "mkvextract",
+                "--gui-mode",
+                "tracks",
+                resolved_video_path,
+                "{0}:{1}".format(track_id, output_path),
+            ]
+
+        def parse_progress(line: str):
+            match = MKVEXTRACT_PROGRESS_RE.match(line)
+            return (True, float(match.group(1))) if match else (False, None)
+    else:
+        track_id = selected["track_number"]
+        subtitle_index = selected["ffmpeg_sub_index"]
+        work_name = "{0}.stream{1}".format(video_stem, subtitle_index)
+        duration_us = probe["duration_us"]
+
+        def command_for(output_path: str) -> List[str]:
+            return [
+                "ffmpeg",
+                "-y",
+                "-loglevel", "error",
+                "-nostats",
+                "-progress", "pipe:1",
+                "-i", resolved_video_path,
+                "-map", "0:s:{0}".format(subtitle_index),
+                output_path,
+            ]
+
+        def parse_progress(line: str):
+            match = FFMPEG_OUT_TIME_RE.match(line)
+            if match:
+                if not duration_us:
+                    return True, None
+                return True, min(99.0, 100.0 * int(match.group(1)) / duration_us)
+            return bool(FFMPEG_PROGRESS_KEY_RE.match(line)), None
+
+    cache_path = get_cache_path(probe["identity"], source_lang, track_id)
+    cached = None if req.force_reextract else await cached_outcome(cache_path)
+    if cached is not None:
+        return await track_extract_response(cached, selected, tracks, resolved_video_path)
+
+    outcome = await extract_track_once(
+        cache_path,
+        req.force_reextract,
+        lambda flight_report: extract_track_to_cache(
+            video_path=resolved_video_path,
+            tool=tool,
+            command_for=command_for,
+            parse_progress=parse_progress,
+            cache_path=cache_path,
+            work_name=work_name,
+            timeout=timeout,
+            force_reextract=req.force_reextract,
+            report=flight_report,
+            wait_when_full=wait_when_full
+        ),
+        report,
+        wait_when_full=wait_when_full
+    )
+    return await track_extract_response(outcome, selected, tracks, resolved_video_path)
+
+
+@app.post("/extract", response_model=ExtractResponse)
+async def extract_subtitle(req: ExtractRequest, authorization: Optional[str] = Header(default=None)):
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    validate_extract_request(req)
+    return trim_response(await extract_embedded_track(req), req.diagnostics, req.include_content)
+
+
+async def resolve_embedded_track(req: ResolveRequest, extract_req: ExtractRequest) -> ResolveResponse:
+    """
+    Probe the video once and answer whether the target language is already
+    embedded; if it is not, extract the source track in the same request,
+    or with as_job start the extraction as a job and return its job_id.
+    """
+    target_lang = req.target_lang.strip()
+    resolved_video_path = apply_path_maps(req.video_path.strip())
+    extension = os.path.splitext(resolved_video_path)[1].lower()
+    if extension not in (".mkv", ".mp4"):
+        count_failure("unsupported_container")
+        return ResolveResponse(
+            ok=False,
+            message="Only MKV and MP4 files are supported currently.",
+            resolved_video_path=resolved_video_path
+        )
+
+    # A 503 here would send the client to separate /probe and /jobs requests
+    probe = await probe_tracks(resolved_video_path, extension, req.timeout, wait_when_full=True)
+    if not probe["ok"]:
+        return ResolveResponse(
+            ok=False,
+            message=probe["message"],
             resolved_video_path=resolved_video_path,
-            diagnostic_preview=json.dumps(probe_data.get("streams") or [], ensure_ascii=False)[:4000]
+            diagnostic_preview=probe["diagnostic_preview"]
         )
 
-    cache_path = get_cache_path(resolved_video_path, source_lang, selected["track_number"])
-    if os.path.exists(cache_path) and os.path.getsize(cache_path) > 0 and not req.force_reextract:
-        with open(cache_path, "r", encoding="utf-8", errors="ignore") as cached_file:
-            cached_content = cached_file.read()
-        return ExtractResponse(
+    tracks = probe["tracks"]
+    target = choose_best_track(tracks, target_lang, req.prefer_non_sdh, allow_unlabeled_fallback=False)
+    if target:
+        _container, noun = container_labels(extension)
+        return ResolveResponse(
             ok=True,
-            message="Using cached extracted subtitle",
-            method="cache",
-            cache_hit=True,
-            extracted_srt_path=cache_path,
-            extracted_srt_content=cached_content,
-            selected_track=selected,
+            message="Embedded {0} subtitle {1} found".format(target_lang, noun),
+            target_found=True,
+            target_track=target,
+            probe_cache_hit=probe["cache_hit"],
             all_tracks=tracks,
             resolved_video_path=resolved_video_path
         )
 
-    temp_output = os.path.join(
-        WORK_DIR,
-        "{0}.stream{1}.srt".format(
-            safe_name(os.path.splitext(os.path.basename(resolved_video_path))[0]),
-            selected["ffmpeg_sub_index"]
+    def extract(report: Callable[[str, Optional[float]], None]) -> Awaitable[ExtractResponse]:
+        return extract_probed_track(
+            extract_req,
+            resolved_video_path,
+            extension,
+            probe,
+            report,
+            wait_when_full=True
+        )
+
+    if req.as_job:
+        job = start_extract_job(extract_req, extract)
+        return ResolveResponse(
+            ok=True,
+            message="Extraction job {0} started".format(job["id"]),
+            probe_cache_hit=probe["cache_hit"],
+            all_tracks=tracks,
+            resolved_video_path=resolved_video_path,
+            job_id=job["id"],
+            diagnostic_preview=probe["diagnostic_preview"]
+        )
+
+    extraction = await extract(lambda stage, percent=None: None)
+    # The track list is already at the top level
+    extraction.all_tracks = []
+    return ResolveResponse(
+        ok=extraction.ok,
+        message=extraction.message,
+        probe_cache_hit=probe["cache_hit"],
+        all_tracks=tracks,
+        resolved_video_path=resolved_video_path,
+        extraction=extraction,
+        diagnostic_preview=probe["diagnostic_preview"]
+    )
+
+
+@app.post("/resolve", response_model=ResolveResponse)
+async def resolve_subtitle(req: ResolveRequest, authorization: Optional[str] = Header(default=None)):
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    extract_req = ExtractRequest(
+        video_path=req.video_path,
+        source_lang=req.source_lang,
+        timeout=req.timeout,
+        prefer_non_sdh=req.prefer_non_sdh,
+        allow_ffmpeg_fallback=req.allow_ffmpeg_fallback,
+        force_reextract=req.force_reextract,
+        include_content=req.include_content,
+        diagnostics=req.diagnostics
+    )
+    validate_extract_request(extract_req)
+    if not (req.target_lang or "").strip():
+        raise HTTPException(status_code=400, detail="target_lang is required")
+
+    response = await resolve_embedded_track(req, extract_req)
+    return trim_response(response, req.diagnostics, req.include_content)
+
+
+@app.get("/subtitles/{subtitle_id}")
+async def download_subtitle(
+    subtitle_id: str,
+    authorization: Optional[str] = Header(default=None),
+    if_none_match: Optional[str] = Header(default=None)
+):
+    """
+    Stream a cached subtitle as plain SRT. subtitle_id and etag come from an
+    /extract, /resolve or job result; a matching If-None-Match answers 304.
+    """
+    require_auth(authorization)
+    if not SUBTITLE_ID_RE.match(subtitle_id):
+        raise HTTPException(status_code=404, detail="Unknown subtitle")
+
+    cache_path = os.path.join(CACHE_DIR, subtitle_id)
+    etag = await asyncio.to_thread(subtitle_etag, cache_path)
+    if etag is None:
+        raise HTTPException(status_code=404, detail="Subtitle is no longer cached")
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and (
+        if_none_match.strip() == "*" or etag in (tag.strip() for tag in if_none_match.split(","))
+    ):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(cache_path, media_type="application/x-subrip", headers=headers)
+
+
+def validate_batch(video_paths: List[str]) -> None:
+    if not video_paths:
+        raise HTTPException(status_code=400, detail="video_paths is required")
+    if len(video_paths) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail="At most {0} video_paths per batch".format(MAX_BATCH_ITEMS)
+        )
+
+
+async def stream_batch(
+    video_paths: List[str],
+    parallelism: int,
+    run_item: Callable[[str], Awaitable[Any]]
+) -> AsyncIterator[bytes]:
+    """
+    Run run_item(video_path) for every path, at most parallelism at a time,
+    and yield one NDJSON line per item as soon as it finishes, tagged with
+    its "index" and "video_path". Items still running are cancelled when
+    the client goes away.
+    """
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+
+    async def run(index: int, video_path: str) -> Dict[str, Any]:
+        async with semaphore:
+            if not (video_path or "").strip():
+                result = {"ok": False, "message": "video_path is required"}
+            else:
+                try:
+                    result = jsonable_encoder(await run_item(video_path))
+                except HTTPException as exc:
+                    result = {"ok": False, "message": str(exc.detail)}
+                except Exception as exc:
+                    count_failure("crashed")
+                    result = {"ok": False, "message": "Batch item crashed: {0}".format(exc)}
+        return dict(result, index=index, video_path=video_path)
+
+    tasks = [asyncio.create_task(run(index, video_path)) for index, video_path in enumerate(video_paths)]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield (json.dumps(await finished, ensure_ascii=False) + "\n").encode("utf-8")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+@app.post("/probe-batch")
+async def probe_batch(req: ProbeBatchRequest, authorization: Optional[str] = Header(default=None)):
+    """
+    Probe many videos for one language in a single request; results are
+    streamed back as NDJSON in completion order.
+    """
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    validate_batch(req.video_paths)
+    language = (req.language or "").strip()
+    if not language:
+        raise HTTPException(status_code=400, detail="language is required")
+    if req.timeout <= 0:
+        raise HTTPException(status_code=400, detail="timeout must be greater than 0")
+    if PROBE_LIMITER.is_full():
+        raise PROBE_LIMITER.busy_error()
+
+    async def run_item(video_path: str) -> ProbeResponse:
+        # Accepted batch items wait for a free slot like jobs do
+        response = await probe_embedded_tracks(
+            video_path,
+            language,
+            req.timeout,
+            req.prefer_non_sdh,
+            wait_when_full=True
+        )
+        return trim_response(response, req.diagnostics)
+
+    return StreamingResponse(
+        stream_batch(req.video_paths, PROBE_LIMITER.limit, run_item),
+        media_type="application/x-ndjson"
+    )
+
+
+@app.post("/extract-batch")
+async def extract_batch(req: ExtractBatchRequest, authorization: Optional[str] = Header(default=None)):
+    """
+    Extract one source language from many videos in a single request;
+    results are streamed back as NDJSON in completion order. The SRT text
+    is left out unless include_content is set.
+    """
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    validate_batch(req.video_paths)
+    if not (req.source_lang or "").strip():
+        raise HTTPException(status_code=400, detail="source_lang is required")
+    if req.timeout <= 0:
+        raise HTTPException(status_code=400, detail="timeout must be greater than 0")
+    if EXTRACT_LIMITER.is_full():
+        raise EXTRACT_LIMITER.busy_error()
+
+    async def run_item(video_path: str) -> ExtractResponse:
+        item_req = ExtractRequest(
+            video_path=video_path,
+            source_lang=req.source_lang,
+            timeout=req.timeout,
+            prefer_non_sdh=req.prefer_non_sdh,
+            allow_ffmpeg_fallback=req.allow_ffmpeg_fallback,
+            force_reextract=req.force_reextract
         )
+        response = await extract_embedded_track(item_req, wait_when_full=True)
+        return trim_response(response, req.diagnostics, req.include_content)
+
+    return StreamingResponse(
+        stream_batch(req.video_paths, EXTRACT_LIMITER.limit, run_item),
+        media_type="application/x-ndjson"
+    )
+
+
+def prune_jobs() -> None:
+    cutoff = time.time() - JOB_TTL_SECONDS
+    for job_id in [
+        job_id for job_id, job in JOBS.items()
+        if job["status"] in JOB_FINAL_STATES and job["finished_at"] < cutoff
+    ]:
+        del JOBS[job_id]
+
+
+def update_job(job: Dict[str, Any], **fields: Any) -> None:
+    if "progress" in fields and fields["progress"] is not None:
+        fields["progress"] = round(fields["progress"], 1)
+    if all(job.get(key) == value for key, value in fields.items()):
+        return
+    job.update(fields)
+    job["version"] += 1
+
+
+def job_response(job: Dict[str, Any]) -> JobResponse:
+    return JobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        stage=job["stage"],
+        progress=job["progress"],
+        version=job["version"],
+        elapsed=round((job["finished_at"] or time.time()) - job["created_at"], 3),
+        result=job["result"]
     )
 
-    if os.path.exists(temp_output):
-        os.remove(temp_output)
+
+async def run_extract_job(
+    job: Dict[str, Any],
+    req: ExtractRequest,
+    extract: Callable[[Callable[[str, Optional[float]], None]], Awaitable[ExtractResponse]]
+) -> None:
+    # The job outlives its POST request, so its timings are kept on the job
+    REQUEST_TIMINGS.set(job["timings"])
+    update_job(job, status="running")
+
+    def report(stage: str, percent: Optional[float] = None) -> None:
+        update_job(job, stage=stage, progress=percent)
 
     try:
-        extract_result = run_cmd(
-            [
-                "ffmpeg",
-                "-y",
-                "-loglevel", "error",
-                "-i", resolved_video_path,
-                "-map", "0:s:{0}".format(selected["ffmpeg_sub_index"]),
-                temp_output,
-            ],
-            timeout=timeout
+        result = await extract(report)
+    except asyncio.CancelledError:
+        update_job(job, status="cancelled", stage="done", finished_at=time.time())
+        return
+    except HTTPException as exc:
+        result = ExtractResponse(
+            ok=False,
+            message=str(exc.detail),
+            resolved_video_path=apply_path_maps(req.video_path)
         )
-    except subprocess.TimeoutExpired:
-        return ExtractResponse(
+    except Exception as exc:
+        count_failure("crashed")
+        result = ExtractResponse(
             ok=False,
-            message="ffmpeg timed out after {0}s".format(timeout),
-            selected_track=selected,
-            all_tracks=tracks,
-            resolved_video_path=resolved_video_path
+            message="Extraction crashed: {0}".format(exc),
+            resolved_video_path=apply_path_maps(req.video_path)
         )
 
-    if extract_result.returncode != 0:
-        return ExtractResponse(
-            ok=False,
-            message="ffmpeg failed: {0}".format(extract_result.stderr.strip() or extract_result.stdout.strip() or "unknown_error"),
-            selected_track=selected,
-            all_tracks=tracks,
-            resolved_video_path=resolved_video_path
+    job["timings"]["total"] = time.time() - job["created_at"]
+    update_job(
+        job,
+        status="completed" if result.ok else "failed",
+        stage="done",
+        progress=100.0 if result.ok else job["progress"],
+        result=trim_response(result, req.diagnostics, req.include_content),
+        finished_at=time.time()
+    )
+
+
+def start_extract_job(
+    req: ExtractRequest,
+    extract: Optional[Callable[[Callable[[str, Optional[float]], None]], Awaitable[ExtractResponse]]] = None
+) -> Dict[str, Any]:
+    """
+    Register a job and start extract(report) for it in the background; by
+    default the job probes and extracts like /extract. Raises the 503
+    HTTPException when the extract queue is full.
+    """
+    prune_jobs()
+    if EXTRACT_LIMITER.is_full():
+        raise EXTRACT_LIMITER.busy_error()
+
+    if extract is None:
+        # Accepted jobs wait for a free slot instead of being turned away
+        def extract(report: Callable[[str, Optional[float]], None]) -> Awaitable[ExtractResponse]:
+            return extract_embedded_track(req, report=report, wait_when_full=True)
+
+    job = {
+        "id": uuid.uuid4().hex,
+        "status": "queued",
+        "stage": "queued",
+        "progress": None,
+        "version": 0,
+        "created_at": time.time(),
+        "finished_at": None,
+        "result": None,
+        "timings": {},
+    }
+    JOBS[job["id"]] = job
+    job["task"] = asyncio.create_task(run_extract_job(job, req, extract))
+    job["task"].add_done_callback(lambda _task: finish_cancelled_job(job))
+    return job
+
+
+def finish_cancelled_job(job: Dict[str, Any]) -> None:
+    # A task cancelled before its first step never runs run_extract_job's handler
+    if job["status"] not in JOB_FINAL_STATES:
+        update_job(job, status="cancelled", stage="done", finished_at=time.time())
+
+
+@app.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(req: ExtractRequest, authorization: Optional[str] = Header(default=None)):
+    require_auth(authorization)
+    ensure_runtime_dirs()
+    validate_extract_request(req)
+    return job_response(start_extract_job(req))
+
+
+@app.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    response: Response,
+    wait: float = 0,
+    since: Optional[int] = None,
+    authorization: Optional[str] = Header(default=None)
+):
+    """
+    Return the job state. With wait > 0 the request is held until the job
+    finishes or `wait` seconds pass (capped at JOB_MAX_WAIT_SECONDS); when
+    `since` is given it also returns as soon as the job version moves past it.
+    Finished jobs carry the Server-Timing of the extraction itself.
+    """
+    require_auth(authorization)
+    deadline = time.monotonic() + min(max(wait, 0.0), JOB_MAX_WAIT_SECONDS)
+
+    while True:
+        job = JOBS.get(job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Unknown job id")
+        if (
+            job["status"] in JOB_FINAL_STATES
+            or (since is not None and job["version"] > since)
+            or time.monotonic() >= deadline
+        ):
+            if job["status"] in JOB_FINAL_STATES and job["timings"]:
+                response.headers["Server-Timing"] = format_server_timing(job["timings"])
+            return job_response(job)
+        await asyncio.sleep(JOB_POLL_INTERVAL_SECONDS)
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str, authorization: Optional[str] = Header(default=None)):
+    require_auth(authorization)
+    job = JOBS.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job id")
+    job["task"].cancel()
+    # Let the cancellation land so the response shows the final state
+    await asyncio.wait([job["task"]], timeout=JOB_POLL_INTERVAL_SECONDS)
+    return job_response(job)
+
+
+def low_priority_prefix() -> List[str]:
+    prefix = []
+    if command_exists("nice"):
+        prefix += ["nice", "-n", "19"]
+    if command_exists("ionice"):
+        prefix += ["ionice", "-c", "3"]
+    return prefix
+
+
+def get_warm_roots() -> List[str]:
+    if WARM_ROOTS_RAW:
+        roots = [root.strip() for root in WARM_ROOTS_RAW.split(",")]
+    else:
+        roots = [(rule.get("to") or "").strip() for rule in PATH_MAPS]
+    return sorted({root for root in roots if root and os.path.isdir(root)})
+
+
+def in_warm_hours(now: Optional[datetime.datetime] = None) -> bool:
+    """
+    EXTRACTOR_WARM_HOURS is "start-end" in local hours, e.g. "1-6" or
+    "22-5"; empty means any time.
+    """
+    if not WARM_HOURS:
+        return True
+    try:
+        start, end = (int(part) % 24 for part in WARM_HOURS.split("-", 1))
+    except ValueError:
+        return True
+    hour = (now or datetime.datetime.now()).hour
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+def extractor_is_idle() -> bool:
+    return not (
+        PROBE_LIMITER.running or PROBE_LIMITER.queued
+        or EXTRACT_LIMITER.running or EXTRACT_LIMITER.queued
+    )
+
+
+def load_warm_state() -> Dict[str, Any]:
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS warmed ("
+            "path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, warmed REAL NOT NULL)"
         )
+        return {row[0]: (row[1], row[2]) for row in db.execute("SELECT path, size, mtime_ns FROM warmed")}
 
-    if not os.path.exists(temp_output) or os.path.getsize(temp_output) == 0:
-        return ExtractResponse(
-            ok=False,
-            message="ffmpeg produced no subtitle file",
-            selected_track=selected,
-            all_tracks=tracks,
-            resolved_video_path=resolved_video_path
+
+def save_warm_state(path: str, size: int, mtime_ns: int) -> None:
+    with contextlib.closing(connect_cache_index()) as db, db:
+        db.execute(
+            "INSERT OR REPLACE INTO warmed (path, size, mtime_ns, warmed) VALUES (?, ?, ?, ?)",
+            (path, size, mtime_ns, time.time())
         )
 
-    shutil.copy2(temp_output, cache_path)
-    with open(cache_path, "r", encoding="utf-8", errors="ignore") as subtitle_file:
-        subtitle_text = subtitle_file.read()
 
-    return ExtractResponse(
-        ok=True,
-        message="ffmpeg success",
-        method="ffmpeg",
-        cache_hit=False,
-        extracted_srt_path=cache_path,
-        extracted_srt_content=subtitle_text,
-        selected_track=selected,
-        all_tracks=tracks,
-        resolved_video_path=resolved_video_path
+def scan_warm_roots(roots: List[str], warmed: Dict[str, Any]) -> List[str]:
+    """
+    Return videos under roots that are new or changed since they were last
+    warmed and have not been modified for WARM_SETTLE_SECONDS.
+    """
+    settled_before = time.time() - WARM_SETTLE_SECONDS
+    pending = []
+    for root in roots:
+        for dirpath, _dirnames, filenames in os.walk(root):
+            for filename in filenames:
+                if not filename.lower().endswith(WARM_EXTENSIONS):
+                    continue
+                path = os.path.join(dirpath, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                if stat.st_mtime > settled_before:
+                    continue
+                if warmed.get(path) != (stat.st_size, stat.st_mtime_ns):
+                    pending.append(path)
+    return sorted(pending)
+
+
+def open_inotify(roots: List[str], on_path: Callable[[str], None]) -> Optional[Callable[[], None]]:
+    """
+    Watch every directory under roots and call on_path for each video that
+    is written or moved in. Returns a function that stops watching, or None
+    when inotify is unavailable or runs out of watches, in which case the
+    periodic scans alone find new files. Network mounts usually report no
+    events at all; the scans cover them as well.
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        inotify_fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if inotify_fd < 0:
+        return None
+
+    mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    watches: Dict[int, str] = {}
+
+    def watch_tree(top: str) -> bool:
+        for dirpath, _dirnames, _filenames in os.walk(top):
+            watch = libc.inotify_add_watch(inotify_fd, os.fsencode(dirpath), mask)
+            if watch < 0:
+                return False
+            watches[watch] = dirpath
+        return True
+
+    if not all(watch_tree(root) for root in roots):
+        LOGGER.warning("Library warmer: inotify watch limit reached, using periodic scans only")
+        os.close(inotify_fd)
+        return None
+
+    def read_events() -> None:
+        try:
+            data = os.read(inotify_fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(data):
+            watch, event_mask, _cookie, name_length = INOTIFY_EVENT.unpack_from(data, offset)
+            name = data[offset + INOTIFY_EVENT.size:offset + INOTIFY_EVENT.size + name_length].rstrip(b"\0")
+            offset += INOTIFY_EVENT.size + name_length
+            directory = watches.get(watch)
+            if directory is None or not name:
+                continue
+            path = os.path.join(directory, os.fsdecode(name))
+            if event_mask & IN_ISDIR:
+                if event_mask & (IN_CREATE | IN_MOVED_TO):
+                    watch_tree(path)
+            elif event_mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and path.lower().endswith(WARM_EXTENSIONS):
+                on_path(path)
+
+    loop = asyncio.get_running_loop()
+    loop.add_reader(inotify_fd, read_events)
+
+    def close() -> None:
+        loop.remove_reader(inotify_fd)
+        os.close(inotify_fd)
+
+    return close
+
+
+async def warm_video(path: str) -> None:
+    """
+    Probe and extract the warm languages of one video as background work:
+    lowest CPU and disk priority, reads paced to EXTRACTOR_WARM_MAX_MBPS.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+
+    timeout = WARM_TIMEOUT_SECONDS
+    if WARM_MAX_MB_PER_SECOND > 0:
+        # Paced tools may read the whole file at the capped rate
+        timeout += int(stat.st_size / (WARM_MAX_MB_PER_SECOND * 1024 * 1024))
+
+    background_token = BACKGROUND_WORK.set(True)
+    try:
+        for language in WARM_LANGUAGES:
+            try:
+                result = await extract_embedded_track(
+                    ExtractRequest(video_path=path, source_lang=language, timeout=timeout),
+                    wait_when_full=True
+                )
+            except HTTPException as exc:
+                LOGGER.warning("Library warmer: %s (%s): %s", path, language, exc.detail)
+                continue
+            if not result.ok:
+                LOGGER.info("Library warmer: %s (%s): %s", path, language, result.message)
+    finally:
+        BACKGROUND_WORK.reset(background_token)
+
+    await asyncio.to_thread(save_warm_state, path, stat.st_size, stat.st_mtime_ns)
+    WARMER_STATUS["files_warmed"] += 1
+
+
+async def wait_for_warm_turn() -> None:
+    while not (in_warm_hours() and extractor_is_idle()):
+        await asyncio.sleep(WARM_IDLE_POLL_SECONDS)
+
+
+async def run_library_warmer() -> None:
+    """
+    Warm new and changed videos under the warm roots: a full mtime scan
+    every EXTRACTOR_WARM_INTERVAL seconds, plus inotify events in between
+    where the filesystem delivers them. Only one uvicorn worker warms; the
+    others find the lock taken and return.
+    """
+    ensure_runtime_dirs()
+    lock_dir = os.path.join(CACHE_DIR, ".locks")
+    os.makedirs(lock_dir, exist_ok=True)
+    lock_fd = os.open(os.path.join(lock_dir, "library-warmer.lock"), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(lock_fd)
+        return
+
+    roots = get_warm_roots()
+    WARMER_STATUS.update(active=True, roots=roots)
+    if not roots:
+        LOGGER.warning("Library warmer: no existing warm roots, set EXTRACTOR_WARM_ROOTS or EXTRACTOR_PATH_MAPS")
+
+    changed: "asyncio.Queue[str]" = asyncio.Queue()
+    close_inotify = open_inotify(roots, changed.put_nowait) if roots else None
+    WARMER_STATUS["inotify"] = close_inotify is not None
+    LOGGER.info(
+        "Library warmer: languages %s, roots %s, inotify %s",
+        ", ".join(WARM_LANGUAGES),
+        ", ".join(roots) or "none",
+        "on" if close_inotify else "off"
     )
+
+    try:
+        while True:
+            warmed = await asyncio.to_thread(load_warm_state)
+            pending = await asyncio.to_thread(scan_warm_roots, roots, warmed)
+            WARMER_STATUS.update(last_scan=time.time(), pending=len(pending))
+            for path in pending:
+                await wait_for_warm_turn()
+                await warm_video(path)
+                WARMER_STATUS["pending"] -= 1
+
+            next_scan = time.monotonic() + WARM_SCAN_INTERVAL_SECONDS
+            while time.monotonic() < next_scan:
+                try:
+                    path = await asyncio.wait_for(changed.get(), next_scan - time.monotonic())
+                except asyncio.TimeoutError:
+                    break
+                # Let the writer finish, then warm everything reported meanwhile
+                await asyncio.sleep(WARM_SETTLE_SECONDS)
+                paths = {path}
+                while not changed.empty():
+                    paths.add(changed.get_nowait())
+                for path in sorted(paths):
+                    await wait_for_warm_turn()
+                    await warm_video(path)
+    finally:
+        if close_inotify is not None:
+            close_inotify()
+        WARMER_STATUS["active"] = False
+        fcntl.flock(lock_fd, fcntl.LOCK_UN)
+        os.close(lock_fd)